@@ -16,3 +16,6 @@ from wield.pytest.fixtures import (  # noqa
     closefigs,
     capture,
 )
+
+# used by the tests of the plugin hooks
+pytest_plugins = ["pytester"]
@@ -10,6 +10,7 @@
 
 from ._version import version, __version__, version_info
 from .utilities import Timer
+from .benchmark import Benchmark
 import contextlib
 from .fixtures import (
     plot,
@@ -17,10 +18,23 @@ from .fixtures import (
     fpath,
     tpath_join,
     fpath_join,
+    tpath_class,
+    tpath_join_class,
+    fpath_class,
+    tpath_module,
+    tpath_join_module,
+    fpath_module,
+    tpath_session,
+    tpath_join_session,
+    fpath_session,
     tpath_preclear,
     closefigs,
     test_trigger,
     capture,
+    ws_benchmark,
+    ws_render,
+    golden,
+    ws_cached,
 )
 
 from .anywhere import tjoin, fjoin, dprint
@@ -68,10 +82,54 @@ def pytest_addoption(parser, **kwargs):
             _options_added[k] = True
 
 
+class _MPLBackendFinder(object):
+    """
+    Import hook assigning the agg backend as soon as matplotlib is imported.
+    Used rather than setting MPLBACKEND, which subprocesses would inherit.
+    """
+    def find_spec(self, name, path, target=None):
+        if name != 'matplotlib':
+            return None
+        import sys
+        import importlib.util
+        sys.meta_path.remove(self)
+        spec = importlib.util.find_spec(name)
+        if spec is None or spec.loader is None:
+            return spec
+        exec_module = spec.loader.exec_module
+
+        def exec_module_agg(module):
+            exec_module(module)
+            module.use('agg')
+        spec.loader.exec_module = exec_module_agg
+        return spec
+
+
+_mpl_backend_finder = None
+
+
 def pytest_configure(config):
+    global _mpl_backend_finder
     if config.option.ws_mpl_backend:
-        import matplotlib
-        matplotlib.use('agg')
+        # importing matplotlib is slow, so the backend is only assigned directly
+        # if it is already loaded. Otherwise it is assigned when a test first
+        # imports it.
+        import sys
+        if 'matplotlib' in sys.modules:
+            import matplotlib
+            matplotlib.use('agg')
+        elif _mpl_backend_finder is None:
+            _mpl_backend_finder = _MPLBackendFinder()
+            sys.meta_path.insert(0, _mpl_backend_finder)
+
+
+def pytest_unconfigure(config):
+    global _mpl_backend_finder
+    if _mpl_backend_finder is not None:
+        import sys
+        if _mpl_backend_finder in sys.meta_path:
+            sys.meta_path.remove(_mpl_backend_finder)
+        _mpl_backend_finder = None
 
 
 @contextlib.contextmanager
@@ -96,14 +154,28 @@ __all__ = [
     "tjoin",
     "fpath",
     "fjoin",
+    "tpath_class",
+    "tpath_join_class",
+    "fpath_class",
+    "tpath_module",
+    "tpath_join_module",
+    "fpath_module",
+    "tpath_session",
+    "tpath_join_session",
+    "fpath_session",
     "tpath_preclear",
     "closefigs",
     "test_trigger",
     "dprint",
     "capture",
+    "ws_benchmark",
+    "ws_render",
+    "golden",
+    "ws_cached",
     "tpath_root_make",
     "fpath_raw_make",
     "Timer",
+    "Benchmark",
     "importskip",
     "tjoin",
     "fjoin",
@@ -22,10 +22,10 @@ def tjoin(*subpath):
 
     This function should be use like test_thing.save(tjoin('output_file.png'))
     """
-    if not fixtures._pytest_request:
+    request = fixtures.pytest_request_top()
+    if request is None:
         raise RuntimeError("tjoin must be used from within a pytest")
 
-    request = fixtures._pytest_request[-1]
     tpath_root, tpath_local = utilities.tpath_root_make(request)
     try:
         first_call = getattr(request, '_first_call', True)
@@ -33,30 +33,10 @@ def tjoin(*subpath):
         first_call = True
 
     if first_call:
-        os.makedirs(tpath_root, exist_ok=True)
-        os.utime(tpath_root, None)
-        first_call = False
+        utilities.tpath_setup(tpath_root, tpath_local)
         if request is not None:
             request._first_call = False
-
-        tpath_rel = os.path.relpath(os.path.realpath(tpath_root), os.path.realpath(os.path.split(tpath_local)[0]))
-        if os.path.islink(tpath_local):
-            if os.path.normpath(
-                os.path.join(
-                    os.path.split(tpath_local)[0], os.readlink(tpath_local)
-                )
-            ) != os.path.normpath(tpath_root):
-                os.unlink(tpath_local)
-                os.makedirs(path.split(tpath_local)[0], exist_ok=True)
-                os.symlink(tpath_rel, tpath_local, target_is_directory=True)
-        elif not os.path.exists(tpath_local):
-            os.makedirs(path.split(tpath_local)[0], exist_ok=True)
-            os.symlink(tpath_rel, tpath_local, target_is_directory=True)
-        else:
-            import warnings
-
-            warnings.warn("test_results local path {} exists".format(tpath_local))
-    return path.join(tpath_root, *subpath)
+    return utilities.tpath_file(tpath_root, *subpath)
 
 
 def fjoin(*path):
@@ -66,10 +46,10 @@ def fjoin(*path):
     data files.
     """
 
-    if not fixtures._pytest_request:
+    request = fixtures.pytest_request_top()
+    if request is None:
         raise RuntimeError("fjoin must be used from within a pytest")
 
-    request = fixtures._pytest_request[-1]
     return os.path.join(utilities.fpath_raw_make(request), *path)
 
 
@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+Content-addressed storage of the test_results artifacts, for --ws-artifacts.
+
+At the end of the session, the files in the per-test folders of test_results
+are hashed and stored once in test_results/.artifacts/pool, with the files in
+the test folders replaced by hardlinks to the pool. Byte-identical outputs of
+different tests or runs then share their storage.
+
+test_results/.artifacts/index.json keeps the hash, size and mtime of every
+file, so files that were not rewritten are not hashed again, and
+test_results/artifacts_manifest.json lists the files that changed or were
+removed since the previous run.
+
+So that tests never write through a link into the pool, the links are broken
+lazily: tpath_join and tjoin unlink the pooled file at the path they return,
+which the test is about to write. Only the tpath fixture, which hands out the
+whole folder, copies the pooled files of the folder up front. The pool keeps
+the content until no test folder links to it anymore.
+"""
+import os
+import json
+import stat
+import shutil
+import hashlib
+import concurrent.futures
+
+
+ARTIFACTS_FOLDER = ".artifacts"
+MANIFEST_FNAME = "artifacts_manifest.json"
+# rewritten by every run, so not worth storing
+ARTIFACTS_IGNORE = {"capture.txt"}
+
+
+def results_path(config):
+    return os.path.join(str(config.rootpath), "test_results")
+
+
+def hash_file(fpath, chunk=1 << 20):
+    H = hashlib.sha256()
+    with open(fpath, "rb") as F:
+        while True:
+            data = F.read(chunk)
+            if not data:
+                break
+            H.update(data)
+    return H.hexdigest()
+
+
+def detach_file(fpath):
+    """
+    Unlink fpath if it is linked into the pool, so that the file about to be
+    written there does not reach the pool or the other links
+    """
+    try:
+        st = os.lstat(fpath)
+    except OSError:
+        return
+    if stat.S_ISREG(st.st_mode) and st.st_nlink > 1:
+        os.unlink(fpath)
+    return
+
+
+def detach(tpath_root):
+    """
+    Replace the hardlinked files in the folder of a test about to run by
+    copies, so that writes into them do not reach the pool or other links.
+    The copies keep their mtime, so the next update relinks them without
+    hashing them again.
+    """
+    stack = [tpath_root]
+    while stack:
+        fdir = stack.pop()
+        try:
+            entries = list(os.scandir(fdir))
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(entry.path)
+            elif entry.is_file(follow_symlinks=False) and entry.stat(follow_symlinks=False).st_nlink > 1:
+                fpath_tmp = entry.path + ".wscopy"
+                shutil.copy2(entry.path, fpath_tmp)
+                os.replace(fpath_tmp, entry.path)
+    return
+
+
+class ArtifactStore(object):
+    def __init__(self, results_root, workers=8):
+        self.root = results_root
+        self.pool = os.path.join(results_root, ARTIFACTS_FOLDER, "pool")
+        self.index_fname = os.path.join(results_root, ARTIFACTS_FOLDER, "index.json")
+        self.workers = workers
+
+    def pool_path(self, h):
+        return os.path.join(self.pool, h[:2], h)
+
+    def load_index(self):
+        try:
+            with open(self.index_fname, "r") as F:
+                return json.load(F)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def save_index(self, index):
+        os.makedirs(os.path.split(self.index_fname)[0], exist_ok=True)
+        fname_tmp = self.index_fname + ".tmp{}".format(os.getpid())
+        with open(fname_tmp, "w") as F:
+            json.dump(index, F, separators=(",", ":"))
+        os.replace(fname_tmp, self.index_fname)
+
+    def iter_files(self):
+        """
+        Yield the (relpath, fpath, stat) of the files in the test folders,
+        skipping the top-level files and the hidden folders of test_results.
+        """
+        for fdir, dnames, fnames in os.walk(self.root):
+            dnames[:] = [dname for dname in dnames if not dname.startswith(".")]
+            if fdir == self.root:
+                continue
+            for fname in fnames:
+                if fname in ARTIFACTS_IGNORE or fname.startswith("."):
+                    continue
+                fpath = os.path.join(fdir, fname)
+                st = os.lstat(fpath)
+                if not stat.S_ISREG(st.st_mode):
+                    continue
+                yield os.path.relpath(fpath, self.root), fpath, st
+
+    def _link(self, fpath, h):
+        """
+        Make fpath a link to the pool entry of hash h, adding it to the pool if
+        it is new. Returns True if the content was already pooled.
+        """
+        fpath_pool = self.pool_path(h)
+        try:
+            if os.path.exists(fpath_pool):
+                fpath_tmp = fpath + ".wslink"
+                os.link(fpath_pool, fpath_tmp)
+                os.replace(fpath_tmp, fpath)
+                return True
+            os.makedirs(os.path.split(fpath_pool)[0], exist_ok=True)
+            os.link(fpath, fpath_pool)
+        except OSError:
+            # e.g. no hardlinks on this filesystem, then the file is only
+            # tracked in the manifest
+            pass
+        return False
+
+    def prune(self):
+        """
+        Delete the pool entries that no test folder links to
+        """
+        for fdir, dnames, fnames in os.walk(self.pool):
+            for fname in fnames:
+                fpath = os.path.join(fdir, fname)
+                if os.lstat(fpath).st_nlink == 1:
+                    os.unlink(fpath)
+
+    def update(self):
+        """
+        Pool the files of the test folders and update the index. Returns the
+        manifest of the changes since the last update.
+        """
+        index_prev = self.load_index()
+        index = {}
+        to_hash = []
+        for relpath, fpath, st in self.iter_files():
+            entry = index_prev.get(relpath, None)
+            if entry is None or entry[2:] != [st.st_size, st.st_mtime_ns]:
+                to_hash.append((relpath, fpath))
+                continue
+            if st.st_ino != entry[1]:
+                # the same content in a copy made by detach
+                self._link(fpath, entry[0])
+                entry = [entry[0], os.lstat(fpath).st_ino, st.st_size, st.st_mtime_ns]
+            index[relpath] = entry
+
+        with concurrent.futures.ThreadPoolExecutor(self.workers) as executor:
+            hashes = list(executor.map(lambda rf: hash_file(rf[1]), to_hash))
+
+        changed = []
+        deduplicated = 0
+        for (relpath, fpath), h in zip(to_hash, hashes):
+            if self._link(fpath, h):
+                deduplicated += 1
+            st = os.lstat(fpath)
+            index[relpath] = [h, st.st_ino, st.st_size, st.st_mtime_ns]
+            entry = index_prev.get(relpath, None)
+            if entry is None or entry[0] != h:
+                changed.append(relpath)
+
+        self.prune()
+        self.save_index(index)
+        return dict(
+            changed=sorted(changed),
+            removed=sorted(set(index_prev) - set(index)),
+            hashed=len(to_hash),
+            unchanged=len(index) - len(changed),
+            deduplicated=deduplicated,
+        )
+
+
+# whether --ws-artifacts is in use, in any process
+_enabled = False
+
+
+def artifacts_start(config):
+    global _enabled
+    _enabled = True
+    return
+
+
+def artifacts_enabled():
+    return _enabled
+
+
+def artifacts_finish(config):
+    """
+    Update the store and write the manifest. Returns the manifest.
+    """
+    root = results_path(config)
+    manifest = ArtifactStore(root).update()
+    fname = os.path.join(root, MANIFEST_FNAME)
+    fname_tmp = fname + ".tmp{}".format(os.getpid())
+    with open(fname_tmp, "w") as F:
+        json.dump(manifest, F, indent=1)
+    os.replace(fname_tmp, fname)
+    return manifest
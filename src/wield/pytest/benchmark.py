@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+Statistical micro-benchmarks, used by the ws_benchmark fixture.
+
+Timer takes a single interval of a fixed N, which is too noisy for
+sub-millisecond kernels. Benchmark calibrates N so that each repeat lasts a
+target duration, runs warmup rounds and several repeats with perf_counter_ns,
+optionally with the garbage collector disabled, and reports robust statistics
+of the time per call.
+"""
+import gc
+import json
+import time
+import statistics
+
+from .utilities import time_str
+
+
+class BenchmarkResult(object):
+    """
+    Times per call of each repeat of a benchmark, with summary statistics
+    """
+    def __init__(self, name, N, times):
+        self.name = name
+        self.N = N
+        self.times = sorted(times)
+
+    @property
+    def median(self):
+        return statistics.median(self.times)
+
+    @property
+    def min(self):
+        return self.times[0]
+
+    @property
+    def max(self):
+        return self.times[-1]
+
+    @property
+    def mean(self):
+        return statistics.fmean(self.times)
+
+    @property
+    def iqr(self):
+        if len(self.times) < 2:
+            return 0.
+        q1, q2, q3 = statistics.quantiles(self.times, n=4, method='inclusive')
+        return q3 - q1
+
+    @property
+    def ops(self):
+        """
+        Calls per second, from the median
+        """
+        return 1 / self.median
+
+    def __float__(self):
+        return self.median
+
+    def __str__(self):
+        return "{}: {} median, {} IQR, {} min, {:.4g} ops/s (N={}, repeats={})".format(
+            self.name,
+            time_str(self.median),
+            time_str(self.iqr),
+            time_str(self.min),
+            self.ops,
+            self.N,
+            len(self.times),
+        )
+
+    def asdict(self):
+        return dict(
+            name=self.name,
+            N=self.N,
+            repeats=len(self.times),
+            median=self.median,
+            iqr=self.iqr,
+            min=self.min,
+            max=self.max,
+            mean=self.mean,
+            ops=self.ops,
+            times=self.times,
+        )
+
+
+class Benchmark(object):
+    """
+    Benchmark engine.
+
+    target: the duration in seconds of each repeat, used to calibrate N
+    repeats: the number of timed repeats
+    warmup: the number of untimed repeats run before timing
+    disable_gc: disable the garbage collector while timing
+    N: fixed number of calls per repeat, skipping calibration
+    """
+    def __init__(
+        self,
+        target=0.05,
+        repeats=7,
+        warmup=1,
+        disable_gc=False,
+        N=None,
+    ):
+        self.target = target
+        self.repeats = repeats
+        self.warmup = warmup
+        self.disable_gc = disable_gc
+        self.N = N
+
+    @staticmethod
+    def _time(func, args, kwargs, N):
+        """
+        The time in ns of N calls
+        """
+        it = range(N)
+        t_start = time.perf_counter_ns()
+        for _ in it:
+            func(*args, **kwargs)
+        return time.perf_counter_ns() - t_start
+
+    def calibrate(self, func, args=(), kwargs={}):
+        """
+        The number of calls whose total time reaches the target duration
+        """
+        target_ns = self.target * 1e9
+        N = 1
+        while True:
+            t_ns = self._time(func, args, kwargs, N)
+            if t_ns >= target_ns:
+                return N
+            if t_ns <= 0:
+                N *= 10
+            else:
+                # overshoot a little to converge in few rounds
+                N = int(N * min(10, max(2, 1.2 * target_ns / t_ns)))
+
+    def run(self, func, args=(), kwargs={}, name=None):
+        if name is None:
+            name = getattr(func, '__name__', repr(func))
+
+        gc_was_enabled = gc.isenabled()
+        if self.disable_gc:
+            gc.collect()
+            gc.disable()
+        try:
+            N = self.N
+            if N is None:
+                N = self.calibrate(func, args, kwargs)
+            for idx in range(self.warmup):
+                self._time(func, args, kwargs, N)
+            times = []
+            for idx in range(self.repeats):
+                times.append(self._time(func, args, kwargs, N) * 1e-9 / N)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        return BenchmarkResult(name, N, times)
+
+    def __call__(self, func, *args, **kwargs):
+        return self.run(func, args, kwargs)
+
+
+class BenchmarkRecorder(Benchmark):
+    """
+    Benchmark that prints and keeps its results, used by the ws_benchmark
+    fixture to save them.
+    """
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.results = []
+
+    def run(self, func, args=(), kwargs={}, name=None):
+        result = super().run(func, args=args, kwargs=kwargs, name=name)
+        print(result)
+        self.results.append(result)
+        return result
+
+    def save(self, fname):
+        with open(fname, "w") as F:
+            json.dump(
+                dict(results=[result.asdict() for result in self.results]),
+                F,
+                indent=1,
+            )
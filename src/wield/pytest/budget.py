@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+Value-based test selection for --ws-time-budget.
+
+Each test gets an estimated duration from the durations database (tests
+without history get the median of their module, or of all tests) and a value
+from
+
+- failing on its last run
+- its module having changed since it last ran, per the --ws-impact
+  fingerprints, or never having run
+- the time since it last ran, relative to the most recently run test, so that
+  tests left out of budgeted runs rotate back in
+
+The tests are then picked greedily by value per second until the budget is
+spent. The selection only depends on the stored history, so every xdist
+worker picks the same tests.
+"""
+import re
+import statistics
+
+from . import durations
+from . import impact
+
+
+VALUE_BASE = 1.
+VALUE_FAILED = 20.
+VALUE_CHANGED = 10.
+# value per day since the test last ran
+VALUE_PER_DAY = 1.
+# the staleness value stops growing after this many days
+STALE_DAYS_MAX = 14
+
+
+def parse_duration(text):
+    """
+    Seconds from text such as "90", "120s", "2m" or "1.5h"
+    """
+    m = re.match(r"^\s*([0-9.]+)\s*([smh]?)\s*$", text)
+    if not m:
+        raise ValueError("Unrecognized duration {}".format(text))
+    value = float(m.group(1))
+    return value * {"": 1, "s": 1, "m": 60, "h": 3600}[m.group(2)]
+
+
+def estimate_durations(nodeids, stats):
+    """
+    The estimated durations of the nodeids, falling back to the module median
+    and then the overall median for tests without history.
+    """
+    by_module = {}
+    for nodeid, stat in stats.items():
+        by_module.setdefault(stat["module"], []).append(stat["duration"])
+    if stats:
+        overall = statistics.median(stat["duration"] for stat in stats.values())
+    else:
+        overall = 1.
+
+    estimates = {}
+    for nodeid in nodeids:
+        stat = stats.get(nodeid, None)
+        if stat is not None:
+            estimates[nodeid] = stat["duration"]
+            continue
+        mod_durations = by_module.get(durations.nodeid_module(nodeid), None)
+        if mod_durations:
+            estimates[nodeid] = statistics.median(mod_durations)
+        else:
+            estimates[nodeid] = overall
+    return estimates
+
+
+def node_values(nodeids, stats, changed):
+    """
+    The selection value of each nodeid. changed is the set of nodeids whose
+    module changed since they last ran.
+    """
+    t_latest = max((stat["time"] for stat in stats.values()), default=0)
+    values = {}
+    for nodeid in nodeids:
+        value = VALUE_BASE
+        stat = stats.get(nodeid, None)
+        if stat is None:
+            value += VALUE_CHANGED
+        else:
+            if stat["outcome"] == "failed":
+                value += VALUE_FAILED
+            days = (t_latest - stat["time"]) / 86400
+            value += VALUE_PER_DAY * min(days, STALE_DAYS_MAX)
+        if nodeid in changed:
+            value += VALUE_CHANGED
+        values[nodeid] = value
+    return values
+
+
+def changed_nodeids(items, config):
+    """
+    The nodeids of the items that --ws-impact would select
+    """
+    store = impact.load(impact.impact_path(config))
+    if not store["modules"]:
+        return set()
+    graph = impact.ImportGraph(config.rootpath)
+    selected, deselected = impact.select(items, store, graph, config.rootpath)
+    # failures are accounted for by the durations
+    return set(item.nodeid for item in selected)
+
+
+def select(nodeids, estimates, values, budget):
+    """
+    Greedily pick the nodeids with the most value per second that fit the
+    budget. Returns the set of selected nodeids.
+    """
+    order = sorted(
+        nodeids,
+        # ties broken by nodeid, to be deterministic
+        key=lambda nodeid: (-values[nodeid] / max(estimates[nodeid], 1e-3), nodeid),
+    )
+    selected = set()
+    spent = 0
+    for nodeid in order:
+        if spent + estimates[nodeid] <= budget:
+            selected.add(nodeid)
+            spent += estimates[nodeid]
+    return selected
+
+
+def budget_items(items, config, budget):
+    """
+    Split the items into (selected, deselected, estimates) for the budget in
+    seconds
+    """
+    stats = durations.load(durations.durations_path(config))
+    nodeids = [item.nodeid for item in items]
+    estimates = estimate_durations(nodeids, stats)
+    values = node_values(nodeids, stats, changed_nodeids(items, config))
+    chosen = select(nodeids, estimates, values, budget)
+    selected = [item for item in items if item.nodeid in chosen]
+    deselected = [item for item in items if item.nodeid not in chosen]
+    return selected, deselected, estimates
+
+
+def summary_lines(selected, deselected, estimates, budget, N=5):
+    """
+    Terminal summary of a budgeted selection
+    """
+    t_selected = sum(estimates[item.nodeid] for item in selected)
+    t_deselected = sum(estimates[item.nodeid] for item in deselected)
+    lines = [
+        "selected {} tests, estimated {:.1f}s of the {:.1f}s budget".format(len(selected), t_selected, budget),
+        "deselected {} tests, estimated {:.1f}s".format(len(deselected), t_deselected),
+    ]
+    by_module = {}
+    for item in deselected:
+        mod = durations.nodeid_module(item.nodeid)
+        count, t = by_module.get(mod, (0, 0))
+        by_module[mod] = (count + 1, t + estimates[item.nodeid])
+    for mod, (count, t) in sorted(by_module.items(), key=lambda kv: -kv[1][1])[:N]:
+        lines.append("  {:5d} tests {:8.1f}s  {}".format(count, t, mod))
+    if len(by_module) > N:
+        lines.append("  ... and {} more modules".format(len(by_module) - N))
+    return lines
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+Background writer for the capture.txt reports.
+
+The reporting hook formats the report in memory and hands it to the writer,
+so that the next test does not wait on the filesystem (which is slow for large
+outputs on network filesystems). The writer thread batches the queued reports
+and is drained at the end of the session.
+"""
+import os
+import queue
+import threading
+
+from . import utilities
+from . import resources
+
+
+def capture_text(report):
+    """
+    Format the content of capture.txt for a test report
+    """
+    outs = []
+    outs.append('status: {}\n'.format(report.outcome))
+    outs.append('duration: {:.3f}s\n'.format(report.duration))
+    use = resources.report_usage(report)
+    if use is not None:
+        outs.append(resources.usage_text(use))
+
+    for section in report.sections:
+        header, content = section
+        outs.append(header)
+        outs.append('\n')
+        outs.append(content)
+    # testing
+    # longreprtext is only filled out on failure by pytest
+    #    otherwise will be None.
+    #  Use full_text if longreprtext is None-ish
+    #   we added full_text elsewhere in this file.
+    text = report.longreprtext
+    if text:
+        outs.append('captured errors:\n')
+        outs.append(text)
+    return ''.join(outs)
+
+
+class CaptureWriter(object):
+    """
+    Writes (fname, text) pairs from a bounded queue in a daemon thread.
+
+    The queue is bounded so that a slow filesystem applies backpressure rather
+    than accumulating unbounded output in memory.
+    """
+    def __init__(self, maxsize=256, batch=32):
+        self.queue = queue.Queue(maxsize)
+        self.batch = batch
+        self.thread = None
+        self.errors = []
+
+    def submit(self, fname, text):
+        if self.thread is None:
+            self.thread = threading.Thread(
+                target=self._run,
+                name="wield-capture-writer",
+                daemon=True,
+            )
+            self.thread.start()
+        self.queue.put((fname, text))
+
+    def write(self, fname, text):
+        """
+        Synchronously write, after flushing everything queued before it.
+        """
+        self.flush()
+        self._write(fname, text)
+
+    def flush(self):
+        if self.thread is not None:
+            self.queue.join()
+
+    def close(self):
+        """
+        Drain the queue and stop the writer thread. Returns the list of
+        (fname, exception) of failed writes.
+        """
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+        return self.errors
+
+    def _write(self, fname, text):
+        # make sure the folder exists
+        utilities.makedirs_cached(os.path.split(fname)[0])
+        with open(fname, "w") as F:
+            F.write(text)
+
+    def _run(self):
+        while True:
+            items = [self.queue.get()]
+            # batch up everything else that is ready
+            while len(items) < self.batch:
+                try:
+                    items.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            done = False
+            for item in items:
+                if item is None:
+                    done = True
+                    continue
+                fname, text = item
+                try:
+                    self._write(fname, text)
+                except Exception as E:
+                    self.errors.append((fname, E))
+
+            for item in items:
+                self.queue.task_done()
+            if done:
+                return
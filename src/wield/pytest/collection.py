@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+Structured output and caching for --ws-collect-only.
+
+Along with the indented text printed for parse_collection, --ws-co writes
+test_results/collection.jsonl, one line per collected item, holding the
+nodeid, the chain of collectors, the marker names and the hashes of the module.
+The items are written before any deselection (-k, -m or plugins), and the
+file is not written when nodeid arguments collect only parts of modules.
+
+With --ws-co-cache, that file also serves as a collection cache. Modules whose
+fingerprint (from wield.pytest.impact, the hash of the module and its local
+imports) matches are rebuilt from the cached records rather than imported.
+"""
+import os
+import json
+import pytest
+
+from . import impact
+
+
+COLLECTION_FNAME = "collection.jsonl"
+
+
+def collection_path(config):
+    fname = config.option.ws_co_jsonl
+    if fname:
+        return fname
+    return os.path.join(str(config.rootpath), "test_results", COLLECTION_FNAME)
+
+
+def typename(col):
+    """
+    The collector type name to report, which for cached nodes is the type of
+    the node they were cached from.
+    """
+    return getattr(col, "ws_typename", col.__class__.__name__)
+
+
+def item_record(item, rootpath, graph):
+    """
+    The JSON record of a collected item
+    """
+    chain = item.listchain()[1:]  # strip root node
+    # index of the module in the chain, after which nodes are cached
+    imod = None
+    for idx, col in enumerate(chain):
+        if isinstance(col, pytest.File):
+            imod = idx
+    fpath = str(item.path)
+    rec = dict(
+        nodeid=item.nodeid,
+        path=os.path.relpath(fpath, str(rootpath)),
+        chain=[
+            [typename(col), col.name, os.path.relpath(str(col.path), str(rootpath))]
+            for col in chain
+        ],
+        module_index=imod,
+        markers=sorted(set(mark.name for mark in item.iter_markers())),
+    )
+    if os.path.isfile(fpath):
+        stat = os.stat(fpath)
+        rec["mtime"] = stat.st_mtime_ns
+        rec["hash"] = graph.hash(os.path.realpath(fpath))
+        rec["fingerprint"] = graph.fingerprint(fpath)
+    return rec
+
+
+def write_collection(fname, items, rootpath):
+    graph = impact.ImportGraph(rootpath)
+    os.makedirs(os.path.split(fname)[0], exist_ok=True)
+    fname_tmp = fname + ".tmp{}".format(os.getpid())
+    with open(fname_tmp, "w") as F:
+        for item in items:
+            F.write(json.dumps(item_record(item, rootpath, graph), separators=(",", ":")))
+            F.write("\n")
+    os.replace(fname_tmp, fname)
+
+
+class CollectionCache(object):
+    """
+    Cached records of the previous --ws-co, by module path.
+    """
+    def __init__(self, fname, rootpath):
+        self.rootpath = str(rootpath)
+        self.graph = impact.ImportGraph(rootpath)
+        self.modules = {}
+        try:
+            F = open(fname, "r")
+        except FileNotFoundError:
+            return
+        with F:
+            for line in F:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                if rec.get("module_index", None) is None or "fingerprint" not in rec:
+                    continue
+                fpath = os.path.normpath(os.path.join(self.rootpath, rec["path"]))
+                self.modules.setdefault(fpath, []).append(rec)
+
+    def records(self, module_path):
+        """
+        The cached records of the module if they are still valid, else None
+        """
+        fpath = os.path.normpath(str(module_path))
+        recs = self.modules.get(fpath, None)
+        if recs is None:
+            return None
+        if self.graph.fingerprint(fpath) != recs[0]["fingerprint"]:
+            return None
+        return recs
+
+
+def _cached_children(parent, recs, depth):
+    """
+    Build the children of parent from the records, depth being the index of
+    the child in the record chains.
+    """
+    groups = {}
+    for rec in recs:
+        groups.setdefault(rec["chain"][depth][1], []).append(rec)
+
+    children = []
+    for name, grecs in groups.items():
+        ctype = grecs[0]["chain"][depth][0]
+        if len(grecs[0]["chain"]) > depth + 1:
+            col = CachedCollector.from_parent(parent, name=name)
+            col.ws_typename = ctype
+            col.ws_records = grecs
+            col.ws_depth = depth + 1
+            children.append(col)
+        else:
+            item = CachedItem.from_parent(parent, name=name)
+            item.ws_typename = ctype
+            for mark in grecs[0]["markers"]:
+                item.add_marker(mark)
+            children.append(item)
+    return children
+
+
+class CachedModule(pytest.File):
+    """
+    Module rebuilt from the collection cache, without importing it
+    """
+    ws_typename = "Module"
+    ws_records = ()
+    ws_depth = 0
+
+    def collect(self):
+        return _cached_children(self, self.ws_records, self.ws_depth)
+
+
+class CachedCollector(pytest.Collector):
+    ws_records = ()
+    ws_depth = 0
+
+    def collect(self):
+        return _cached_children(self, self.ws_records, self.ws_depth)
+
+
+class CachedItem(pytest.Item):
+    def runtest(self):
+        raise RuntimeError("Items from the collection cache can only be listed, not run")
+
+    def reportinfo(self):
+        return self.path, None, self.name
+
+
+def make_cached_module(cache, module_path, parent):
+    """
+    A CachedModule for module_path if the cache is valid for it, else None
+    """
+    recs = cache.records(module_path)
+    if recs is None:
+        return None
+    imod = recs[0]["module_index"]
+    col = CachedModule.from_parent(parent, path=module_path)
+    col.ws_typename = recs[0]["chain"][imod][0]
+    col.ws_records = recs
+    col.ws_depth = imod + 1
+    return col
@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+Persistent database of per-test durations.
+
+The plugin appends one JSON line per test to test_results/durations.jsonl
+holding the setup, call and teardown durations and the outcome. The file is
+compacted at the end of each session so that only the most recent records of
+each nodeid are kept.
+
+The records are read back by parse_collection to order and shard the test
+modules.
+"""
+import os
+import json
+import time
+import statistics
+
+
+DURATIONS_FNAME = "durations.jsonl"
+
+# number of records kept per nodeid during compaction
+KEEP_RECORDS = 5
+
+
+def durations_path(config):
+    return os.path.join(str(config.rootpath), "test_results", DURATIONS_FNAME)
+
+
+def nodeid_module(nodeid):
+    """
+    The module part of a nodeid, e.g. "src/pkg/test/test_x.py"
+    """
+    return nodeid.split("::")[0]
+
+
+class DurationRecorder(object):
+    """
+    Accumulates the phases of each test report and appends the record once the
+    teardown report arrives.
+    """
+    def __init__(self, fname):
+        self.fname = fname
+        self.pending = {}
+        self.F = None
+
+    def logreport(self, report):
+        rec = self.pending.get(report.nodeid, None)
+        if rec is None:
+            rec = dict(
+                nodeid=report.nodeid,
+                module=nodeid_module(report.nodeid),
+                outcome="passed",
+            )
+            self.pending[report.nodeid] = rec
+        rec[report.when] = round(report.duration, 6)
+
+        if report.failed:
+            rec["outcome"] = "failed"
+        elif report.skipped and rec["outcome"] != "failed":
+            rec["outcome"] = "skipped"
+
+        if report.when == "teardown":
+            del self.pending[report.nodeid]
+            rec["time"] = round(time.time(), 3)
+            self.write(rec)
+
+    def write(self, rec):
+        if self.F is None:
+            os.makedirs(os.path.split(self.fname)[0], exist_ok=True)
+            self.F = open(self.fname, "a")
+        self.F.write(json.dumps(rec, separators=(",", ":")))
+        self.F.write("\n")
+
+    def close(self, compact=True):
+        if self.F is not None:
+            self.F.close()
+            self.F = None
+            if compact:
+                compact_records(self.fname)
+
+
+def iter_records(fname):
+    """
+    Iterate the records of a durations file. Lines that fail to parse
+    (from interrupted writes) are skipped.
+    """
+    try:
+        F = open(fname, "r")
+    except FileNotFoundError:
+        return
+    with F:
+        for line in F:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def compact_records(fname, keep=KEEP_RECORDS):
+    """
+    Rewrite the durations file keeping only the last "keep" records of each
+    nodeid. Only rewrites if that would drop a significant number of lines.
+    """
+    by_nodeid = {}
+    Nlines = 0
+    for rec in iter_records(fname):
+        Nlines += 1
+        by_nodeid.setdefault(rec["nodeid"], []).append(rec)
+
+    Nkeep = sum(min(len(recs), keep) for recs in by_nodeid.values())
+    if Nlines <= 2 * Nkeep:
+        return
+
+    fname_tmp = fname + ".tmp{}".format(os.getpid())
+    with open(fname_tmp, "w") as F:
+        for recs in by_nodeid.values():
+            for rec in recs[-keep:]:
+                F.write(json.dumps(rec, separators=(",", ":")))
+                F.write("\n")
+    os.replace(fname_tmp, fname)
+    return
+
+
+def load(fname, keep=KEEP_RECORDS, skipped=True):
+    """
+    Load the durations database into a dictionary mapping nodeid to a summary
+    dict containing the following. With skipped=False, the records of skipped
+    runs are ignored, so the summaries are of the most recent runs that ran.
+
+    module: the module part of the nodeid
+    duration: median of the (setup + call + teardown) of the recent records
+    call: median of the call phase
+    outcome: the most recent outcome
+    time: the most recent time the test ran
+    runs: the number of records
+    """
+    by_nodeid = {}
+    for rec in iter_records(fname):
+        if not skipped and rec.get("outcome", None) == "skipped":
+            continue
+        by_nodeid.setdefault(rec["nodeid"], []).append(rec)
+
+    stats = {}
+    for nodeid, recs in by_nodeid.items():
+        recs = recs[-keep:]
+        last = recs[-1]
+        stats[nodeid] = dict(
+            module=last.get("module", nodeid_module(nodeid)),
+            duration=statistics.median(
+                rec.get("setup", 0) + rec.get("call", 0) + rec.get("teardown", 0)
+                for rec in recs
+            ),
+            call=statistics.median(rec.get("call", 0) for rec in recs),
+            outcome=last.get("outcome", "passed"),
+            time=last.get("time", 0),
+            runs=len(recs),
+        )
+    return stats
+
+
+def module_durations(stats):
+    """
+    Sum the test durations of each module from the output of load.
+    """
+    modules = {}
+    for nodeid, stat in stats.items():
+        modules[stat["module"]] = modules.get(stat["module"], 0) + stat["duration"]
+    return modules
+
+
+def module_failures(stats):
+    """
+    The set of modules with a test that failed on their most recent run.
+    """
+    return set(
+        stat["module"] for stat in stats.values() if stat["outcome"] == "failed"
+    )
@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+On-disk storage of fixture results, used by fixtures.ws_cached.
+
+Entries live in test_results/.fixture_cache, named by their key. Arrays and
+dicts of arrays are stored with numpy (.npy/.npz), anything else is pickled.
+Reading an entry refreshes its mtime, and once the cache outgrows its size
+limit the entries with the oldest mtime are evicted.
+"""
+import os
+import pickle
+import hashlib
+import inspect
+from shutil import rmtree
+
+from .impact import file_hash
+
+
+CACHE_FOLDER = ".fixture_cache"
+# default size limit in MB
+CACHE_SIZE_MB = 2048
+
+EXTENSIONS = {
+    "pickle": ".pkl",
+    "npy": ".npy",
+    "npz": ".npz",
+}
+
+
+def cache_path(config):
+    return os.path.join(str(config.rootpath), "test_results", CACHE_FOLDER)
+
+
+def cache_clear(config):
+    rmtree(cache_path(config), ignore_errors=True)
+
+
+def _is_array(value):
+    return type(value).__module__ == "numpy" and type(value).__name__ == "ndarray"
+
+
+def serializer_of(value):
+    """
+    The serialization used for a value by default
+    """
+    if _is_array(value) and value.dtype != object:
+        return "npy"
+    if (
+        isinstance(value, dict)
+        and value
+        and all(isinstance(k, str) and _is_array(v) and v.dtype != object for k, v in value.items())
+    ):
+        return "npz"
+    return "pickle"
+
+
+# raised by pickle for values that it cannot serialize
+PICKLE_ERRORS = (pickle.PicklingError, TypeError, AttributeError)
+# pinned, so that the keys of pickled params stay the same across Python versions
+PARAM_PICKLE_PROTOCOL = 4
+
+
+def _is_primitive(value):
+    if isinstance(value, (str, bytes, int, float, complex, bool, type(None))):
+        return True
+    if isinstance(value, (tuple, list)):
+        return all(_is_primitive(v) for v in value)
+    return False
+
+
+def param_key(request):
+    """
+    Stable serialization of the param of a fixture request, or None if it is
+    not parametrized. Primitives, and tuples or lists of them, use their
+    repr. Anything else uses the hash of its pickle, which holds the values of
+    objects rather than their addresses. Raises one of PICKLE_ERRORS if the
+    param cannot be pickled.
+    """
+    if not hasattr(request, "param"):
+        return None
+    param = request.param
+    if _is_primitive(param):
+        return repr(param)
+    data = pickle.dumps(param, protocol=PARAM_PICKLE_PROTOCOL)
+    return "pickle:" + hashlib.sha256(data).hexdigest()
+
+
+def cache_key(func, param=None, input_files=()):
+    """
+    Hash of the source of func, the fixture parameter (see param_key) and the
+    content of the input files.
+    """
+    H = hashlib.sha256()
+    H.update("{}.{}".format(func.__module__, func.__qualname__).encode())
+    try:
+        H.update(inspect.getsource(func).encode())
+    except (OSError, TypeError):
+        H.update(func.__code__.co_code)
+    H.update(b'\0')
+    H.update(repr(param).encode())
+    for fpath in input_files:
+        H.update(b'\0')
+        H.update(os.path.basename(fpath).encode())
+        H.update(file_hash(fpath).encode())
+    return H.hexdigest()
+
+
+class FixtureCache(object):
+    def __init__(self, cache_dir, size_mb=CACHE_SIZE_MB):
+        self.cache_dir = cache_dir
+        self.size_limit = size_mb * 1024 ** 2
+
+    def _fname(self, key, serializer):
+        return os.path.join(self.cache_dir, key + EXTENSIONS[serializer])
+
+    def load(self, key):
+        """
+        Returns (True, value) for a cached key, else (False, None)
+        """
+        for serializer in EXTENSIONS:
+            fname = self._fname(key, serializer)
+            if not os.path.exists(fname):
+                continue
+            try:
+                if serializer == "pickle":
+                    with open(fname, "rb") as F:
+                        value = pickle.load(F)
+                else:
+                    import numpy as np
+                    if serializer == "npy":
+                        value = np.load(fname)
+                    else:
+                        with np.load(fname) as npz:
+                            value = {k: npz[k] for k in npz.files}
+            except Exception:
+                # e.g. an evicted or incompatible entry, so it is recomputed
+                continue
+            try:
+                # the mtime orders the eviction
+                os.utime(fname, None)
+            except OSError:
+                pass
+            return True, value
+        return False, None
+
+    def store(self, key, value, serializer=None):
+        """
+        Store the value, returning False (with a warning) if it could not be
+        serialized
+        """
+        if serializer is None:
+            serializer = serializer_of(value)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fname = self._fname(key, serializer)
+        fname_tmp = fname + ".tmp{}".format(os.getpid())
+        try:
+            with open(fname_tmp, "wb") as F:
+                if serializer == "pickle":
+                    pickle.dump(value, F, protocol=pickle.HIGHEST_PROTOCOL)
+                else:
+                    import numpy as np
+                    if serializer == "npy":
+                        np.save(F, value)
+                    else:
+                        np.savez(F, **value)
+        except PICKLE_ERRORS as E:
+            # the value is still used, just not cached
+            os.unlink(fname_tmp)
+            import warnings
+            warnings.warn("Could not cache the fixture value of type {}: {}".format(type(value).__name__, E))
+            return False
+        os.replace(fname_tmp, fname)
+        self.evict(keep=fname)
+        return True
+
+    def evict(self, keep=None):
+        """
+        Delete the least recently used entries until the cache fits its limit.
+        The entry keep is never deleted.
+        """
+        entries = []
+        total = 0
+        try:
+            scan = list(os.scandir(self.cache_dir))
+        except FileNotFoundError:
+            return
+        for entry in scan:
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, entry.path))
+            total += st.st_size
+        entries.sort()
+        for mtime, size, fname in entries:
+            if total <= self.size_limit:
+                break
+            if fname == keep:
+                continue
+            try:
+                os.unlink(fname)
+            except FileNotFoundError:
+                pass
+            total -= size
@@ -14,9 +14,12 @@ from shutil import rmtree
 import contextlib
 
 import sys
+import threading
 import pytest
 
 from . import utilities
+from . import trash
+from . import artifacts
 
 
 @pytest.fixture
@@ -36,6 +39,9 @@ def tpath_preclear(request):
     """
     Fixture that indicates that the test path should be cleared automatically
     before running each test. This cleans up the test data.
+
+    With --ws-preclear-trash, the folder is renamed into the session trash and
+    deleted in the background.
     """
     tpath_root, tpath_local = utilities.tpath_root_make(request)
     try:
@@ -43,38 +49,27 @@ def tpath_preclear(request):
     except ValueError:
         no_preclear = False
     if not no_preclear:
-        rmtree(tpath_root, ignore_errors=True)
+        if not trash.trash_discard(tpath_root):
+            rmtree(tpath_root, ignore_errors=True)
+        utilities.tpath_forget(tpath_root)
     return
 
 
-@pytest.fixture
 def tpath(request):
     """
     Fixture that takes the value of the special test-specific folder for test
     run data and plots. Usually the <folder of the test>/tresults/test_name/
     """
     tpath_root, tpath_local = utilities.tpath_root_make(request)
+    utilities.tpath_setup(tpath_root, tpath_local)
+    if artifacts.artifacts_enabled():
+        # any file in the folder may be written, so all are unlinked from the pool
+        artifacts.detach(tpath_root)
+    return tpath_root
 
-    os.makedirs(tpath_root, exist_ok=True)
-    os.utime(tpath_root, None)
-
-    tpath_rel = os.path.relpath(os.path.realpath(tpath_root), os.path.realpath(os.path.split(tpath_local)[0]))
-    if os.path.islink(tpath_local):
-        if os.path.normpath(
-            os.path.join(os.path.split(tpath_local)[0], os.readlink(tpath_local))
-        ) != os.path.normpath(tpath_root):
-            os.unlink(tpath_local)
-            os.makedirs(path.split(tpath_local)[0], exist_ok=True)
-            os.symlink(tpath_rel, tpath_local, target_is_directory=True)
-    elif not os.path.exists(tpath_local):
-        os.makedirs(path.split(tpath_local)[0], exist_ok=True)
-        os.symlink(tpath_rel, tpath_local, target_is_directory=True)
-    else:
-        import warnings
-
-        warnings.warn("test_results local path {} exists".format(tpath_local))
 
-    return tpath_root
+tpath_ = tpath
+tpath = pytest.fixture(tpath)
 
 
 def tpath_join(request):
@@ -90,28 +85,9 @@ def tpath_join(request):
     def tpath_joiner(*subpath):
         nonlocal first_call
         if first_call:
-            os.makedirs(tpath_root, exist_ok=True)
-            os.utime(tpath_root, None)
+            utilities.tpath_setup(tpath_root, tpath_local)
             first_call = False
-
-            tpath_rel = os.path.relpath(os.path.realpath(tpath_root), os.path.realpath(os.path.split(tpath_local)[0]))
-            if os.path.islink(tpath_local):
-                if os.path.normpath(
-                    os.path.join(
-                        os.path.split(tpath_local)[0], os.readlink(tpath_local)
-                    )
-                ) != os.path.normpath(tpath_root):
-                    os.unlink(tpath_local)
-                    os.makedirs(path.split(tpath_local)[0], exist_ok=True)
-                    os.symlink(tpath_rel, tpath_local, target_is_directory=True)
-            elif not os.path.exists(tpath_local):
-                os.makedirs(path.split(tpath_local)[0], exist_ok=True)
-                os.symlink(tpath_rel, tpath_local, target_is_directory=True)
-            else:
-                import warnings
-
-                warnings.warn("test_results local path {} exists".format(tpath_local))
-        return path.join(tpath_root, *subpath)
+        return utilities.tpath_file(tpath_root, *subpath)
 
     return tpath_joiner
 
@@ -121,7 +97,6 @@ tpath_join_ = tpath_join
 tpath_join = pytest.fixture(tpath_join)
 
 
-@pytest.fixture
 def fpath(request):
     """
     py.test fixture that returns the folder path of the test being run. Useful
@@ -130,6 +105,22 @@ def fpath(request):
     return utilities.fpath_raw_make(request)
 
 
+fpath_ = fpath
+fpath = pytest.fixture(fpath)
+
+# wider-scoped variants, for fixtures shared by several tests. See
+# utilities.tpath_node_make for their folders.
+tpath_class = pytest.fixture(tpath_, scope="class", name="tpath_class")
+tpath_join_class = pytest.fixture(tpath_join_, scope="class", name="tpath_join_class")
+fpath_class = pytest.fixture(fpath_, scope="class", name="fpath_class")
+tpath_module = pytest.fixture(tpath_, scope="module", name="tpath_module")
+tpath_join_module = pytest.fixture(tpath_join_, scope="module", name="tpath_join_module")
+fpath_module = pytest.fixture(fpath_, scope="module", name="fpath_module")
+tpath_session = pytest.fixture(tpath_, scope="session", name="tpath_session")
+tpath_join_session = pytest.fixture(tpath_join_, scope="session", name="tpath_join_session")
+fpath_session = pytest.fixture(fpath_, scope="session", name="fpath_session")
+
+
 @pytest.fixture
 def fpath_join(request):
     """
@@ -145,14 +136,52 @@ def fpath_join(request):
 
 
 @pytest.fixture(scope="function")
-def closefigs():
-    import matplotlib.pyplot as plt
+def closefigs(request):
+    """
+    Fixture that closes the matplotlib figures left open by the test. It does
+    nothing unless pyplot is loaded and figures are open.
+
+    The number of figures left open is recorded in the ws_properties of the
+    test reports as "ws_figures", for the report of the heaviest tests. With
+    --ws-figure-limit, tests leaving more figures open than the limit fail.
+    """
+    plt = sys.modules.get("matplotlib.pyplot", None)
+    if plt is not None:
+        fignums_before = set(plt.get_fignums())
+    else:
+        fignums_before = set()
+
+    def check():
+        plt = sys.modules.get("matplotlib.pyplot", None)
+        if plt is None:
+            return None
+        fignums = plt.get_fignums()
+        if not fignums:
+            return None
+        Nfigs = len(set(fignums) - fignums_before)
+        plt.close("all")
+        if Nfigs == 0:
+            return None
+        utilities.node_property(request.node, "ws_figures", Nfigs)
+
+        limit = request.config.getoption("ws_figure_limit", default=None)
+        if limit is not None and Nfigs > limit:
+            return "Test left {} figures open, more than the --ws-figure-limit of {}".format(Nfigs, limit)
+        return None
+
+    # counted right after the call, so that exceeding the limit fails the test itself
+    utilities.call_check(request.node, check)
     yield
-    plt.close("all")
+
+    # figures opened by the teardown of other fixtures
+    plt = sys.modules.get("matplotlib.pyplot", None)
+    if plt is not None and plt.get_fignums():
+        plt.close("all")
+    return
 
 
 @pytest.fixture
-def test_trigger():
+def test_trigger(request):
     """
     This fixture provides a contextmanager that causes a function to call
     if an AssertionError is raised. It will also call if any of its argument,
@@ -161,7 +190,14 @@ def test_trigger():
 
     The primary usage of this is to plot outputs only on test failures, while also
     allowing plotting to happen using the plot fixture and pytest cmdline argument
+
+    With --ws-trigger=deferred or pool, the calls are queued to the end of the
+    session or run in a thread pool rather than inline, see
+    wield.pytest.triggers. Errors of the calls then do not fail the test, and
+    are reported into its capture.txt along with their timing.
     """
+    from . import triggers
+    runner = triggers.trigger_runner()
     run_store = []
 
     @contextlib.contextmanager
@@ -177,7 +213,17 @@ def test_trigger():
 
             if do_call:
                 for call in run_store:
-                    call(fail=did_fail, **kwargs)
+                    if runner is None:
+                        call(fail=did_fail, **kwargs)
+                    else:
+                        runner.submit(
+                            request.node.nodeid,
+                            tpath_join_(request)("capture.txt"),
+                            call,
+                            did_fail,
+                            kwargs,
+                            request=request,
+                        )
                 run_store.clear()
 
         try:
@@ -193,28 +239,49 @@ def test_trigger():
     return fail
 
 
+# marks attributes that did not exist
+_missing = object()
+
+
 @pytest.fixture
-def dprint(request, tpath_join):
+def dprint(request):
     """
     This is a fixture providing a wrapper function for pretty printing. It uses
     the icecream module for pretty printing, falling back to ipythons pretty
     printer if needed, then to the python build in pretty printing module.
+    Large arrays and containers are summarized, see utilities.dformat.
 
     Along with printing to stdout, this function prints into the tpath_folder to
-    save all output into output.txt.
+    save all output into output.txt. That file is buffered and written at
+    teardown.
     """
     # pushes past the dot
     print("---------------:{}:--------------".format(request.node.name))
 
     import builtins
+    import functools
 
-    builtins.dprint = utilities.dprint
-    yield utilities.dprint
+    F = utilities.BufferedOutput(tpath_join_(request)("output.txt"))
+    dprint = functools.partial(utilities.dprint, F=F)
+    # restored at teardown, so that later calls do not write to the closed F
+    dprint_prev = getattr(builtins, "dprint", _missing)
+    builtins.dprint = dprint
+    try:
+        yield dprint
+    finally:
+        F.close()
+        if dprint_prev is _missing:
+            del builtins.dprint
+        else:
+            builtins.dprint = dprint_prev
     return
 
 
-# variable that stores the current node and capture filename information
-_node_capture = None
+# mapping of nodeid to capture filename. Populated by the capture fixture and
+# consumed by plugin.pytest_runtest_logreport. Keyed by nodeid so that reports
+# always match their own node, even if several tests are in flight at once.
+_node_captures = {}
+_node_captures_lock = threading.Lock()
 
 
 @pytest.fixture
@@ -224,31 +291,234 @@ def capture(request):
     This must coordinate with pytest_runtest_logreport to function. It passes
     required information.
     """
-
-    global _node_capture
     # funny notation on tpath_join_ is because it is designed to be a fixture
-    _node_capture = request.node.nodeid, tpath_join_(request)("capture.txt")
+    location = tpath_join_(request)("capture.txt")
+    with _node_captures_lock:
+        _node_captures[request.node.nodeid] = location
     yield
     return
 
-_pytest_request = []
 
-@pytest.fixture
-def current_pytest_request(request):
-    """ Fixture that stores the output into tpath_join('capture.txt').
+def node_capture_pop(nodeid):
+    """
+    Remove and return the capture filename registered for nodeid, or None if
+    the node did not use the capture fixture in this process.
+    """
+    with _node_captures_lock:
+        return _node_captures.pop(nodeid, None)
 
-    This must coordinate with pytest_runtest_logreport to function. It passes
-    required information.
+
+# stack of the active requests. It is thread-local so that threaded runs only
+# see the requests of the test running in their own thread.
+_pytest_request_local = threading.local()
+# the stack of the main thread, seen by helper threads that have none
+_pytest_request_stack_main = []
+
+
+def _pytest_request_stack():
+    stack = getattr(_pytest_request_local, 'stack', None)
+    if stack is None:
+        if threading.current_thread() is threading.main_thread():
+            stack = _pytest_request_stack_main
+        else:
+            stack = []
+        _pytest_request_local.stack = stack
+    return stack
+
+
+def pytest_request_top():
+    """
+    The request of the test currently running in this thread, or None if not
+    running within a pytest. Threads running no test of their own, such as
+    the helper threads started by a test, see the test of the main thread.
     """
+    stack = _pytest_request_stack()
+    if not stack:
+        stack = _pytest_request_stack_main
+        if not stack:
+            return None
+    return stack[-1]
 
-    global _pytest_request
-    # funny notation on tpath_join_ is because it is designed to be a fixture
-    _pytest_request.append(request)
+
+@pytest.fixture
+def current_pytest_request(request):
+    """ Fixture that stores the request of the current test, so that tjoin and
+    fjoin can be used without fixtures.
+    """
+    stack = _pytest_request_stack()
+    stack.append(request)
     yield
-    _pytest_request.pop()
+    stack.pop()
     return
 
 
+@pytest.fixture
+def ws_benchmark(request):
+    """
+    Fixture providing a statistical benchmark engine,
+    wield.pytest.benchmark.Benchmark. Use as
+
+    result = ws_benchmark(func, *args, **kwargs)
+
+    or ws_benchmark.run(func, args, kwargs, name=...) to name the result.
+    Settings such as ws_benchmark.repeats or ws_benchmark.disable_gc may be
+    assigned before running. Each result is printed, and all of them are written
+    into tpath_join('benchmark.json') at the end of the test.
+
+    The results are also appended to test_results/perf_history.jsonl. Tests
+    marked ws_perf are compared against the baseline of the previous runs (see
+    wield.pytest.perf) and warn or fail when they regress. The marker takes an
+    optional tolerance, ws_perf(tolerance=0.2), overriding --ws-perf-tolerance.
+    """
+    from .benchmark import BenchmarkRecorder
+    from . import perf
+    bench = BenchmarkRecorder()
+
+    def check():
+        if not bench.results:
+            return None
+        bench.save(tpath_join_(request)("benchmark.json"))
+
+        marker = request.node.get_closest_marker("ws_perf")
+        msgs = []
+        if marker is not None:
+            # compare before recording, so the run is not its own baseline
+            msgs = perf.regressions(
+                request.node.nodeid,
+                bench.results,
+                tolerance=marker.kwargs.get("tolerance", None),
+            )
+        perf.record(request.node.nodeid, bench.results)
+        if not msgs:
+            return None
+        if request.config.getoption("ws_perf_action", default="warn") == "fail":
+            return "Performance regression: " + "; ".join(msgs)
+        import warnings
+        for msg in msgs:
+            warnings.warn("Performance regression: " + msg)
+        return None
+
+    # run right after the call, so that a regression fails the test itself
+    utilities.call_check(request.node, check)
+    return bench
+
+
+@pytest.fixture
+def ws_render(request):
+    """
+    Fixture to save figures in a background process pool, for tests that plot.
+
+    ws_render.savefig(fig, tpath_join('plot.png'))
+
+    pickles and closes the figure, then renders it in the pool. The destination
+    may also be a list, such as [tpath_join('plot.png'), tpath_join('plot.pdf')].
+
+    ws_render.submit(tpath_join('plot.png'), make_figure, *args, **kwargs)
+
+    instead calls the picklable recipe make_figure in the pool and saves the
+    figure it returns. The session waits for the renders at its end, and
+    failures are appended to the capture.txt of the test.
+    """
+    from . import render
+    return render.RenderClient(
+        render.render_pool(),
+        request.node.nodeid,
+        tpath_join_(request)("capture.txt"),
+    )
+
+
+def ws_cached(inputs=(), serializer=None):
+    """
+    Decorator caching the return value of a fixture on disk, across sessions.
+    Apply it below the fixture decorator
+
+    @pytest.fixture(scope="module")
+    @ws_cached(inputs=["model.yaml"])
+    def model():
+        return build_expensive_model()
+
+    The cache key is the hash of the source of the function, the value of the
+    fixture param (for parametrized fixtures) and the content of the inputs,
+    which are paths relative to the folder of the file defining the fixture.
+    The results of other fixtures it requests are not part of the key.
+
+    serializer is "pickle", "npy" or "npz", by default npy for arrays, npz for
+    dicts of arrays and pickle otherwise. Values, and params, that cannot be
+    serialized are used uncached, with a warning. The cache lives in
+    test_results/.fixture_cache, limited by --ws-cache-size and emptied by
+    --ws-cache-clear. See wield.pytest.fixture_cache.
+    """
+    import inspect
+    import functools
+    from . import fixture_cache
+
+    def decorator(func):
+        if inspect.isgeneratorfunction(func):
+            raise TypeError("ws_cached fixtures must return their value, not yield it")
+        sig = inspect.signature(func)
+        has_request = "request" in sig.parameters
+        fdir = path.split(inspect.getfile(func))[0]
+        input_files = [path.join(fdir, fname) for fname in inputs]
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if has_request:
+                request = kwargs["request"]
+            else:
+                request = kwargs.pop("request")
+            config = request.config
+            cache = fixture_cache.FixtureCache(
+                fixture_cache.cache_path(config),
+                size_mb=config.getoption("ws_cache_size", default=fixture_cache.CACHE_SIZE_MB),
+            )
+            try:
+                param = fixture_cache.param_key(request)
+            except fixture_cache.PICKLE_ERRORS as E:
+                import warnings
+                warnings.warn("Could not cache the fixture {} of an unserializable param: {}".format(
+                    request.fixturename, E
+                ))
+                return func(*args, **kwargs)
+            key = fixture_cache.cache_key(func, param, input_files)
+            found, value = cache.load(key)
+            if found:
+                return value
+            value = func(*args, **kwargs)
+            cache.store(key, value, serializer=serializer)
+            return value
+
+        if not has_request:
+            # pytest reads the signature to pass the fixtures, so request is
+            # added to it
+            params = list(sig.parameters.values())
+            params.append(inspect.Parameter("request", inspect.Parameter.KEYWORD_ONLY))
+            wrapper.__signature__ = sig.replace(parameters=params)
+        return wrapper
+    return decorator
+
+
+@pytest.fixture
+def golden(request):
+    """
+    Fixture comparing numerical outputs against references stored in
+    fpath_join('golden', <test name>). Use as
+
+    golden('name', array, rtol=1e-7, atol=0)
+
+    with an array, stored as name.npy, or a dict of arrays, stored as name.npz.
+    On mismatch, the test fails with summary statistics, and the actual data
+    and statistics are written into the tpath as golden_name.npy and
+    golden_name.npy.json. With --golden-update, the references are rewritten
+    instead. See wield.pytest.golden.
+    """
+    from .golden import Golden
+    return Golden(
+        os.path.join(utilities.fpath_raw_make(request), "golden", request.node.name),
+        tpath_join_(request),
+        update=request.config.getoption("golden_update", default=False),
+    )
+
+
 @contextlib.contextmanager
 def ws_tracemalloc_impl():
     # TODO, this should possibly go in a separate fixture with a wider scope
@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+Golden-data comparisons, used by the golden fixture.
+
+References are stored next to the tests, in fpath_join('golden', <test name>),
+as .npy files for single arrays and uncompressed .npz files for dicts of
+arrays. .npy references are memory mapped, and all comparisons run in chunks,
+so large references are never loaded whole. Mismatches are reported as
+summary statistics, with the actual arrays and the statistics written into
+the tpath of the test.
+"""
+import os
+import json
+
+
+# number of elements compared at a time
+CHUNK = 1 << 20
+# number of mismatched indices listed in the reports
+NINDICES = 10
+
+
+def compare_arrays(actual, reference, rtol=1e-7, atol=0, equal_nan=True, chunk=CHUNK):
+    """
+    Compare actual against reference elementwise, in chunks, with the
+    tolerance atol + rtol * abs(reference) for inexact types and equality
+    otherwise.
+
+    Returns None if they match, else a dict of mismatch statistics.
+    """
+    import numpy as np
+    actual = np.asarray(actual)
+    if actual.shape != reference.shape:
+        return dict(error="shape {} differs from the reference shape {}".format(actual.shape, reference.shape))
+    if actual.dtype.kind != reference.dtype.kind and not (
+        actual.dtype.kind in "biuf" and reference.dtype.kind in "biuf"
+    ):
+        return dict(error="dtype {} differs from the reference dtype {}".format(actual.dtype, reference.dtype))
+
+    inexact = actual.dtype.kind in "fc" or reference.dtype.kind in "fc"
+    # reshape is a view for the C-ordered memory maps of np.load
+    flat_a = np.ascontiguousarray(actual).reshape(-1)
+    flat_r = reference.reshape(-1)
+
+    Nbad = 0
+    indices = []
+    max_abs = 0.
+    max_abs_idx = None
+    max_rel = 0.
+    sum_abs = 0.
+    for start in range(0, flat_a.size, chunk):
+        a = flat_a[start:start + chunk]
+        r = np.asarray(flat_r[start:start + chunk])
+        if inexact:
+            with np.errstate(invalid='ignore'):
+                # inf - inf is nan
+                diff = np.abs(a - r)
+                ok = diff <= atol + rtol * np.abs(r)
+            # infinities only match themselves, as in np.allclose
+            ok &= np.isfinite(a) & np.isfinite(r)
+            ok |= (a == r)
+            if equal_nan:
+                ok |= np.isnan(a) & np.isnan(r)
+        else:
+            ok = a == r
+        if ok.all():
+            continue
+
+        bad = np.flatnonzero(~ok)
+        Nbad += bad.size
+        if len(indices) < NINDICES:
+            indices.extend((start + bad[:NINDICES - len(indices)]).tolist())
+        if inexact:
+            dbad = diff[bad]
+            dbad = np.where(np.isnan(dbad), np.inf, dbad)
+            sum_abs += float(dbad.sum())
+            imax = int(np.argmax(dbad))
+            if dbad[imax] > max_abs or max_abs_idx is None:
+                max_abs = float(dbad[imax])
+                max_abs_idx = start + int(bad[imax])
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rel = dbad / np.abs(r[bad])
+            rel = np.where(np.isnan(rel), np.inf, rel)
+            max_rel = max(max_rel, float(rel.max()))
+
+    if Nbad == 0:
+        return None
+    stats = dict(
+        mismatched=Nbad,
+        total=int(flat_a.size),
+        indices=[np.unravel_index(idx, actual.shape) for idx in indices],
+    )
+    stats["indices"] = [[int(i) for i in idx] for idx in stats["indices"]]
+    if inexact:
+        stats.update(
+            max_abs=max_abs,
+            max_abs_index=[int(i) for i in np.unravel_index(max_abs_idx, actual.shape)],
+            max_rel=max_rel,
+            mean_abs=sum_abs / Nbad,
+            rtol=rtol,
+            atol=atol,
+        )
+    return stats
+
+
+def stats_str(key, stats):
+    if "error" in stats:
+        return "{}: {}".format(key, stats["error"])
+    text = "{}: {}/{} elements mismatched ({:.3g}%)".format(
+        key, stats["mismatched"], stats["total"], 100 * stats["mismatched"] / stats["total"]
+    )
+    if "max_abs" in stats:
+        text += ", max abs err {:.3g} at {}, max rel err {:.3g}, mean abs err {:.3g} (rtol={}, atol={})".format(
+            stats["max_abs"], tuple(stats["max_abs_index"]), stats["max_rel"],
+            stats["mean_abs"], stats["rtol"], stats["atol"],
+        )
+    text += ", first at {}".format([tuple(idx) for idx in stats["indices"]])
+    return text
+
+
+class Golden(object):
+    """
+    Compares arrays against stored references.
+
+    refdir: the folder of the references
+    tpath_join: joins paths into the folder for the mismatch artifacts
+    update: rewrite the references rather than comparing
+    """
+    def __init__(self, refdir, tpath_join, update=False):
+        self.refdir = refdir
+        self.tpath_join = tpath_join
+        self.update = update
+
+    def reference_path(self, name, data):
+        ext = ".npz" if isinstance(data, dict) else ".npy"
+        return os.path.join(self.refdir, name + ext)
+
+    def save(self, fname, data):
+        import numpy as np
+        os.makedirs(os.path.split(fname)[0], exist_ok=True)
+        # written aside and moved, as the old reference may be memory mapped
+        fname_tmp = fname + ".tmp{}".format(os.getpid())
+        with open(fname_tmp, "wb") as F:
+            if isinstance(data, dict):
+                np.savez(F, **data)
+            else:
+                np.save(F, np.asarray(data))
+        os.replace(fname_tmp, fname)
+
+    def check(self, name, data, rtol=1e-7, atol=0, equal_nan=True):
+        """
+        Compare data, an array or a dict of arrays, with the reference name.
+        Raises AssertionError on mismatch.
+        """
+        import numpy as np
+        fname = self.reference_path(name, data)
+        if self.update:
+            self.save(fname, data)
+            return
+        if not os.path.exists(fname):
+            raise AssertionError("Golden reference {} is missing, create it with --golden-update".format(fname))
+
+        failures = {}
+        if isinstance(data, dict):
+            with np.load(fname) as ref:
+                for key in sorted(set(data) | set(ref.files)):
+                    if key not in ref.files:
+                        failures[key] = dict(error="not in the reference")
+                    elif key not in data:
+                        failures[key] = dict(error="missing, but in the reference")
+                    else:
+                        # npz members are zipped, so these load one at a time
+                        stats = compare_arrays(data[key], ref[key], rtol=rtol, atol=atol, equal_nan=equal_nan)
+                        if stats is not None:
+                            failures[key] = stats
+        else:
+            ref = np.load(fname, mmap_mode='r')
+            stats = compare_arrays(data, ref, rtol=rtol, atol=atol, equal_nan=equal_nan)
+            del ref
+            if stats is not None:
+                failures[name] = stats
+
+        if not failures:
+            return
+
+        # the actual data can be inspected or copied over the reference
+        fname_base = os.path.split(fname)[1]
+        self.save(self.tpath_join("golden_" + fname_base), data)
+        with open(self.tpath_join("golden_{}.json".format(fname_base)), "w") as F:
+            json.dump(dict(reference=fname, mismatches=failures), F, indent=1)
+        raise AssertionError("Golden comparison with {} failed:\n{}".format(
+            fname, "\n".join(stats_str(key, stats) for key, stats in failures.items())
+        ))
+
+    def __call__(self, name, data, **kwargs):
+        return self.check(name, data, **kwargs)
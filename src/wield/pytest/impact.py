@@ -0,0 +1,300 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+Change-aware test selection for --ws-impact.
+
+Each test module gets a fingerprint from the hash of its source and the
+hashes of the project-local modules it imports, transitively. The imports are
+found by a static scan of the sources, so nothing needs to be imported to
+compute them.
+
+test_results/impact.json stores, for each module, the fingerprint of its last
+run and the nodeids that ran with that fingerprint, along with the nodeids
+that failed. The next run then only needs the tests of modules whose
+fingerprint changed, tests that have not run with the current fingerprint, and
+tests that failed.
+"""
+import os
+import ast
+import json
+import hashlib
+
+
+IMPACT_FNAME = "impact.json"
+
+
+def impact_path(config):
+    return os.path.join(str(config.rootpath), "test_results", IMPACT_FNAME)
+
+
+def file_hash(fpath):
+    with open(fpath, "rb") as F:
+        return hashlib.sha1(F.read()).hexdigest()
+
+
+class ImportGraph(object):
+    """
+    Static scan of the imports between the python files under rootpath.
+    """
+    def __init__(self, rootpath):
+        self.rootpath = os.path.realpath(str(rootpath))
+        self.roots = [self.rootpath]
+        src = os.path.join(self.rootpath, "src")
+        if os.path.isdir(src):
+            self.roots.append(src)
+        self.hashes = {}
+        self.imports = {}
+        self.fingerprints = {}
+
+    def is_local(self, fpath):
+        return fpath.startswith(self.rootpath + os.sep)
+
+    def package_root(self, fpath):
+        """
+        The folder from which the module at fpath is importable, the first
+        parent without an __init__.py
+        """
+        fdir = os.path.split(fpath)[0]
+        while os.path.exists(os.path.join(fdir, "__init__.py")):
+            fdir_up = os.path.split(fdir)[0]
+            if fdir_up == fdir:
+                break
+            fdir = fdir_up
+        return fdir
+
+    def resolve(self, modname, roots):
+        """
+        The local file of a dotted module name, or None
+        """
+        sub = modname.replace(".", os.sep)
+        for root in roots:
+            for fpath in [
+                os.path.join(root, sub + ".py"),
+                os.path.join(root, sub, "__init__.py"),
+            ]:
+                if os.path.isfile(fpath):
+                    return fpath
+        return None
+
+    def file_imports(self, fpath):
+        """
+        The set of local files imported by the file at fpath
+        """
+        deps = self.imports.get(fpath, None)
+        if deps is not None:
+            return deps
+
+        deps = set()
+        self.imports[fpath] = deps
+        try:
+            with open(fpath, "rb") as F:
+                tree = ast.parse(F.read(), filename=fpath)
+        except (SyntaxError, ValueError, OSError):
+            return deps
+
+        roots = self.roots + [self.package_root(fpath)]
+        for node in ast.walk(tree):
+            candidates = []
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    candidates.append((alias.name, roots))
+            elif isinstance(node, ast.ImportFrom):
+                if node.level > 0:
+                    fdir = os.path.split(fpath)[0]
+                    for idx in range(node.level - 1):
+                        fdir = os.path.split(fdir)[0]
+                    base_roots = [fdir]
+                    base = node.module or ""
+                else:
+                    base_roots = roots
+                    base = node.module
+                for alias in node.names:
+                    # the name may be a submodule or an attribute of the module
+                    if base:
+                        candidates.append((base + "." + alias.name, base_roots))
+                    else:
+                        candidates.append((alias.name, base_roots))
+                if base:
+                    candidates.append((base, base_roots))
+            for modname, mroots in candidates:
+                dep = self.resolve(modname, mroots)
+                if dep is not None and self.is_local(dep) and dep != fpath:
+                    deps.add(dep)
+                # parent packages are imported too
+                parts = modname.split(".")
+                for idx in range(1, len(parts)):
+                    dep = self.resolve(".".join(parts[:idx]), mroots)
+                    if dep is not None and self.is_local(dep) and dep != fpath:
+                        deps.add(dep)
+        return deps
+
+    def conftests(self, fpath):
+        """
+        The conftest.py files that apply to the module at fpath
+        """
+        confs = []
+        fdir = os.path.split(fpath)[0]
+        while self.is_local(fdir) or fdir == self.rootpath:
+            conf = os.path.join(fdir, "conftest.py")
+            if os.path.isfile(conf) and conf != fpath:
+                confs.append(conf)
+            if fdir == self.rootpath:
+                break
+            fdir = os.path.split(fdir)[0]
+        return confs
+
+    def hash(self, fpath):
+        h = self.hashes.get(fpath, None)
+        if h is None:
+            h = file_hash(fpath)
+            self.hashes[fpath] = h
+        return h
+
+    def fingerprint(self, fpath):
+        """
+        Hash of the source of fpath, its conftest.py files and all of the local
+        files they import, transitively.
+        """
+        fpath = os.path.realpath(fpath)
+        fp = self.fingerprints.get(fpath, None)
+        if fp is not None:
+            return fp
+
+        closure = set()
+        stack = [fpath] + self.conftests(fpath)
+        while stack:
+            fnext = stack.pop()
+            if fnext in closure:
+                continue
+            closure.add(fnext)
+            stack.extend(self.file_imports(fnext))
+
+        H = hashlib.sha1()
+        H.update(self.hash(fpath).encode())
+        for dep in sorted(closure - {fpath}):
+            H.update(os.path.relpath(dep, self.rootpath).encode())
+            H.update(self.hash(dep).encode())
+        fp = H.hexdigest()
+        self.fingerprints[fpath] = fp
+        return fp
+
+
+def load(fname):
+    try:
+        with open(fname, "r") as F:
+            store = json.load(F)
+    except (FileNotFoundError, ValueError):
+        store = {}
+    store.setdefault("modules", {})
+    store.setdefault("failed", [])
+    return store
+
+
+def save(fname, store):
+    os.makedirs(os.path.split(fname)[0], exist_ok=True)
+    fname_tmp = fname + ".tmp{}".format(os.getpid())
+    with open(fname_tmp, "w") as F:
+        json.dump(store, F, indent=1, sort_keys=True)
+    os.replace(fname_tmp, fname)
+
+
+def module_of(nodeid):
+    return nodeid.split("::")[0]
+
+
+def select(items, store, graph, rootpath):
+    """
+    Split the items into (selected, deselected).
+
+    Items are selected if their module fingerprint changed, if they did not run
+    with the stored fingerprint, or if they failed on their last run.
+    """
+    failed = set(store["failed"])
+    fingerprints = {}
+    ran = {}
+    selected = []
+    deselected = []
+    for item in items:
+        mod = module_of(item.nodeid)
+        fp = fingerprints.get(mod, None)
+        if fp is None:
+            fpath = os.path.join(str(rootpath), mod)
+            if os.path.isfile(fpath):
+                fp = graph.fingerprint(fpath)
+            else:
+                fp = ""
+            fingerprints[mod] = fp
+
+        entry = store["modules"].get(mod, None)
+        if entry is not None and mod not in ran:
+            ran[mod] = set(entry["nodeids"])
+        if (
+            not fp
+            or entry is None
+            or entry["fingerprint"] != fp
+            or item.nodeid not in ran[mod]
+            or item.nodeid in failed
+        ):
+            selected.append(item)
+        else:
+            deselected.append(item)
+    return selected, deselected
+
+
+def update(store, graph, rootpath, ran, failed):
+    """
+    Update the store with the nodeids that ran this session, and which of
+    them failed.
+    """
+    by_module = {}
+    for nodeid in ran:
+        by_module.setdefault(module_of(nodeid), set()).add(nodeid)
+
+    for mod, nodeids in by_module.items():
+        fpath = os.path.join(str(rootpath), mod)
+        if not os.path.isfile(fpath):
+            continue
+        fp = graph.fingerprint(fpath)
+        entry = store["modules"].get(mod, None)
+        if entry is not None and entry["fingerprint"] == fp:
+            nodeids = nodeids | set(entry["nodeids"])
+        store["modules"][mod] = dict(
+            fingerprint=fp,
+            nodeids=sorted(nodeids),
+        )
+
+    store["failed"] = sorted((set(store["failed"]) - set(ran)) | set(failed))
+    return store
+
+
+class ImpactRecorder(object):
+    """
+    Collects the nodeids that ran (skipped tests did not) and failed during the
+    session and updates the store at the end.
+    """
+    def __init__(self, config):
+        self.fname = impact_path(config)
+        self.rootpath = config.rootpath
+        self.ran = set()
+        self.failed = set()
+
+    def logreport(self, report):
+        if report.failed:
+            self.failed.add(report.nodeid)
+        # skipped tests are not up to date with their modules, so are not
+        # recorded as ran. Expected failures did run.
+        if report.when == "call" and (not report.skipped or hasattr(report, "wasxfail")):
+            self.ran.add(report.nodeid)
+
+    def close(self):
+        if not self.ran:
+            return
+        store = load(self.fname)
+        graph = ImportGraph(self.rootpath)
+        update(store, graph, self.rootpath, self.ran, self.failed)
+        save(self.fname, store)
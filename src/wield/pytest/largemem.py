@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+Memory-aware scheduling of the tests marked largemem.
+
+Tests marked largemem(gb=8) reserve their memory from a budget shared by all
+of the pytest processes of the machine, through a file-locked table of
+reservations in the temporary folder. A test whose reservation does not fit
+waits until others release theirs, so parallel workers do not run several
+large tests at once. A test larger than the whole budget runs alone. The
+table is per user, and if it cannot be opened the scheduling is disabled with
+a warning rather than failing the tests.
+
+The budget defaults to 80% of the memory available when the session starts,
+and a largemem marker without a size reserves half of the budget. Unmarked
+tests reserve nothing and never wait. Under xdist, the largemem tests are
+also spread evenly through the collection order, so that the workers fill
+the remaining slots with small tests.
+"""
+import os
+import json
+import time
+import tempfile
+
+try:
+    import fcntl
+except ImportError:
+    # no file locks (Windows), so no scheduling
+    fcntl = None
+
+
+LOCK_FNAME = "wield_pytest_largemem-{uid}.json"
+# fraction of the available memory forming the default budget
+BUDGET_FRACTION = 0.8
+
+
+def available_gb():
+    """
+    The memory available for new processes, in GB
+    """
+    try:
+        with open("/proc/meminfo", "r") as F:
+            for line in F:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024 ** 2
+    except OSError:
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') / 1024 ** 3
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MemorySemaphore(object):
+    """
+    Reservations of memory from a budget, shared between processes through a
+    locked file mapping pids to their reserved GB.
+    """
+    def __init__(self, fname, budget_gb, poll=0.2):
+        self.fname = fname
+        self.budget_gb = budget_gb
+        self.poll = poll
+        # set when the table could not be used, then nothing waits
+        self.disabled = False
+
+    def _update(self, func):
+        """
+        Call func on the reservations while holding the lock, saving them if
+        it returns True. Returns False if the table could not be used.
+        """
+        if self.disabled:
+            return False
+        try:
+            self._update_locked(func)
+        except OSError as E:
+            import warnings
+            warnings.warn("largemem scheduling disabled, could not use {}: {}".format(self.fname, E))
+            self.disabled = True
+            return False
+        return True
+
+    def _update_locked(self, func):
+        with open(self.fname, "a+") as F:
+            fcntl.flock(F, fcntl.LOCK_EX)
+            try:
+                F.seek(0)
+                try:
+                    state = json.loads(F.read() or "{}")
+                except ValueError:
+                    state = {}
+                # reservations of crashed processes
+                state = {pid: gb for pid, gb in state.items() if _pid_alive(int(pid))}
+                if func(state):
+                    F.seek(0)
+                    F.truncate()
+                    F.write(json.dumps(state))
+                    F.flush()
+            finally:
+                fcntl.flock(F, fcntl.LOCK_UN)
+
+    def try_acquire(self, gb):
+        pid = str(os.getpid())
+        acquired = False
+
+        def func(state):
+            nonlocal acquired
+            used = sum(state.values())
+            if not state or used + gb <= self.budget_gb:
+                state[pid] = state.get(pid, 0) + gb
+                acquired = True
+                return True
+            return False
+        if not self._update(func):
+            # unscheduled
+            return True
+        return acquired
+
+    def acquire(self, gb):
+        """
+        Reserve gb, waiting as needed. Returns the time waited in seconds.
+        """
+        t_start = time.perf_counter()
+        while not self.try_acquire(gb):
+            time.sleep(self.poll)
+        return time.perf_counter() - t_start
+
+    def release(self, gb):
+        pid = str(os.getpid())
+
+        def func(state):
+            remaining = state.pop(pid, 0) - gb
+            if remaining > 1e-9:
+                state[pid] = remaining
+            return True
+        self._update(func)
+
+
+def item_gb(item, default_gb):
+    """
+    The memory declared by the largemem marker of the item, or None if it is
+    not marked
+    """
+    marker = item.get_closest_marker("largemem")
+    if marker is None:
+        return None
+    gb = marker.kwargs.get("gb", None)
+    if gb is None and marker.args:
+        gb = marker.args[0]
+    if gb is None:
+        gb = default_gb
+    return float(gb)
+
+
+def interleave(items):
+    """
+    Reorder items in place, spreading the largemem items evenly between the
+    others
+    """
+    large = [item for item in items if item.get_closest_marker("largemem") is not None]
+    if not large or len(large) == len(items):
+        return
+    small = [item for item in items if item.get_closest_marker("largemem") is None]
+    stride = (len(small) + 1) / len(large)
+    reordered = []
+    ismall = 0
+    for idx, item in enumerate(large):
+        upto = int(round(idx * stride))
+        reordered.extend(small[ismall:upto])
+        ismall = max(ismall, upto)
+        reordered.append(item)
+    reordered.extend(small[ismall:])
+    items[:] = reordered
+
+
+def semaphore_make(config):
+    """
+    The semaphore of the session, or None if scheduling is unsupported
+    """
+    if fcntl is None:
+        return None
+    budget = config.getoption("ws_largemem_budget", default=None)
+    if budget is None:
+        avail = available_gb()
+        if avail is None:
+            return None
+        budget = BUDGET_FRACTION * avail
+    fname = os.path.join(tempfile.gettempdir(), LOCK_FNAME.format(uid=os.getuid()))
+    return MemorySemaphore(fname, budget)
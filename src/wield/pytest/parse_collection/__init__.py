@@ -8,8 +8,11 @@
 """
 """
 from .parse import pytest_collection_parse
+from .index import CollectionIndex, iter_collection
 
 
 __all__ = [
-    'pytest_collection_parse'
+    'pytest_collection_parse',
+    'CollectionIndex',
+    'iter_collection',
 ]
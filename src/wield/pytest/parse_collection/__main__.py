@@ -12,6 +12,10 @@ import re
 import sys
 import argparse
 from wield.pytest.parse_collection.parse import pytest_collection_parse
+from wield.pytest.parse_collection.order import order_tests
+from wield.pytest.parse_collection.shard import shard_tests, estimated_weights
+from wield.pytest.parse_collection.index import CollectionIndex
+from wield.pytest import durations
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(
@@ -19,15 +23,30 @@ if __name__ == '__main__':
     )
     parser.add_argument('fname', help='collection output file name')
     parser.add_argument('--sort', action='store', default=None, help='sort file when outputting all tests (does not have to exist)')
+    parser.add_argument('--durations', action='store', default=None, help='durations database written by the plugin (test_results/durations.jsonl) used to order the tests')
+    parser.add_argument('--order', action='store', default='longest', choices=['longest', 'failed'], help='ordering to use with --durations, longest-first or failed-first')
+    parser.add_argument('--shards', action='store', type=int, default=None, help='split the tests into this many duration-balanced shards. Prints one line per shard unless --shard-index is given')
+    parser.add_argument('--shard-index', action='store', type=int, default=None, help='only print the tests of this shard (0 based)')
+    parser.add_argument('--save-index', action='store', default=None, help='save the nodeid index of the collection to this file, loadable with CollectionIndex.load, and exit')
     parser.add_argument('--api_rst', action='store_true', default=None, help='Create the autodoc API list')
     parser.add_argument('test', nargs='?', help='Test name')
 
     # args = parser.parse_args(sys.argv[1:])
     args = parser.parse_args()
+    if args.shards is not None and args.shards < 1:
+        parser.error('--shards must be at least 1')
+    if args.shard_index is not None:
+        if args.shards is None:
+            parser.error('--shard-index requires --shards')
+        if not 0 <= args.shard_index < args.shards:
+            parser.error('--shard-index must be in [0, {})'.format(args.shards))
+
+    if args.save_index is not None:
+        CollectionIndex.from_collection(args.fname).save(args.save_index)
+        sys.exit(0)
 
     b = pytest_collection_parse(args.fname)
     if args.test is None:
-        used_sort = False
         if args.api_rst:
             """
             This brach creates an RST file with all of the known test modules
@@ -125,7 +144,13 @@ notebooks
             """
             This branch prints all of the tests to run. It uses the timing sort information if given
             """
-            if args.sort is not None:
+            stats = None
+            ordered = None
+            if args.durations is not None:
+                stats = durations.load(args.durations)
+                if stats:
+                    ordered = order_tests(b, stats, order=args.order)
+            if args.sort is not None and ordered is None:
                 try:
                     with open(args.sort) as Fsort:
                         sorts = [line.strip() for line in Fsort.readlines()]
@@ -133,15 +158,23 @@ notebooks
                     stests = set(b.tests)
                     for s in ssorts - stests:
                         sorts.remove(s)
-                    for s in sorts:
-                        print(s)
-                    for s in stests - ssorts:
-                        print(s)
-                    used_sort = True
+                    ordered = sorts + [s for s in b.tests if s not in ssorts]
                 except Exception:
                     pass
-            if not used_sort:
-                for mod in b.tests:
+            if ordered is None:
+                ordered = list(b.tests)
+
+            if args.shards is None:
+                for mod in ordered:
                     print(mod)
+            else:
+                shards = shard_tests(ordered, estimated_weights(b, stats), args.shards)
+                if args.shard_index is None:
+                    # one line per shard
+                    for shard in shards:
+                        print(" ".join(shard))
+                else:
+                    for mod in shards[args.shard_index]:
+                        print(mod)
     else:
         print(b.tests[args.test])
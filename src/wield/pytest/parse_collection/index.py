@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+Streaming parser and nodeid index of collection outputs, for very large suites.
+
+Unlike pytest_collection_parse, this keeps the full nodeids and keys modules
+by their path, so same-named modules in different packages do not collide.
+"""
+import os
+import json
+
+from .parse import RE_item
+
+
+# collector types whose children are not part of the nodeid path
+DIRECTORY_TYPES = {'Package', 'Dir', 'Session'}
+
+
+def iter_collection(fname):
+    """
+    Stream the items of a --ws-co text output, yielding
+    (nodeid, module, package) for every item (leaf) line.
+
+    module is the path of the enclosing file collector and package the path of
+    the innermost enclosing Package/Dir collector (or None).
+    """
+    # stack of (indent, typename, name, path)
+    stack = []
+    pending = None
+
+    with open(fname, "r") as f:
+        for line in f:
+            m = RE_item.match(line.rstrip())
+            if not m:
+                continue
+            indent = len(m.group(1))
+            entry = (indent, m.group(2), m.group(3), m.group(4))
+
+            # the previous line was a leaf if this one is not its child
+            if pending is not None and indent <= pending[0]:
+                yield _stack_item(stack)
+            while stack and stack[-1][0] >= indent:
+                stack.pop()
+            stack.append(entry)
+            pending = entry
+    if pending is not None:
+        yield _stack_item(stack)
+    return
+
+
+def _stack_item(stack):
+    package = None
+    imod = None
+    for idx, (indent, itemtype, itemname, itempath) in enumerate(stack):
+        if itemtype in DIRECTORY_TYPES:
+            package = itempath
+            imod = None
+        elif imod is None:
+            imod = idx
+    if imod is None:
+        imod = len(stack) - 1
+    module = stack[imod][3]
+    names = [entry[2] for entry in stack[imod + 1:]]
+    nodeid = "::".join([module] + names)
+    return nodeid, module, package
+
+
+def iter_collection_jsonl(fname):
+    """
+    Stream the items of the collection.jsonl written by --ws-co, yielding
+    (nodeid, module, package) like iter_collection.
+    """
+    with open(fname, "r") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            package = None
+            for ctype, cname, cpath in rec["chain"]:
+                if ctype in DIRECTORY_TYPES:
+                    package = cpath
+            yield rec["nodeid"], rec["path"], package
+    return
+
+
+class CollectionIndex(object):
+    """
+    Index of collected nodeids with O(1) lookup by nodeid, module path and
+    package path.
+
+    The nodeids are stored as a module index and the suffix after the module
+    path, which keeps memory and the serialized form compact.
+    """
+    FORMAT_VERSION = 1
+
+    def __init__(self):
+        self.modules = []
+        self.packages = []
+        # mapping of module path to index in self.modules
+        self.module_idx = {}
+        self.package_idx = {}
+        # per-module list of nodeid suffixes
+        self.module_items = []
+        # per-module package index (or None)
+        self.module_package = []
+        # per-package list of module indices
+        self.package_modules = []
+        # mapping of nodeid to module index
+        self.nodeid_module = {}
+
+    @classmethod
+    def from_collection(cls, fname):
+        """
+        Build the index from a --ws-co text output or its .jsonl output
+        """
+        self = cls()
+        if fname.endswith('.jsonl'):
+            it = iter_collection_jsonl(fname)
+        else:
+            it = iter_collection(fname)
+        for nodeid, module, package in it:
+            self.add(nodeid, module, package)
+        return self
+
+    def _add_module(self, module, package):
+        midx = self.module_idx.get(module, None)
+        if midx is not None:
+            return midx
+        if package is not None:
+            pidx = self.package_idx.get(package, None)
+            if pidx is None:
+                pidx = len(self.packages)
+                self.package_idx[package] = pidx
+                self.packages.append(package)
+                self.package_modules.append([])
+        else:
+            pidx = None
+        midx = len(self.modules)
+        self.module_idx[module] = midx
+        self.modules.append(module)
+        self.module_items.append([])
+        self.module_package.append(pidx)
+        if pidx is not None:
+            self.package_modules[pidx].append(midx)
+        return midx
+
+    def add(self, nodeid, module, package=None):
+        if nodeid in self.nodeid_module:
+            return
+        if not nodeid.startswith(module):
+            module = nodeid.split("::")[0]
+        midx = self._add_module(module, package)
+        self.module_items[midx].append(nodeid[len(module):])
+        self.nodeid_module[nodeid] = midx
+
+    def __len__(self):
+        return len(self.nodeid_module)
+
+    def __contains__(self, nodeid):
+        return nodeid in self.nodeid_module
+
+    def __iter__(self):
+        for midx, module in enumerate(self.modules):
+            for suffix in self.module_items[midx]:
+                yield module + suffix
+
+    def module_of(self, nodeid):
+        return self.modules[self.nodeid_module[nodeid]]
+
+    def package_of(self, nodeid):
+        pidx = self.module_package[self.nodeid_module[nodeid]]
+        if pidx is None:
+            return None
+        return self.packages[pidx]
+
+    def nodeids_of_module(self, module):
+        midx = self.module_idx[module]
+        return [module + suffix for suffix in self.module_items[midx]]
+
+    def modules_of_package(self, package):
+        return [self.modules[midx] for midx in self.package_modules[self.package_idx[package]]]
+
+    def nodeids_of_package(self, package):
+        nodeids = []
+        for module in self.modules_of_package(package):
+            nodeids.extend(self.nodeids_of_module(module))
+        return nodeids
+
+    def save(self, fname):
+        """
+        Serialize into a compact JSON file that loads without re-parsing the
+        collection.
+        """
+        data = dict(
+            version=self.FORMAT_VERSION,
+            packages=self.packages,
+            modules=self.modules,
+            module_package=self.module_package,
+            module_items=self.module_items,
+        )
+        fname_tmp = fname + ".tmp{}".format(os.getpid())
+        with open(fname_tmp, "w") as F:
+            json.dump(data, F, separators=(",", ":"))
+        os.replace(fname_tmp, fname)
+
+    @classmethod
+    def load(cls, fname):
+        with open(fname, "r") as F:
+            data = json.load(F)
+        if data.get("version", None) != cls.FORMAT_VERSION:
+            raise RuntimeError("Unrecognized collection index version in {}".format(fname))
+
+        self = cls()
+        self.packages = data["packages"]
+        self.package_idx = {package: pidx for pidx, package in enumerate(self.packages)}
+        self.package_modules = [[] for package in self.packages]
+        self.modules = data["modules"]
+        self.module_idx = {module: midx for midx, module in enumerate(self.modules)}
+        self.module_package = data["module_package"]
+        self.module_items = data["module_items"]
+        for midx, module in enumerate(self.modules):
+            pidx = self.module_package[midx]
+            if pidx is not None:
+                self.package_modules[pidx].append(midx)
+            for suffix in self.module_items[midx]:
+                self.nodeid_module[module + suffix] = midx
+        return self
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+Ordering of the parsed test modules using the durations database written by
+the wield.pytest plugin.
+"""
+import os
+
+from wield.pytest import durations
+
+
+def durations_of_tests(b, stats):
+    """
+    Map the test names of a parsed collection (the keys of b.tests) to the
+    summed duration of their module. Tests without any history are left out.
+
+    The module paths of the collection are relative to where the collection
+    was run, while the database is relative to the rootdir. The paths are
+    matched exactly first, and then by their trailing components.
+    """
+    mod_durations = {
+        os.path.normpath(mod): dur
+        for mod, dur in durations.module_durations(stats).items()
+    }
+    mod_durations_tail = {}
+    for mod, dur in mod_durations.items():
+        for tail in _path_tails(mod):
+            mod_durations_tail.setdefault(tail, dur)
+
+    tdurations = {}
+    for tname, tpath in b.tests.items():
+        tpath = os.path.normpath(tpath)
+        dur = mod_durations.get(tpath, None)
+        if dur is None:
+            for tail in [tpath] + _path_tails(tpath):
+                dur = mod_durations_tail.get(tail, None)
+                if dur is not None:
+                    break
+        if dur is not None:
+            tdurations[tname] = dur
+    return tdurations
+
+
+def failures_of_tests(b, stats):
+    """
+    The set of test names of a parsed collection whose module had a failure on
+    its most recent run.
+    """
+    failed = set(os.path.normpath(mod) for mod in durations.module_failures(stats))
+    failed_tail = set()
+    for mod in failed:
+        failed_tail.update(_path_tails(mod))
+
+    tests = set()
+    for tname, tpath in b.tests.items():
+        tpath = os.path.normpath(tpath)
+        if tpath in failed or any(tail in failed_tail for tail in [tpath] + _path_tails(tpath)):
+            tests.add(tname)
+    return tests
+
+
+def _path_tails(p):
+    """
+    The trailing path components of p, longest first, excluding p itself
+    """
+    parts = p.split(os.sep)
+    return [os.sep.join(parts[idx:]) for idx in range(1, len(parts))]
+
+
+def order_tests(b, stats, order="longest"):
+    """
+    Order the test names of a parsed collection.
+
+    order="longest" puts the slowest modules first, so that they do not land
+    at the end of a (parallel) run. order="failed" puts the modules that failed
+    on their last run first, then the rest longest first.
+
+    Tests without history are put at the end in their collection order.
+    """
+    tdurations = durations_of_tests(b, stats)
+    known = sorted(tdurations, key=lambda t: -tdurations[t])
+    unknown = [t for t in b.tests if t not in tdurations]
+
+    if order == "longest":
+        return known + unknown
+    elif order == "failed":
+        failed = failures_of_tests(b, stats)
+        return (
+            [t for t in known if t in failed]
+            + [t for t in unknown if t in failed]
+            + [t for t in known if t not in failed]
+            + [t for t in unknown if t not in failed]
+        )
+    else:
+        raise RuntimeError("Unrecognized order {}".format(order))
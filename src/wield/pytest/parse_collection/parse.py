@@ -28,7 +28,7 @@ def pytest_collection_parse(fname):
     current_module = None
     last_indent = ""
     with open(fname, "r") as f:
-        for line in f.readlines():
+        for line in f:
             line = line.rstrip()
             m = RE_item.match(line)
             if m:
@@ -47,7 +47,8 @@ def pytest_collection_parse(fname):
                 itemname = m.group(3)
                 itempath = m.group(4)
 
-                if itemtype == 'Package':
+                # Dir is the directory collector of pytest>=8
+                if itemtype in ('Package', 'Dir'):
                     current_package = itemname
                     packages[current_package] = []
                 elif itemtype == 'Module':
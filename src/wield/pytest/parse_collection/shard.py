@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+Duration-balanced sharding of the parsed test modules for CI matrices.
+"""
+import os
+import heapq
+
+from .order import durations_of_tests
+
+
+def function_counts(b):
+    """
+    Map the test names of a parsed collection to the number of test functions
+    in their module. Notebooks and modules that can't be matched count as 1.
+    """
+    counts = {}
+    for tname, tpath in b.tests.items():
+        fmod = os.path.split(tpath)[1]
+        funcs = b.modules.get(fmod, None)
+        if funcs is None:
+            funcs = b.modules.get(tpath, None)
+        counts[tname] = max(len(funcs), 1) if funcs else 1
+    return counts
+
+
+def estimated_weights(b, stats=None):
+    """
+    Estimated run time of each test name of a parsed collection.
+
+    Modules with history use their recorded durations. Modules without history
+    are estimated from the number of test functions they hold, times the mean
+    per-function duration of the modules with history. Without any history,
+    the weights are just the function counts.
+    """
+    counts = function_counts(b)
+    if stats:
+        tdurations = durations_of_tests(b, stats)
+    else:
+        tdurations = {}
+
+    known_funcs = sum(counts[t] for t in tdurations)
+    if known_funcs > 0:
+        per_func = sum(tdurations.values()) / known_funcs
+    else:
+        per_func = 1
+
+    weights = {}
+    for tname in b.tests:
+        dur = tdurations.get(tname, None)
+        if dur is None:
+            dur = counts[tname] * per_func
+        weights[tname] = dur
+    return weights
+
+
+def shard_tests(tnames, weights, N):
+    """
+    Pack the test names into N shards with balanced total weight.
+
+    Uses the longest-processing-time-first greedy packing, each test going
+    into the currently lightest shard. The slowest shard is then at most 4/3
+    of the optimum and generally close to total/N. Within each shard, the tests
+    keep the order of tnames, so an existing ordering (such as from --sort or
+    --durations) is preserved.
+
+    Returns a list of N lists of test names.
+    """
+    if N < 1:
+        raise RuntimeError("Number of shards must be at least 1")
+    order = {t: idx for idx, t in enumerate(tnames)}
+    # sort by weight, ties broken by the given order so that sharding is stable
+    by_weight = sorted(tnames, key=lambda t: (-weights.get(t, 0), order[t]))
+
+    heap = [(0, idx) for idx in range(N)]
+    shards = [[] for idx in range(N)]
+    for tname in by_weight:
+        total, idx = heapq.heappop(heap)
+        shards[idx].append(tname)
+        heapq.heappush(heap, (total + weights.get(tname, 0), idx))
+
+    for shard in shards:
+        shard.sort(key=lambda t: order[t])
+    return shards
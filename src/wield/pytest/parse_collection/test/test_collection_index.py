@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+"""
+import json
+import pytest
+
+from wield.pytest import Timer
+from wield.pytest.fixtures import (  # noqa
+    tpath_join,
+)
+
+from wield.pytest.parse_collection import CollectionIndex
+
+
+collection = """\
+Dir::root::.
+  Package::pkg_a::src/pkg_a
+    Module::test_util.py::src/pkg_a/test_util.py
+      Function::test_1::src/pkg_a/test_util.py
+      Class::TestX::src/pkg_a/test_util.py
+        Function::test_2[1]::src/pkg_a/test_util.py
+        Function::test_2[2]::src/pkg_a/test_util.py
+  Package::pkg_b::src/pkg_b
+    Module::test_util.py::src/pkg_b/test_util.py
+      Function::test_1::src/pkg_b/test_util.py
+  Module::test_top.py::test_top.py
+    Function::test_top::test_top.py
+"""
+
+
+def test_collection_index(tpath_join):
+    fname = tpath_join("collection.txt")
+    with open(fname, "w") as F:
+        F.write(collection)
+
+    idx = CollectionIndex.from_collection(fname)
+    assert list(idx) == [
+        "src/pkg_a/test_util.py::test_1",
+        "src/pkg_a/test_util.py::TestX::test_2[1]",
+        "src/pkg_a/test_util.py::TestX::test_2[2]",
+        "src/pkg_b/test_util.py::test_1",
+        "test_top.py::test_top",
+    ]
+    # same-named modules do not collide
+    assert idx.nodeids_of_module("src/pkg_b/test_util.py") == ["src/pkg_b/test_util.py::test_1"]
+    assert idx.module_of("src/pkg_a/test_util.py::TestX::test_2[2]") == "src/pkg_a/test_util.py"
+    assert idx.package_of("src/pkg_a/test_util.py::test_1") == "src/pkg_a"
+    assert idx.package_of("test_top.py::test_top") == "."
+    assert idx.modules_of_package("src/pkg_a") == ["src/pkg_a/test_util.py"]
+    assert len(idx.nodeids_of_package("src/pkg_a")) == 3
+
+    idx.save(tpath_join("index.json"))
+    idx2 = CollectionIndex.load(tpath_join("index.json"))
+    assert list(idx2) == list(idx)
+    assert idx2.package_of("src/pkg_b/test_util.py::test_1") == "src/pkg_b"
+
+    with open(tpath_join("collection.jsonl"), "w") as F:
+        F.write(json.dumps(dict(
+            nodeid="src/pkg_b/test_util.py::test_1",
+            path="src/pkg_b/test_util.py",
+            chain=[
+                ["Dir", "root", "."],
+                ["Package", "pkg_b", "src/pkg_b"],
+                ["Module", "test_util.py", "src/pkg_b/test_util.py"],
+                ["Function", "test_1", "src/pkg_b/test_util.py"],
+            ],
+        )))
+        F.write("\n")
+    idx3 = CollectionIndex.from_collection(tpath_join("collection.jsonl"))
+    assert idx3.package_of("src/pkg_b/test_util.py::test_1") == "src/pkg_b"
+
+
+@pytest.mark.ws_slow
+def test_collection_index_bench(tpath_join):
+    """
+    Parse, lookup and reload timings of an index at 100k collected items
+    """
+    Npkg, Nmod, Nfunc = 20, 100, 50
+    fname = tpath_join("collection_100k.txt")
+    with open(fname, "w") as F:
+        F.write("Dir::root::.\n")
+        for ipkg in range(Npkg):
+            pkg = "src/pkg{}".format(ipkg)
+            F.write("  Package::pkg{}::{}\n".format(ipkg, pkg))
+            for imod in range(Nmod):
+                mod = "{}/test_mod{}.py".format(pkg, imod)
+                F.write("    Module::test_mod{}.py::{}\n".format(imod, mod))
+                for ifunc in range(Nfunc):
+                    F.write("      Function::test_{}::{}\n".format(ifunc, mod))
+    N = Npkg * Nmod * Nfunc
+
+    with Timer() as t_parse:
+        idx = CollectionIndex.from_collection(fname)
+    assert len(idx) == N
+
+    nodeids = list(idx)
+    with Timer(N) as t_lookup:
+        for nodeid in nodeids:
+            idx.module_of(nodeid)
+
+    with Timer() as t_save:
+        idx.save(tpath_join("index.json"))
+    with Timer() as t_load:
+        CollectionIndex.load(tpath_join("index.json"))
+
+    print("parse {} items: {}".format(N, t_parse))
+    print("lookup: {} per nodeid".format(t_lookup))
+    print("save: {}, load: {}".format(t_save, t_load))
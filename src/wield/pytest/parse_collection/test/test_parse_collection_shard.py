@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+"""
+import sys
+import subprocess
+
+from wield.pytest.fixtures import (  # noqa
+    tpath_join,
+)
+
+from wield.pytest.parse_collection import pytest_collection_parse
+from wield.pytest.parse_collection.shard import shard_tests, estimated_weights
+
+
+collection = """\
+Package::pkg::src/pkg
+  Module::test_a.py::src/pkg/test_a.py
+    Function::test_1::src/pkg/test_a.py
+    Function::test_2::src/pkg/test_a.py
+    Function::test_3::src/pkg/test_a.py
+    Function::test_4::src/pkg/test_a.py
+  Module::test_b.py::src/pkg/test_b.py
+    Function::test_1::src/pkg/test_b.py
+    Function::test_2::src/pkg/test_b.py
+  Module::test_c.py::src/pkg/test_c.py
+    Function::test_1::src/pkg/test_c.py
+    Function::test_2::src/pkg/test_c.py
+  Module::test_d.py::src/pkg/test_d.py
+    Function::test_1::src/pkg/test_d.py
+"""
+
+
+def test_shard_balance():
+    tnames = ["t{}".format(idx) for idx in range(20)]
+    weights = {t: idx + 1 for idx, t in enumerate(tnames)}
+    shards = shard_tests(tnames, weights, 4)
+
+    assert sorted(sum(shards, [])) == sorted(tnames)
+    totals = [sum(weights[t] for t in shard) for shard in shards]
+    assert max(totals) <= 1.05 * sum(weights.values()) / 4
+    # order within a shard is preserved
+    for shard in shards:
+        assert shard == sorted(shard, key=tnames.index)
+
+
+def test_shard_cli(tpath_join):
+    fname = tpath_join("collection.txt")
+    with open(fname, "w") as F:
+        F.write(collection)
+
+    b = pytest_collection_parse(fname)
+    # without history, weights are the function counts
+    assert estimated_weights(b) == dict(test_a=4, test_b=2, test_c=2, test_d=1)
+
+    out = subprocess.run(
+        [sys.executable, '-m', 'wield.pytest.parse_collection', fname, '--shards', '2'],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert out.stdout.splitlines() == ["test_a test_d", "test_b test_c"]
+
+    out = subprocess.run(
+        [sys.executable, '-m', 'wield.pytest.parse_collection', fname, '--shards', '2', '--shard-index', '1'],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert out.stdout.splitlines() == ["test_b", "test_c"]
+
+
+def test_shard_cli_errors(tpath_join):
+    fname = tpath_join("collection.txt")
+    with open(fname, "w") as F:
+        F.write(collection)
+
+    for args, msg in [
+        (['--shards', '2', '--shard-index', '2'], "--shard-index must be in [0, 2)"),
+        (['--shards', '2', '--shard-index', '-1'], "--shard-index must be in [0, 2)"),
+        (['--shard-index', '0'], "--shard-index requires --shards"),
+        (['--shards', '0'], "--shards must be at least 1"),
+    ]:
+        out = subprocess.run(
+            [sys.executable, '-m', 'wield.pytest.parse_collection', fname] + args,
+            capture_output=True,
+            text=True,
+        )
+        assert out.returncode == 2
+        assert msg in out.stderr
+        assert "Traceback" not in out.stderr
@@ -0,0 +1,366 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+Benchmark history and performance-regression gating for ws_perf tests.
+
+Every result of the ws_benchmark fixture is appended to
+test_results/perf_history.jsonl, keyed by nodeid, benchmark name, machine
+fingerprint, git revision and run. The file is compacted at the end of each
+session to the most recent records of each benchmark and machine. Tests
+marked ws_perf compare their results to the rolling baseline of the previous
+runs on the same machine and warn or fail (--ws-perf-action) when slower by
+more than the tolerance.
+
+This is also a runnable module to compare two runs
+
+python -m wield.pytest.perf compare RUN_A RUN_B
+
+where the runs are given by run id or git revision (prefixes work), and
+
+python -m wield.pytest.perf list
+
+lists the recorded runs.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import hashlib
+import platform
+import subprocess
+import statistics
+
+
+PERF_FNAME = "perf_history.jsonl"
+# number of records kept per benchmark and machine during compaction
+KEEP_RECORDS = 50
+
+
+def perf_path(config):
+    return os.path.join(str(config.rootpath), "test_results", PERF_FNAME)
+
+
+def cpu_model():
+    """
+    The CPU model name, which platform.processor() leaves empty on Linux
+    """
+    try:
+        with open("/proc/cpuinfo", "r") as F:
+            for line in F:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor()
+
+
+def package_version(name):
+    from importlib import metadata
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return "none"
+
+
+def machine_fingerprint():
+    """
+    Short hash identifying the hardware and the python and numpy versions, so
+    that baselines are only compared on like machines. The hostname is left
+    out, as CI runners have a new one for every job.
+    """
+    H = hashlib.sha1()
+    for v in [
+        platform.machine(),
+        cpu_model(),
+        str(os.cpu_count()),
+        platform.python_implementation(),
+        platform.python_version(),
+        package_version("numpy"),
+    ]:
+        H.update(v.encode())
+        H.update(b'\0')
+    return H.hexdigest()[:12]
+
+
+def git_revision(fpath):
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=fpath,
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+    if out.returncode != 0:
+        return "unknown"
+    rev = out.stdout.strip()
+    try:
+        out = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=fpath,
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+        if out.returncode == 0 and out.stdout.strip():
+            rev = rev + "-dirty"
+    except (OSError, subprocess.SubprocessError):
+        pass
+    return rev
+
+
+# session information, set by perf_configure
+_session = None
+
+
+def perf_configure(config):
+    global _session
+    workerinput = getattr(config, "workerinput", None)
+    if workerinput is not None and "testrunuid" in workerinput:
+        # xdist workers share the run id of the controller
+        run = workerinput["testrunuid"]
+    else:
+        run = uuid.uuid4().hex
+    _session = dict(
+        fname=perf_path(config),
+        rootpath=str(config.rootpath),
+        run=run,
+        machine=None,
+        rev=None,
+        action=config.getoption("ws_perf_action", default="warn"),
+        tolerance=config.getoption("ws_perf_tolerance", default=0.1),
+        history=config.getoption("ws_perf_history", default=5),
+    )
+    return
+
+
+def session_info():
+    if _session["rev"] is None:
+        # only run git when benchmarks are actually recorded
+        _session["rev"] = git_revision(_session["rootpath"])
+    if _session["machine"] is None:
+        _session["machine"] = machine_fingerprint()
+    return _session
+
+
+def iter_history(fname):
+    try:
+        F = open(fname, "r")
+    except FileNotFoundError:
+        return
+    with F:
+        for line in F:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def record(nodeid, results):
+    """
+    Append the BenchmarkResults of a test to the history
+    """
+    if _session is None:
+        return
+    info = session_info()
+    lines = []
+    for result in results:
+        lines.append(json.dumps(dict(
+            nodeid=nodeid,
+            name=result.name,
+            machine=info["machine"],
+            rev=info["rev"],
+            run=info["run"],
+            time=round(time.time(), 3),
+            median=result.median,
+            iqr=result.iqr,
+            min=result.min,
+            N=result.N,
+        ), separators=(",", ":")) + "\n")
+    os.makedirs(os.path.split(info["fname"])[0], exist_ok=True)
+    # a single append per test, so that xdist workers do not interleave lines
+    with open(info["fname"], "a") as F:
+        F.write("".join(lines))
+    return
+
+
+def baseline(history, nodeid, name, machine, run, N=5):
+    """
+    The (median, spread) of the recent medians of the benchmark on this
+    machine, excluding the current run, or None without history.
+
+    spread is the median absolute deviation scaled to a standard deviation.
+    """
+    medians = [
+        rec["median"] for rec in history
+        if rec["nodeid"] == nodeid
+        and rec["name"] == name
+        and rec["machine"] == machine
+        and rec["run"] != run
+    ][-N:]
+    if not medians:
+        return None
+    base = statistics.median(medians)
+    spread = 1.4826 * statistics.median(abs(m - base) for m in medians)
+    return base, spread
+
+
+def regressions(nodeid, results, tolerance=None):
+    """
+    Compare the results of a test against the baselines. Returns a list of
+    messages for the benchmarks that regressed.
+
+    A benchmark regresses when its median is slower than the baseline by more
+    than the tolerance, and by more than 3 times the spread of the baseline, so
+    that noisy benchmarks need a clearer slowdown.
+    """
+    if _session is None:
+        return []
+    info = session_info()
+    if tolerance is None:
+        tolerance = info["tolerance"]
+    history = [rec for rec in iter_history(info["fname"]) if rec["nodeid"] == nodeid]
+
+    msgs = []
+    for result in results:
+        base = baseline(history, nodeid, result.name, info["machine"], info["run"], N=info["history"])
+        if base is None:
+            continue
+        base_median, base_spread = base
+        limit = max(base_median * (1 + tolerance), base_median + 3 * base_spread)
+        if result.median > limit:
+            msgs.append("{} is {:.1f}% slower than its baseline ({:.4g}s vs {:.4g}s, tolerance {:.0f}%)".format(
+                result.name,
+                100 * (result.median / base_median - 1),
+                result.median,
+                base_median,
+                100 * tolerance,
+            ))
+    return msgs
+
+
+def compact_history(fname, keep=KEEP_RECORDS):
+    """
+    Rewrite the history keeping only the last "keep" records of each
+    benchmark on each machine, in their original order. Like
+    durations.compact_records, it only rewrites if that would drop a
+    significant number of lines.
+    """
+    history = list(iter_history(fname))
+    counts = {}
+    for rec in history:
+        key = (rec["nodeid"], rec["name"], rec["machine"])
+        counts[key] = counts.get(key, 0) + 1
+
+    Nkeep = sum(min(N, keep) for N in counts.values())
+    if len(history) <= 2 * Nkeep:
+        return
+
+    fname_tmp = fname + ".tmp{}".format(os.getpid())
+    with open(fname_tmp, "w") as F:
+        for rec in history:
+            key = (rec["nodeid"], rec["name"], rec["machine"])
+            counts[key] -= 1
+            # the count left is the number of newer records
+            if counts[key] < keep:
+                F.write(json.dumps(rec, separators=(",", ":")))
+                F.write("\n")
+    os.replace(fname_tmp, fname)
+    return
+
+
+def perf_finish(config):
+    """
+    Compact the history at the end of the session, from the controller
+    """
+    fname = perf_path(config)
+    if os.path.exists(fname):
+        compact_history(fname)
+    return
+
+
+def runs(history):
+    """
+    Mapping of run id to (first time, rev, machine), in time order
+    """
+    found = {}
+    for rec in history:
+        if rec["run"] not in found:
+            found[rec["run"]] = (rec["time"], rec["rev"], rec["machine"])
+    return dict(sorted(found.items(), key=lambda kv: kv[1][0]))
+
+
+def select_run(history, key):
+    """
+    The records of the latest run whose id or revision starts with key
+    """
+    matches = [
+        run for run, (t, rev, machine) in runs(history).items()
+        if run.startswith(key) or rev.startswith(key)
+    ]
+    if not matches:
+        raise RuntimeError("No run or revision matching {}".format(key))
+    run = matches[-1]
+    return {(rec["nodeid"], rec["name"]): rec for rec in history if rec["run"] == run}
+
+
+def compare(history, key_a, key_b):
+    """
+    Ratios of the medians of run B over run A, for benchmarks in both.
+    Returns a list of (ratio, nodeid, name) sorted from the largest speedup to
+    the largest slowdown.
+    """
+    recs_a = select_run(history, key_a)
+    recs_b = select_run(history, key_b)
+    ratios = []
+    for key, rec_b in recs_b.items():
+        rec_a = recs_a.get(key, None)
+        if rec_a is None or rec_a["median"] <= 0:
+            continue
+        ratios.append((rec_b["median"] / rec_a["median"], key[0], key[1]))
+    ratios.sort()
+    return ratios
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(
+        description='Inspect and compare the benchmark history of ws_benchmark'
+    )
+    parser.add_argument('--history', default=os.path.join("test_results", PERF_FNAME), help='history file')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list', help='list the recorded runs')
+    p_compare = subparsers.add_parser('compare', help='compare two runs, by run id or git revision')
+    p_compare.add_argument('run_a', help='baseline run')
+    p_compare.add_argument('run_b', help='run to compare')
+    p_compare.add_argument('-n', type=int, default=10, help='number of speedups and slowdowns to print')
+    args = parser.parse_args()
+
+    history = list(iter_history(args.history))
+    if args.command == 'list':
+        for run, (t, rev, machine) in runs(history).items():
+            print("{}  {}  {}  {}".format(
+                time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(t)), run, rev, machine
+            ))
+    elif args.command == 'compare':
+        try:
+            ratios = compare(history, args.run_a, args.run_b)
+        except RuntimeError as E:
+            print(E, file=sys.stderr)
+            sys.exit(1)
+        speedups = [r for r in ratios if r[0] < 1][:args.n]
+        slowdowns = [r for r in ratios[::-1] if r[0] > 1][:args.n]
+        print("largest speedups:")
+        for ratio, nodeid, name in speedups:
+            print("  {:6.2f}x faster  {} [{}]".format(1 / ratio, nodeid, name))
+        print("largest slowdowns:")
+        for ratio, nodeid, name in slowdowns:
+            print("  {:6.2f}x slower  {} [{}]".format(ratio, nodeid, name))
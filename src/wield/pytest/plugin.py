@@ -12,6 +12,21 @@ import pytest
 import os
 import wield.pytest
 import wield.pytest.fixtures
+from wield.pytest import durations
+from wield.pytest import capture_writer
+from wield.pytest import trash
+from wield.pytest import impact
+from wield.pytest import collection
+from wield.pytest import perf
+from wield.pytest import render
+from wield.pytest import artifacts
+from wield.pytest import fixture_cache
+from wield.pytest import triggers
+from wield.pytest import largemem
+from wield.pytest import budget
+from wield.pytest import slow
+from wield.pytest import resources
+from wield.pytest import profiling
 from wield.pytest.fixtures import (  # noqa
     tpath,
     closefigs,
@@ -31,29 +46,275 @@ def pytest_addoption(parser):
             help="Print test items in a custom format for wield"
         )
 
+    def wield_collectonly_jsonl():
+        parser.addoption(
+            "--ws-co-jsonl", dest="ws_co_jsonl", action="store", default=None,
+            help="File for the machine-readable output of --ws-co (default test_results/collection.jsonl)"
+        )
+        parser.addoption(
+            "--ws-co-cache", dest="ws_co_cache", action="store_true", default=False,
+            help="With --ws-co, list unchanged modules from the previous --ws-co output rather than importing them"
+        )
+
     def WS_SKIP_SLOW():
         parser.addoption("--ws-skip-slow", action="store_true", help="Skip slow tests (marked with ws_slow)")
 
+    def WS_SLOW_THRESHOLD():
+        parser.addoption(
+            "--ws-slow-threshold", dest="ws_slow_threshold", type=slow.threshold_option, default=None,
+            help="Classify tests as ws_slow from their recorded durations, with a threshold such as 10s or a percentile such as p95"
+        )
+
+    def WS_DURATIONS():
+        parser.addoption(
+            "--ws-no-durations", dest="ws_durations", action="store_false", default=True,
+            help="Don't record test durations into test_results/durations.jsonl"
+        )
+
+    def WS_CAPTURE_SYNC():
+        parser.addoption(
+            "--ws-capture-sync", dest="ws_capture_sync", action="store_true", default=False,
+            help="Write capture.txt files from the reporting hook rather than a background thread"
+        )
+
+    def WS_TPATH_PRECREATE():
+        parser.addoption(
+            "--ws-tpath-precreate", dest="ws_tpath_precreate", action="store_true", default=False,
+            help="Create the tpath folders and links of all tests in one pass after collection"
+        )
+
+    def WS_PRECLEAR_TRASH():
+        parser.addoption(
+            "--ws-preclear-trash", dest="ws_preclear_trash", action="store_true", default=False,
+            help="tpath_preclear moves the old folder into test_results/.trash and deletes it in the background"
+        )
+
+    def WS_IMPACT():
+        parser.addoption(
+            "--ws-impact", dest="ws_impact", action="store_true", default=False,
+            help="Only run tests whose module or its local imports changed since they last ran, or that failed last time"
+        )
+
+    def WS_PERF():
+        parser.addoption(
+            "--ws-perf-action", dest="ws_perf_action", choices=["warn", "fail"], default="warn",
+            help="Whether ws_perf tests that regress against their baseline warn or fail (default warn)"
+        )
+        parser.addoption(
+            "--ws-perf-tolerance", dest="ws_perf_tolerance", type=float, default=0.1,
+            help="Relative slowdown of ws_perf benchmarks over their baseline that counts as a regression (default 0.1)"
+        )
+        parser.addoption(
+            "--ws-perf-history", dest="ws_perf_history", type=int, default=5,
+            help="Number of previous runs forming the ws_perf baseline (default 5)"
+        )
+
+    def WS_RESOURCES():
+        parser.addoption(
+            "--ws-no-resources", dest="ws_resources", action="store_false", default=True,
+            help="Don't account the CPU, memory and I/O of each test into capture.txt and test_results/resources.json"
+        )
+        parser.addoption(
+            "--ws-resource-report", dest="ws_resource_report", type=int, default=0,
+            help="Number of tests using the most CPU time to report at the end (default 0, no report)"
+        )
+
+    def WS_PROFILE():
+        parser.addoption(
+            "--ws-profile", dest="ws_profile", action="store_true", default=False,
+            help="Profile the call of each test into its tpath, see --ws-profile-mode"
+        )
+        parser.addoption(
+            "--ws-profile-mode", dest="ws_profile_mode", default="deterministic",
+            choices=profiling.PROFILE_MODES,
+            help="Profiler of --ws-profile, cProfile (deterministic, the default) or low overhead stack sampling (sampling)"
+        )
+
+    def WS_FIGURES():
+        parser.addoption(
+            "--ws-figure-limit", dest="ws_figure_limit", type=int, default=None,
+            help="Fail tests that leave more than this many matplotlib figures open"
+        )
+        parser.addoption(
+            "--ws-figure-report", dest="ws_figure_report", type=int, default=5,
+            help="Number of tests leaving the most figures open to report at the end (default 5, 0 to disable)"
+        )
+
+    def WS_RENDER():
+        parser.addoption(
+            "--ws-render-workers", dest="ws_render_workers", type=int, default=None,
+            help="Number of processes rendering ws_render figures, 0 to render inline (default 4, or 1 per xdist worker)"
+        )
+
+    def WS_ARTIFACTS():
+        parser.addoption(
+            "--ws-artifacts", dest="ws_artifacts", action="store_true", default=False,
+            help="Deduplicate the test_results files into a content-addressed pool and write test_results/artifacts_manifest.json"
+        )
+
+    def GOLDEN_UPDATE():
+        parser.addoption(
+            "--golden-update", dest="golden_update", action="store_true", default=False,
+            help="Rewrite the references of the golden fixture rather than comparing against them"
+        )
+
+    def WS_CACHE():
+        parser.addoption(
+            "--ws-cache-clear", dest="ws_cache_clear", action="store_true", default=False,
+            help="Empty the cache of ws_cached fixtures before running"
+        )
+        parser.addoption(
+            "--ws-cache-size", dest="ws_cache_size", type=float, default=fixture_cache.CACHE_SIZE_MB,
+            help="Size limit in MB of the cache of ws_cached fixtures (default {})".format(fixture_cache.CACHE_SIZE_MB)
+        )
+
+    def WS_TRIGGER():
+        parser.addoption(
+            "--ws-trigger", dest="ws_trigger", choices=triggers.TRIGGER_MODES, default="inline",
+            help="Run test_trigger calls inline (default), deferred to the end of the session, or in a thread pool"
+        )
+
+    def WS_LARGEMEM():
+        parser.addoption(
+            "--ws-largemem-budget", dest="ws_largemem_budget", type=float, default=None,
+            help="GB of memory shared by the running largemem tests of all processes (default 80% of the available memory)"
+        )
+        parser.addoption(
+            "--ws-no-largemem", dest="ws_largemem", action="store_false", default=True,
+            help="Don't limit the number of largemem tests running at once"
+        )
+
+    def WS_TIME_BUDGET():
+        parser.addoption(
+            "--ws-time-budget", dest="ws_time_budget", type=budget.parse_duration, default=None,
+            help="Run the most valuable tests fitting the time budget (e.g. 120s, 5m), using the durations, failures and changed modules of previous runs"
+        )
+
     wield.pytest.pytest_addoption(
         parser,
         IFO=IFO,
         wield_collectonly=wield_collectonly,
-        WS_SKIP_SLOW=WS_SKIP_SLOW
+        wield_collectonly_jsonl=wield_collectonly_jsonl,
+        WS_SKIP_SLOW=WS_SKIP_SLOW,
+        WS_SLOW_THRESHOLD=WS_SLOW_THRESHOLD,
+        WS_DURATIONS=WS_DURATIONS,
+        WS_CAPTURE_SYNC=WS_CAPTURE_SYNC,
+        WS_TPATH_PRECREATE=WS_TPATH_PRECREATE,
+        WS_PRECLEAR_TRASH=WS_PRECLEAR_TRASH,
+        WS_IMPACT=WS_IMPACT,
+        WS_PERF=WS_PERF,
+        WS_RESOURCES=WS_RESOURCES,
+        WS_PROFILE=WS_PROFILE,
+        WS_FIGURES=WS_FIGURES,
+        WS_RENDER=WS_RENDER,
+        WS_ARTIFACTS=WS_ARTIFACTS,
+        GOLDEN_UPDATE=GOLDEN_UPDATE,
+        WS_CACHE=WS_CACHE,
+        WS_TRIGGER=WS_TRIGGER,
+        WS_LARGEMEM=WS_LARGEMEM,
+        WS_TIME_BUDGET=WS_TIME_BUDGET,
     )
 
 
 def pytest_collection_modifyitems(config, items):
+    global _budget_summary, _slow_report
+    if config.option.ws_impact:
+        store = impact.load(impact.impact_path(config))
+        graph = impact.ImportGraph(config.rootpath)
+        selected, deselected = impact.select(items, store, graph, config.rootpath)
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+            items[:] = selected
+
+    if config.option.ws_time_budget is not None:
+        workerinput = getattr(config, "workerinput", None)
+        Nworkers = workerinput.get("workercount", 1) if workerinput is not None else 1
+        time_budget = config.option.ws_time_budget * Nworkers
+        selected, deselected, estimates = budget.budget_items(items, config, time_budget)
+        _budget_summary = budget.summary_lines(selected, deselected, estimates, time_budget)
+        if workerinput is not None:
+            # the controller does not collect, so it reports the summary of a worker
+            config.workeroutput["ws_time_budget"] = _budget_summary
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+            items[:] = selected
+
+    if config.option.ws_largemem and config.getoption("numprocesses", default=None):
+        largemem.interleave(items)
+
+    slow_nodeids = None
+    if config.option.ws_slow_threshold is not None:
+        stats = slow.load(durations.durations_path(config))
+        threshold = slow.parse_threshold(config.option.ws_slow_threshold, stats)
+        if threshold is not None:
+            slow_nodeids, marked_fast, unmarked_slow = slow.classify(items, stats, threshold)
+            for item in items:
+                if item.nodeid in slow_nodeids and item.get_closest_marker("ws_slow") is None:
+                    item.add_marker(pytest.mark.ws_slow)
+            _slow_report = slow.report_lines(threshold, marked_fast, unmarked_slow)
+            if hasattr(config, "workerinput"):
+                config.workeroutput["ws_slow_report"] = _slow_report
+
     skip_slow = pytest.mark.skip(reason="marked ws_slow and --ws-skip-slow indicated")
     if config.getoption("--ws-skip-slow"):
         for item in items:
-            if "ws_slow" in item.keywords:
+            if slow_nodeids is not None:
+                is_slow = item.nodeid in slow_nodeids
+            else:
+                is_slow = "ws_slow" in item.keywords
+            if is_slow:
                 item.add_marker(skip_slow)
 
 
+# terminal summary lines of the --ws-time-budget selection
+_budget_summary = None
+# terminal summary lines of the --ws-slow-threshold disagreements
+_slow_report = None
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    global _budget_summary, _slow_report
+    # every xdist worker makes the same selection
+    workeroutput = getattr(node, "workeroutput", {})
+    if _budget_summary is None and "ws_time_budget" in workeroutput:
+        _budget_summary = workeroutput["ws_time_budget"]
+    if _slow_report is None and "ws_slow_report" in workeroutput:
+        _slow_report = workeroutput["ws_slow_report"]
+
+
+def pytest_collection_finish(session):
+    config = session.config
+    if config.option.ws_tpath_precreate and not config.option.collectonly:
+        wield.pytest.utilities.tpath_setup_items(session.items)
+
+
+# cache of the previous --ws-co output, used with --ws-co-cache
+_collection_cache = None
+# every item collected with --ws-co, before -k, -m or plugins deselect any
+_collected_items = None
+
+
+def pytest_itemcollected(item):
+    if _collected_items is not None:
+        _collected_items.append(item)
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pycollect_makemodule(module_path, parent):
+    if _collection_cache is not None:
+        return collection.make_cached_module(_collection_cache, module_path, parent)
+    return None
+
+
 @pytest.hookimpl()
 def pytest_report_collectionfinish(config, start_path, items):
     lines = []
     if config.option.ws_collectonly is not None:
+        # the records serve as the collection cache of whole modules, so they
+        # are not written when nodeid arguments collected only parts of them
+        if not any("::" in arg for arg in config.args):
+            collection.write_collection(collection.collection_path(config), _collected_items, config.rootpath)
         stack = []
         indent = ""
         for item in items:
@@ -70,50 +331,177 @@ def pytest_report_collectionfinish(config, start_path, items):
                 # Other pytest things use the TerminalReporter
                 # but it is difficult to prevent other output from collect-only
                 # if trying to use that..
-                print('{}{}::{}::{}'.format(indent, col.__class__.__name__, col.name, relp))
+                print('{}{}::{}::{}'.format(indent, collection.typename(col), col.name, relp))
         pytest.exit('Done!')
         return lines
     else:
         return
 
 
+# records durations into the test_results database, only used on the
+# controlling process when running with xdist
+_duration_recorder = None
+# records which tests ran for --ws-impact, same as _duration_recorder
+_impact_recorder = None
+
+
+# mapping of nodeid to the number of figures closefigs found left open,
+# gathered from the report ws_properties so that it works with xdist
+_figure_counts = {}
+
+
+# changes reported by --ws-artifacts, set at the end of the session
+_artifacts_manifest = None
+
+
+# semaphore limiting the memory of the running largemem tests
+_largemem_semaphore = None
+# mapping of nodeid to the time its largemem test waited for memory,
+# gathered from the report ws_properties like _figure_counts
+_largemem_queued = {}
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    if _largemem_semaphore is None:
+        yield
+        return
+    gb = largemem.item_gb(item, _largemem_semaphore.budget_gb / 2)
+    if gb is None:
+        yield
+        return
+    waited = _largemem_semaphore.acquire(gb)
+    wield.pytest.utilities.node_property(item, "ws_largemem_queued", waited)
+    try:
+        yield
+    finally:
+        _largemem_semaphore.release(gb)
+
+
+# whether to account the resources of each test call
+_resources_enabled = False
+# mapping of nodeid to the resource usage of its call, gathered from the
+# report ws_properties like _figure_counts
+_resource_usage = {}
+
+
+# profile files written by --ws-profile, gathered from the report
+# ws_properties like _figure_counts
+_profile_fnames = []
+# merged --ws-profile stats, set at the end of the session
+_profile_stats = None
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    if (
+        not _resources_enabled
+        and not profiling.profile_enabled()
+        and not getattr(item, "ws_call_checks", None)
+    ):
+        yield
+        return
+    if _resources_enabled:
+        before = resources.snapshot()
+    prof = None
+    if profiling.profile_enabled():
+        prof = profiling.profiler_enable()
+    outcome = yield
+    # before the profile is written, so that its I/O is not counted
+    if _resources_enabled:
+        wield.pytest.utilities.node_property(
+            item, "ws_resources", resources.usage(before, resources.snapshot())
+        )
+    if prof is not None:
+        # errors writing the profile must not replace the outcome of the test
+        try:
+            fnames = profiling.profiler_finish(item, prof)
+        except Exception as E:
+            import warnings
+            warnings.warn("Could not write the profile of {}: {!r}".format(item.nodeid, E))
+        else:
+            wield.pytest.utilities.node_property(item, "ws_profile", fnames)
+
+    # the checks of fixtures fail the test itself, rather than erroring in
+    # the teardown of the fixture after the test was reported as passed
+    msgs = wield.pytest.utilities.call_checks_run(item)
+    if msgs and outcome.excinfo is None:
+        outcome.force_exception(pytest.fail.Exception("\n".join(msgs), pytrace=False))
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    # the internal data of the test goes on the report rather than into the
+    # user_properties, which --junitxml writes out
+    outcome = yield
+    props = getattr(item, "ws_properties", None)
+    if props:
+        outcome.get_result().ws_properties = dict(props)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_report_to_serializable(config, report):
+    outcome = yield
+    data = outcome.get_result()
+    if data is not None and hasattr(report, "ws_properties"):
+        data["ws_properties"] = report.ws_properties
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_report_from_serializable(config, data):
+    outcome = yield
+    report = outcome.get_result()
+    if report is not None and "ws_properties" in data:
+        report.ws_properties = data["ws_properties"]
+
+
+# writer of the capture.txt files, which uses a background thread unless
+# --ws-capture-sync is given
+_capture_writer = None
+_capture_async = True
+
+
 @pytest.hookimpl(hookwrapper=True)
 def pytest_runtest_logreport(report):
     """Stores captured report output by coordinating with the "capture" fixture
 
     """
     yield
+    if _duration_recorder is not None:
+        _duration_recorder.logreport(report)
+    if _impact_recorder is not None:
+        _impact_recorder.logreport(report)
+
+    props = wield.pytest.utilities.report_properties(report)
+    if report.when == 'teardown':
+        if "ws_figures" in props:
+            _figure_counts[report.nodeid] = props["ws_figures"]
+        if "ws_largemem_queued" in props:
+            _largemem_queued[report.nodeid] = props["ws_largemem_queued"]
+
     if report.when == 'call':
-        # print("HOOKWRAP", report.nodeid, wield.pytest.fixtures._node_capture)
-        if wield.pytest.fixtures._node_capture is not None:
-            nodeid_from, location_from = wield.pytest.fixtures._node_capture
-            if report.nodeid == nodeid_from:
-                # text = report.longreprtext or report.full_text
-
-                # make sure the folder exists
-                os.makedirs(os.path.split(location_from)[0], exist_ok=True)
-
-                # write the log content
-                with open(location_from, "w") as F:
-                    F.write('status: {}\n'.format(report.outcome))
-                    F.write('duration: {:.3f}s\n'.format(report.duration))
-
-                    for section in report.sections:
-                        header, content = section
-                        F.write(header)
-                        F.write('\n')
-                        F.write(content)
-                    # testing
-                    # longreprtext is only filled out on failure by pytest
-                    #    otherwise will be None.
-                    #  Use full_text if longreprtext is None-ish
-                    #   we added full_text elsewhere in this file.
-                    text = report.longreprtext
-                    if text:
-                        F.write('captured errors:\n')
-                        F.write(text)
+        use = resources.report_usage(report)
+        if use is not None:
+            _resource_usage[report.nodeid] = dict(use, duration=report.duration)
+        _profile_fnames.extend(props.get("ws_profile", []))
+
+        # print("HOOKWRAP", report.nodeid, wield.pytest.fixtures._node_captures)
+        # only nodes that registered through the capture fixture in this
+        # process are written. With xdist, that is the worker running the test.
+        location_from = wield.pytest.fixtures.node_capture_pop(report.nodeid)
+        if location_from is not None:
+            text = capture_writer.capture_text(report)
+            if report.failed or not _capture_async:
+                # failures are flushed immediately so that nothing is lost if
+                # the run crashes
+                _capture_writer.write(location_from, text)
+            else:
+                _capture_writer.submit(location_from, text)
+    elif report.when == 'teardown':
+        # drop the registration of tests that never reached the call phase
+        wield.pytest.fixtures.node_capture_pop(report.nodeid)
     # print("================== report A ====================")
-    # print(report.when, report.nodeid, wield.pytest.fixtures._node_capture)
+    # print(report.when, report.nodeid, wield.pytest.fixtures._node_captures)
     # print("================== report B ====================")
     # print(report.sections)
     # print("================== report C ====================")
@@ -135,14 +523,171 @@ def pytest_configure(config):
             config.option.collectonly = True
             config.option.htmlpath = ""
             pass
+        global _collected_items
+        _collected_items = []
+        if config.option.ws_co_cache:
+            global _collection_cache
+            _collection_cache = collection.CollectionCache(collection.collection_path(config), config.rootpath)
 
     config.addinivalue_line(
         "markers", "ws_slow: mark test as slow (deselect with --ws-skip-slow)"
     )
     config.addinivalue_line(
-        "markers", "largemem: mark test as using a lot of memory"
+        "markers", "largemem(gb=None): mark test as using a lot of memory, limiting how many run at once"
+    )
+    config.addinivalue_line(
+        "markers", "ws_perf(tolerance=None): compare the ws_benchmark results of the test against their stored baseline"
     )
     config.addinivalue_line(
         "usefixtures", "current_pytest_request"
     )
 
+    global _duration_recorder
+    # xdist workers forward their reports to the controller, which records them
+    if config.option.ws_durations and not config.option.collectonly and not hasattr(config, "workerinput"):
+        _duration_recorder = durations.DurationRecorder(durations.durations_path(config))
+
+    global _impact_recorder
+    if config.option.ws_impact and not config.option.collectonly and not hasattr(config, "workerinput"):
+        _impact_recorder = impact.ImpactRecorder(config)
+
+    if not config.option.collectonly:
+        perf.perf_configure(config)
+
+    global _capture_writer, _capture_async
+    _capture_writer = capture_writer.CaptureWriter()
+    _capture_async = not config.option.ws_capture_sync
+
+    global _resources_enabled
+    _resources_enabled = config.option.ws_resources and not config.option.collectonly
+    if not config.option.collectonly:
+        profiling.profile_start(config)
+
+    if config.option.ws_preclear_trash and not config.option.collectonly:
+        trash.trash_start(config)
+
+    global _largemem_semaphore
+    if config.option.ws_largemem and not config.option.collectonly:
+        _largemem_semaphore = largemem.semaphore_make(config)
+
+    if not config.option.collectonly:
+        render.render_start(config)
+        triggers.trigger_start(config)
+
+    if config.option.ws_artifacts and not config.option.collectonly:
+        artifacts.artifacts_start(config)
+
+    # the workers start after the controller configures, so it clears for them
+    if config.option.ws_cache_clear and not hasattr(config, "workerinput"):
+        fixture_cache.cache_clear(config)
+
+
+def pytest_unconfigure(config):
+    from wield.pytest import pytest_unconfigure
+    pytest_unconfigure(config)
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    if _artifacts_manifest is not None:
+        terminalreporter.write_line(
+            "artifacts: {} changed, {} removed, {} unchanged, see test_results/{}".format(
+                len(_artifacts_manifest["changed"]),
+                len(_artifacts_manifest["removed"]),
+                _artifacts_manifest["unchanged"],
+                artifacts.MANIFEST_FNAME,
+            )
+        )
+
+    if _budget_summary is not None:
+        terminalreporter.write_sep("=", "tests selected by --ws-time-budget")
+        for line in _budget_summary:
+            terminalreporter.write_line(line)
+
+    if _slow_report:
+        terminalreporter.write_sep("=", "ws_slow marks disagreeing with the durations")
+        for line in _slow_report:
+            terminalreporter.write_line(line)
+
+    if _largemem_queued:
+        terminalreporter.write_sep("=", "largemem tests queued for memory")
+        for nodeid, waited in sorted(_largemem_queued.items(), key=lambda kv: -kv[1])[:10]:
+            terminalreporter.write_line("{:8.2f}s  {}".format(waited, nodeid))
+        terminalreporter.write_line(
+            "{:.2f}s queued in total by {} tests".format(sum(_largemem_queued.values()), len(_largemem_queued))
+        )
+
+    Nreport = config.option.ws_resource_report
+    if _resource_usage and Nreport:
+        terminalreporter.write_sep("=", "tests using the most CPU time")
+        for line in resources.table_lines(_resource_usage, N=Nreport):
+            terminalreporter.write_line(line)
+
+    if _profile_stats is not None:
+        terminalreporter.write_sep("=", "hottest functions of --ws-profile, see test_results/{}".format(profiling.PROF_FNAME))
+        for line in profiling.hottest_lines(_profile_stats):
+            terminalreporter.write_line(line)
+
+    Nreport = config.option.ws_figure_report
+    if not _figure_counts or not Nreport:
+        return
+    heaviest = sorted(_figure_counts.items(), key=lambda kv: -kv[1])[:Nreport]
+    terminalreporter.write_sep("=", "tests leaving the most matplotlib figures open")
+    for nodeid, Nfigs in heaviest:
+        terminalreporter.write_line("{:5d}  {}".format(Nfigs, nodeid))
+    terminalreporter.write_line(
+        "{} figures left open by {} tests".format(sum(_figure_counts.values()), len(_figure_counts))
+    )
+
+
+def pytest_sessionfinish(session, exitstatus):
+    global _capture_writer
+    if _capture_writer is not None:
+        # drain the background writer
+        errors = _capture_writer.close()
+        _capture_writer = None
+        if errors:
+            import warnings
+            for fname, E in errors:
+                warnings.warn("Could not write capture file {}: {}".format(fname, E))
+
+    # after the capture files are written, as these append to them
+    errors = triggers.trigger_finish()
+    if errors:
+        import warnings
+        for nodeid, capture_fname, name, did_fail, duration, err in errors:
+            warnings.warn("test_trigger call {} of {} raised, see {}".format(name, nodeid, capture_fname))
+
+    failures = render.render_finish()
+    if failures:
+        import warnings
+        for nodeid, capture_fname, fnames, err in failures:
+            warnings.warn("Could not render {} for {}".format(", ".join(fnames), nodeid))
+
+    global _duration_recorder
+    if _duration_recorder is not None:
+        _duration_recorder.close()
+        _duration_recorder = None
+
+    global _impact_recorder
+    if _impact_recorder is not None:
+        _impact_recorder.close()
+        _impact_recorder = None
+
+    trash.trash_finish()
+
+    if not session.config.option.collectonly and not hasattr(session.config, "workerinput"):
+        perf.perf_finish(session.config)
+
+    if _resource_usage and not hasattr(session.config, "workerinput"):
+        resources.save(resources.resources_path(session.config), _resource_usage)
+
+    global _profile_stats
+    if _profile_fnames and not hasattr(session.config, "workerinput"):
+        _profile_stats = profiling.merge(session.config.rootpath, _profile_fnames)
+
+    # xdist workers are done by the time the controller finishes, so it pools
+    # all of their outputs
+    global _artifacts_manifest
+    if artifacts.artifacts_enabled() and not hasattr(session.config, "workerinput"):
+        _artifacts_manifest = artifacts.artifacts_finish(session.config)
+
@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+Per-test profiling of the call phase, for --ws-profile.
+
+The --ws-profile-mode deterministic, the default, runs cProfile over the call
+and writes its profile.prof into the tpath of the test. sampling instead takes
+a stack sample of the main thread on every SIGPROF of an interval timer
+(signal.setitimer), which costs little enough to leave on for nightly runs. It
+writes the samples both as profile.prof, with the sample counts in place of
+call counts and the CPU time split evenly between the samples, and as
+profile.collapsed, the collapsed stacks read by flamegraph tools. The timer counts CPU time, so time spent sleeping
+or waiting on I/O is not sampled. cProfile only records callers, so the
+deterministic mode writes no collapsed stacks.
+
+At the end of the session, the profiles are merged into
+test_results/profile.prof (and profile.collapsed) and the hottest functions
+of the whole suite are reported.
+"""
+import os
+import sys
+import time
+import signal
+import threading
+import collections
+import pstats
+
+from . import utilities
+
+# Windows has no interval timers
+_setitimer = getattr(signal, "setitimer", None)
+
+
+PROFILE_MODES = ["deterministic", "sampling"]
+PROF_FNAME = "profile.prof"
+COLLAPSED_FNAME = "profile.collapsed"
+# seconds of CPU time between samples
+SAMPLE_INTERVAL = 0.005
+
+
+def _func_key(code):
+    return (code.co_filename, code.co_firstlineno, getattr(code, "co_qualname", code.co_name))
+
+
+class SamplingProfiler(object):
+    """
+    Samples the stack of the main thread on SIGPROF. The stacks are trimmed
+    at the frames that were running when the profiler started, so that they
+    start at the calls made after it. Each sample stands for an equal share
+    of the CPU time of the process while enabled, as the kernel may deliver
+    fewer signals than the interval asks for.
+
+    It provides create_stats and stats, so that pstats.Stats can read it as
+    it would a cProfile.Profile.
+    """
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.base_frames = frozenset()
+        self.cpu_time = 0
+        self._cpu_start = 0
+        # mapping of stacks of code objects, from the root, to their counts
+        self.samples = collections.Counter()
+        # module names of the code objects
+        self.modules = {}
+        self._handler_prev = None
+        self.stats = {}
+
+    def _handler(self, signum, frame):
+        stack = []
+        while frame is not None and frame not in self.base_frames:
+            code = frame.f_code
+            if code not in self.modules:
+                self.modules[code] = frame.f_globals.get("__name__", "?")
+            stack.append(code)
+            frame = frame.f_back
+        self.samples[tuple(stack[::-1])] += 1
+
+    def enable(self):
+        base_frames = []
+        frame = sys._getframe()
+        while frame is not None:
+            base_frames.append(frame)
+            frame = frame.f_back
+        self.base_frames = frozenset(base_frames)
+        self._handler_prev = signal.signal(signal.SIGPROF, self._handler)
+        self._cpu_start = time.process_time()
+        _setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def disable(self):
+        _setitimer(signal.ITIMER_PROF, 0, 0)
+        self.cpu_time += time.process_time() - self._cpu_start
+        signal.signal(signal.SIGPROF, self._handler_prev)
+        self.base_frames = frozenset()
+
+    def create_stats(self):
+        """
+        Convert the samples into the pstats format, with samples as calls
+        """
+        # func: [samples, self samples, {caller: samples}]
+        funcs = {}
+        for stack, count in self.samples.items():
+            keys = [_func_key(code) for code in stack]
+            for idx, key in enumerate(keys):
+                rec = funcs.setdefault(key, [0, 0, collections.Counter()])
+                # recursive functions count once per sample
+                if key not in keys[:idx]:
+                    rec[0] += count
+                if idx > 0:
+                    rec[2][keys[idx - 1]] += count
+            if keys:
+                funcs[keys[-1]][1] += count
+
+        Nsamples_total = sum(self.samples.values())
+        if Nsamples_total:
+            dt = self.cpu_time / Nsamples_total
+        else:
+            dt = self.interval
+        self.stats = {}
+        for key, (Nsamples, Nself, callers) in funcs.items():
+            self.stats[key] = (
+                Nsamples, Nsamples, Nself * dt, Nsamples * dt,
+                {caller: (N, N, 0, N * dt) for caller, N in callers.items()},
+            )
+
+    def dump_stats(self, fname):
+        pstats.Stats(self).dump_stats(fname)
+
+    def collapsed(self):
+        """
+        The samples as collapsed stacks, mapping "frame;frame;..." to counts
+        """
+        stacks = collections.Counter()
+        for stack, count in self.samples.items():
+            if not stack:
+                continue
+            frames = ";".join(
+                "{}:{}".format(self.modules[code], _func_key(code)[2]) for code in stack
+            )
+            stacks[frames] += count
+        return stacks
+
+
+def write_collapsed(fname, stacks):
+    with open(fname, "w") as F:
+        for frames, count in sorted(stacks.items()):
+            F.write("{} {}\n".format(frames, count))
+
+
+def read_collapsed(fname):
+    stacks = collections.Counter()
+    with open(fname, "r") as F:
+        for line in F:
+            frames, _, count = line.rstrip("\n").rpartition(" ")
+            if frames:
+                stacks[frames] += int(count)
+    return stacks
+
+
+# the profiling mode of the session, or None
+_profile_mode = None
+
+
+def profile_start(config):
+    global _profile_mode
+    if not config.getoption("ws_profile", default=False):
+        _profile_mode = None
+        return
+    _profile_mode = config.getoption("ws_profile_mode", default="deterministic")
+    if _profile_mode == "sampling" and _setitimer is None:
+        import warnings
+        warnings.warn("--ws-profile-mode=sampling needs signal.setitimer, profiling is disabled")
+        _profile_mode = None
+
+
+def profile_enabled():
+    return _profile_mode is not None
+
+
+def profiler_enable():
+    """
+    Start the profiler of a test call, returning None if the profiler could
+    not be started
+    """
+    if _profile_mode == "sampling":
+        # signal handlers can only be set in the main thread
+        if threading.current_thread() is not threading.main_thread():
+            return None
+        prof = SamplingProfiler()
+        prof.enable()
+        return prof
+    import cProfile
+    prof = cProfile.Profile()
+    try:
+        prof.enable()
+    except ValueError:
+        # another profiler (or a debugger) is active
+        return None
+    return prof
+
+
+def profiler_finish(item, prof):
+    """
+    Stop the profiler and write its output into the tpath of the item.
+    Returns the list of files written.
+    """
+    prof.disable()
+    if isinstance(prof, SamplingProfiler) and not prof.samples:
+        # too quick to be sampled, and pstats refuses empty profiles
+        return []
+    try:
+        tpath_root, tpath_local = utilities.tpath_node_make(item)
+    except RuntimeError:
+        return []
+    utilities.tpath_setup(tpath_root, tpath_local)
+    fnames = [utilities.tpath_file(tpath_root, PROF_FNAME)]
+    prof.dump_stats(fnames[0])
+    if isinstance(prof, SamplingProfiler):
+        fnames.append(utilities.tpath_file(tpath_root, COLLAPSED_FNAME))
+        write_collapsed(fnames[1], prof.collapsed())
+    return fnames
+
+
+def merge(rootpath, fnames):
+    """
+    Merge the per-test profiles into test_results. Returns the merged
+    pstats.Stats, or None if there were none.
+    """
+    profs = [fname for fname in fnames if fname.endswith(PROF_FNAME) and os.path.exists(fname)]
+    if not profs:
+        return None
+    stats = pstats.Stats(profs[0], stream=sys.stderr)
+    for fname in profs[1:]:
+        stats.add(fname)
+    fdir = os.path.join(str(rootpath), "test_results")
+    os.makedirs(fdir, exist_ok=True)
+    stats.dump_stats(os.path.join(fdir, PROF_FNAME))
+
+    stacks = collections.Counter()
+    for fname in fnames:
+        if fname.endswith(COLLAPSED_FNAME) and os.path.exists(fname):
+            stacks.update(read_collapsed(fname))
+    if stacks:
+        write_collapsed(os.path.join(fdir, COLLAPSED_FNAME), stacks)
+    return stats
+
+
+def hottest_lines(stats, N=15):
+    """
+    Terminal table of the functions with the most time in themselves
+    """
+    if _profile_mode == "sampling":
+        calls = "samples"
+    else:
+        calls = "calls"
+    lines = ["{:>9s} {:>9s} {:>9s}  {}".format("self", "cumul", calls, "function")]
+    hottest = sorted(stats.stats.items(), key=lambda kv: -kv[1][2])[:N]
+    for (fname, lineno, func), (cc, nc, tt, ct, callers) in hottest:
+        lines.append("{:8.3f}s {:8.3f}s {:9d}  {} ({}:{})".format(
+            tt, ct, nc, func, os.path.basename(fname), lineno,
+        ))
+    return lines
@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+Background figure rendering, used by the ws_render fixture.
+
+Encoding PNG and PDF files in savefig often costs more than the numerics of a
+test. Tests instead hand a figure, or a picklable recipe that builds one, to a
+process pool that saves it while the test continues. The session waits for
+all renders at its end, and render failures are appended to the capture.txt
+of the test that submitted them.
+"""
+import os
+import sys
+import pickle
+import traceback
+import multiprocessing
+import concurrent.futures
+
+
+def _render_init():
+    import matplotlib
+    matplotlib.use('agg')
+
+
+def _render(kind, payload, fnames, savefig_kwargs):
+    """
+    Build and save a figure, returning None or the traceback text of the
+    failure. Runs in the pool processes.
+    """
+    try:
+        if kind == 'figure':
+            fig = pickle.loads(payload)
+        elif kind == 'inline':
+            fig = payload
+        else:
+            func, args, kwargs = payload
+            fig = func(*args, **kwargs)
+        for fname in fnames:
+            fig.savefig(fname, **savefig_kwargs)
+        import matplotlib.pyplot as plt
+        plt.close(fig)
+    except Exception:
+        return traceback.format_exc()
+    return None
+
+
+class RenderPool(object):
+    """
+    Pool of render processes, started on the first submission.
+
+    workers: the number of processes, or 0 to render inline in the test
+    """
+    def __init__(self, workers=1):
+        self.workers = workers
+        self.executor = None
+        # list of (future, nodeid, capture_fname, fnames)
+        self.pending = []
+        # list of (nodeid, capture_fname, fnames, traceback text)
+        self.failures = []
+
+    def _submit(self, nodeid, capture_fname, kind, payload, fnames, savefig_kwargs):
+        if isinstance(fnames, (str, os.PathLike)):
+            fnames = [fnames]
+        fnames = [str(fname) for fname in fnames]
+        if self.workers == 0:
+            err = _render(kind, payload, fnames, savefig_kwargs)
+            if err is not None:
+                self.failures.append((nodeid, capture_fname, fnames, err))
+            return
+        if self.executor is None:
+            self.executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.workers,
+                # forking a process running threads (such as the capture
+                # writer) is unsafe
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_render_init,
+            )
+        future = self.executor.submit(_render, kind, payload, fnames, savefig_kwargs)
+        self.pending.append((future, nodeid, capture_fname, fnames))
+        return
+
+    def savefig(self, nodeid, capture_fname, fig, fnames, **savefig_kwargs):
+        """
+        Save a figure in the pool. The figure is pickled and closed here.
+        """
+        if self.workers == 0:
+            self._submit(nodeid, capture_fname, 'inline', fig, fnames, savefig_kwargs)
+        else:
+            payload = pickle.dumps(fig)
+            plt = sys.modules.get("matplotlib.pyplot", None)
+            if plt is not None:
+                plt.close(fig)
+            self._submit(nodeid, capture_fname, 'figure', payload, fnames, savefig_kwargs)
+
+    def submit(self, nodeid, capture_fname, fnames, func, args=(), kwargs={}, savefig_kwargs={}):
+        """
+        Build a figure with func(*args, **kwargs) in the pool and save it. The
+        function and its arguments must be picklable.
+        """
+        self._submit(nodeid, capture_fname, 'recipe', (func, args, kwargs), fnames, savefig_kwargs)
+
+    def wait(self):
+        """
+        Wait for all of the renders. Returns the list of failures, as
+        (nodeid, capture_fname, fnames, traceback text).
+        """
+        for future, nodeid, capture_fname, fnames in self.pending:
+            try:
+                err = future.result()
+            except Exception:
+                # e.g. the worker process died
+                err = traceback.format_exc()
+            if err is not None:
+                self.failures.append((nodeid, capture_fname, fnames, err))
+        self.pending = []
+        return self.failures
+
+    def close(self):
+        failures = self.wait()
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        return failures
+
+
+def report_failures(failures):
+    """
+    Append the render failures to the capture files of their tests
+    """
+    for nodeid, capture_fname, fnames, err in failures:
+        os.makedirs(os.path.split(capture_fname)[0], exist_ok=True)
+        with open(capture_fname, "a") as F:
+            F.write("render failed: {}\n".format(", ".join(fnames)))
+            F.write(err)
+
+
+class RenderClient(object):
+    """
+    The interface of the ws_render fixture, bound to a test
+    """
+    def __init__(self, pool, nodeid, capture_fname):
+        self.pool = pool
+        self.nodeid = nodeid
+        self.capture_fname = capture_fname
+
+    def savefig(self, fig, fnames, **savefig_kwargs):
+        """
+        Save fig into the file or list of files fnames in the background.
+        The figure is closed in the test.
+        """
+        self.pool.savefig(self.nodeid, self.capture_fname, fig, fnames, **savefig_kwargs)
+
+    def submit(self, fnames, func, *args, **kwargs):
+        """
+        Call func(*args, **kwargs) in the background, and save the figure it
+        returns into the file or list of files fnames.
+        """
+        self.pool.submit(self.nodeid, self.capture_fname, fnames, func, args, kwargs)
+
+
+# the render pool of the session
+_render_pool = None
+
+
+def render_start(config):
+    global _render_pool
+    workers = config.getoption("ws_render_workers", default=None)
+    if workers is None:
+        if hasattr(config, "workerinput"):
+            # xdist already runs a process per core
+            workers = 1
+        else:
+            workers = min(4, os.cpu_count() or 1)
+    _render_pool = RenderPool(workers=workers)
+    return
+
+
+def render_pool():
+    """
+    The session render pool, or an inline one outside of the plugin
+    """
+    global _render_pool
+    if _render_pool is None:
+        _render_pool = RenderPool(workers=0)
+    return _render_pool
+
+
+def render_finish():
+    """
+    Wait for the renders and report their failures. Returns the failures.
+    """
+    global _render_pool
+    if _render_pool is None:
+        return []
+    failures = _render_pool.close()
+    _render_pool = None
+    report_failures(failures)
+    return failures
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+Resource accounting of the call phase of each test.
+
+The usage is the difference of getrusage and /proc/self/io around the call:
+CPU user and system time, the growth of the peak RSS (so 0 for tests staying
+under the peak of an earlier test in the same process), the voluntary and
+involuntary context switches, and the bytes read from and written to storage.
+It covers all of the threads of the test process but not its subprocesses.
+Fields that the platform does not provide are left out.
+
+The usage goes into the capture.txt of each test and, through the report
+ws_properties, into test_results/resources.json on the controller.
+"""
+import os
+import sys
+import json
+
+try:
+    import resource
+except ImportError:
+    # Windows
+    resource = None
+
+
+RESOURCES_FNAME = "resources.json"
+# ru_maxrss is in bytes on macOS and in kB elsewhere
+_MAXRSS_SCALE = 1 if sys.platform == "darwin" else 1024
+
+
+def resources_path(config):
+    return os.path.join(str(config.rootpath), "test_results", RESOURCES_FNAME)
+
+
+def _proc_io():
+    try:
+        with open("/proc/self/io", "r") as F:
+            fields = dict(line.split(":") for line in F if ":" in line)
+        return {
+            "read_bytes": int(fields["read_bytes"]),
+            "write_bytes": int(fields["write_bytes"]),
+        }
+    except (OSError, KeyError, ValueError):
+        return {}
+
+
+def snapshot():
+    """
+    The cumulative resource usage of the process
+    """
+    snap = {}
+    if resource is not None:
+        ru = resource.getrusage(resource.RUSAGE_SELF)
+        snap.update(
+            user=ru.ru_utime,
+            system=ru.ru_stime,
+            maxrss=ru.ru_maxrss * _MAXRSS_SCALE,
+            nvcsw=ru.ru_nvcsw,
+            nivcsw=ru.ru_nivcsw,
+        )
+    snap.update(_proc_io())
+    return snap
+
+
+def usage(before, after):
+    """
+    The usage between two snapshots
+    """
+    return {key: after[key] - before[key] for key in after if key in before}
+
+
+def _mb(nbytes):
+    return "{:.1f}MB".format(nbytes / 1024 ** 2)
+
+
+def usage_text(use):
+    """
+    Format the usage for capture.txt
+    """
+    outs = []
+    if "user" in use:
+        outs.append("cpu: {:.3f}s user, {:.3f}s system\n".format(use["user"], use["system"]))
+        outs.append("maxrss growth: {}\n".format(_mb(use["maxrss"])))
+        outs.append("context switches: {} voluntary, {} involuntary\n".format(use["nvcsw"], use["nivcsw"]))
+    if "read_bytes" in use:
+        outs.append("io: {} read, {} written\n".format(_mb(use["read_bytes"]), _mb(use["write_bytes"])))
+    return "".join(outs)
+
+
+def report_usage(report):
+    """
+    The usage recorded in the ws_properties of a call report, or None
+    """
+    return getattr(report, "ws_properties", {}).get("ws_resources", None)
+
+
+def save(fname, usages):
+    """
+    Write the usages, mapping nodeid to usage, with their totals
+    """
+    totals = {}
+    for use in usages.values():
+        for key, value in use.items():
+            totals[key] = totals.get(key, 0) + value
+    os.makedirs(os.path.split(fname)[0], exist_ok=True)
+    fname_tmp = fname + ".tmp{}".format(os.getpid())
+    with open(fname_tmp, "w") as F:
+        json.dump(dict(tests=usages, totals=totals), F, indent=1, sort_keys=True)
+    os.replace(fname_tmp, fname)
+
+
+def cpu_time(use):
+    return use.get("user", 0) + use.get("system", 0)
+
+
+def table_lines(usages, N=10):
+    """
+    Terminal table of the N tests using the most CPU time. The cpu% column
+    is the CPU time over the call duration, low for tests waiting on I/O and
+    above 100% for multithreaded tests.
+    """
+    lines = ["{:>8s} {:>8s} {:>6s} {:>10s} {:>10s} {:>10s}  {}".format(
+        "wall", "cpu", "cpu%", "maxrss+", "read", "written", "test"
+    )]
+    heaviest = sorted(usages.items(), key=lambda kv: -cpu_time(kv[1]))[:N]
+    for nodeid, use in heaviest:
+        wall = use.get("duration", 0)
+        cpu = cpu_time(use)
+        lines.append("{:7.2f}s {:7.2f}s {:5.0f}% {:>10s} {:>10s} {:>10s}  {}".format(
+            wall, cpu, 100 * cpu / wall if wall > 0 else 0,
+            _mb(use.get("maxrss", 0)), _mb(use.get("read_bytes", 0)), _mb(use.get("write_bytes", 0)),
+            nodeid,
+        ))
+    return lines
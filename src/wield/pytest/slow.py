@@ -0,0 +1,248 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+Classification of ws_slow tests from their measured durations, for
+--ws-slow-threshold.
+
+The threshold is either a duration ("10s", "2m") or a percentile of the
+measured durations ("p95"). Tests with history are slow when their duration
+reaches the threshold, regardless of a ws_slow mark, and the marker is added
+to the measured slow tests that lack it. The durations come from the most
+recent runs that were not skipped, so that tests skipped by --ws-skip-slow
+stay classified as slow. Tests that never ran keep their manual mark.
+
+The tests whose manual mark disagrees with the measurements are reported, and
+
+    python -m wield.pytest.slow rewrite --threshold 10s
+
+adds or removes the @pytest.mark.ws_slow decorators in the source to match.
+"""
+import os
+import re
+import ast
+import math
+import sys
+
+from . import budget
+from . import durations
+
+
+def load(fname):
+    """
+    The durations database without the records of skipped runs
+    """
+    return durations.load(fname, skipped=False)
+
+
+def measured(stats):
+    """
+    The durations of the tests that ran on their last run
+    """
+    return {
+        nodeid: stat["duration"]
+        for nodeid, stat in stats.items()
+        if stat["outcome"] != "skipped"
+    }
+
+
+def threshold_option(text):
+    """
+    The argparse type of --ws-slow-threshold, checking its form at parse time.
+    The percentiles are resolved later by parse_threshold.
+    """
+    import argparse
+    if re.match(r"^\s*p([0-9.]+)\s*$", text) is not None:
+        return text
+    try:
+        budget.parse_duration(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            "expected a duration such as 10s or a percentile such as p95, not {!r}".format(text)
+        )
+    return text
+
+
+def parse_threshold(text, stats):
+    """
+    The threshold in seconds, from a duration or a "pNN" percentile of the
+    measured durations. Returns None for a percentile without history.
+    """
+    m = re.match(r"^\s*p([0-9.]+)\s*$", text)
+    if m is None:
+        return budget.parse_duration(text)
+    values = sorted(measured(stats).values())
+    if not values:
+        return None
+    pct = float(m.group(1))
+    idx = max(int(math.ceil(pct / 100 * len(values))) - 1, 0)
+    return values[min(idx, len(values) - 1)]
+
+
+def classify(items, stats, threshold):
+    """
+    Returns (slow, marked_fast, unmarked_slow). slow is the set of nodeids to
+    treat as ws_slow, and the others list the (nodeid, duration) of the
+    disagreeing tests. The parametrizations of a function share the duration
+    of the longest, as they share its decorators.
+    """
+    func_durs = function_durations(stats)
+    slow = set()
+    marked_fast = []
+    unmarked_slow = []
+    for item in items:
+        marked = item.get_closest_marker("ws_slow") is not None
+        dur = func_durs.get(function_key(item.nodeid), None)
+        if dur is None:
+            if marked:
+                slow.add(item.nodeid)
+            continue
+        if dur >= threshold:
+            slow.add(item.nodeid)
+            if not marked:
+                unmarked_slow.append((item.nodeid, dur))
+        elif marked:
+            marked_fast.append((item.nodeid, dur))
+    return slow, marked_fast, unmarked_slow
+
+
+def report_lines(threshold, marked_fast, unmarked_slow, N=10):
+    """
+    Terminal summary of the disagreements
+    """
+    lines = []
+    for title, recs in [
+        ("marked ws_slow but measured under {:.2f}s".format(threshold), marked_fast),
+        ("measured over {:.2f}s but not marked ws_slow".format(threshold), unmarked_slow),
+    ]:
+        if not recs:
+            continue
+        lines.append("{} ({} tests):".format(title, len(recs)))
+        for nodeid, dur in sorted(recs, key=lambda rec: -rec[1])[:N]:
+            lines.append("  {:8.2f}s  {}".format(dur, nodeid))
+        if len(recs) > N:
+            lines.append("  ... and {} more".format(len(recs) - N))
+    if lines:
+        lines.append("run python -m wield.pytest.slow rewrite to update the decorators")
+    return lines
+
+
+def function_key(nodeid):
+    """
+    The (module, qualname) of the test function of a nodeid
+    """
+    parts = nodeid.split("::")
+    return (parts[0], ".".join(parts[1:]).split("[")[0])
+
+
+def function_durations(stats):
+    """
+    Map (module, qualname) to the longest measured duration of its tests,
+    combining the parametrizations
+    """
+    funcs = {}
+    for nodeid, dur in measured(stats).items():
+        key = function_key(nodeid)
+        funcs[key] = max(funcs.get(key, 0), dur)
+    return funcs
+
+
+def _is_ws_slow(node):
+    return isinstance(node, ast.Attribute) and node.attr == "ws_slow"
+
+
+def _iter_functions(body, prefix=""):
+    for node in body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            yield prefix + node.name, node
+        elif isinstance(node, ast.ClassDef):
+            yield from _iter_functions(node.body, prefix + node.name + ".")
+
+
+def rewrite_source(text, func_durs, threshold):
+    """
+    Add or remove the ws_slow decorators of the functions in func_durs, mapping
+    qualname to duration. Returns the new text and a list of (qualname, action).
+    """
+    lines = text.splitlines(True)
+    edits = []
+    for qualname, node in _iter_functions(ast.parse(text).body):
+        dur = func_durs.get(qualname, None)
+        if dur is None:
+            continue
+        marks = [deco for deco in node.decorator_list if _is_ws_slow(deco)]
+        if dur >= threshold and not marks:
+            lineno = min([deco.lineno for deco in node.decorator_list] + [node.lineno])
+            indent = " " * node.col_offset
+            edits.append((lineno - 1, 0, indent + "@pytest.mark.ws_slow\n", qualname, "marked"))
+        elif dur < threshold:
+            for deco in marks:
+                # only decorators on lines of their own
+                if deco.lineno == deco.end_lineno and lines[deco.lineno - 1].strip().startswith("@"):
+                    edits.append((deco.lineno - 1, 1, "", qualname, "unmarked"))
+    # from the bottom, so the line numbers stay valid
+    actions = []
+    for idx, Nremove, insert, qualname, action in sorted(edits, key=lambda e: -e[0]):
+        lines[idx:idx + Nremove] = [insert] if insert else []
+        actions.append((qualname, action))
+    return "".join(lines), actions[::-1]
+
+
+def rewrite(rootpath, stats, threshold, dry_run=False):
+    """
+    Rewrite the ws_slow decorators of the test modules in stats. Returns a
+    list of (module, qualname, action).
+    """
+    by_module = {}
+    for (mod, qualname), dur in function_durations(stats).items():
+        by_module.setdefault(mod, {})[qualname] = dur
+
+    results = []
+    for mod, func_durs in sorted(by_module.items()):
+        fpath = os.path.join(str(rootpath), mod)
+        try:
+            with open(fpath, "r") as F:
+                text = F.read()
+        except OSError:
+            continue
+        text_new, actions = rewrite_source(text, func_durs, threshold)
+        if not actions:
+            continue
+        if any(action == "marked" for qualname, action in actions):
+            if not re.search(r"^import pytest\b", text_new, re.MULTILINE):
+                results.append((mod, None, "skipped, no pytest import"))
+                continue
+        results.extend((mod, qualname, action) for qualname, action in actions)
+        if not dry_run:
+            with open(fpath, "w") as F:
+                F.write(text_new)
+    return results
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(
+        description='Update the ws_slow marks from the measured test durations'
+    )
+    parser.add_argument('--durations', default=os.path.join("test_results", durations.DURATIONS_FNAME), help='durations file')
+    parser.add_argument('--root', default='.', help='folder the nodeids are relative to')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    p_rewrite = subparsers.add_parser('rewrite', help='add and remove the @pytest.mark.ws_slow decorators')
+    p_rewrite.add_argument('--threshold', default='10s', help='duration such as 10s, or percentile such as p95')
+    p_rewrite.add_argument('--dry-run', action='store_true', help='only print the changes')
+    args = parser.parse_args()
+
+    stats = load(args.durations)
+    threshold = parse_threshold(args.threshold, stats)
+    if threshold is None:
+        print("no durations recorded in {}".format(args.durations), file=sys.stderr)
+        sys.exit(1)
+    for mod, qualname, action in rewrite(args.root, stats, threshold, dry_run=args.dry_run):
+        if qualname is None:
+            print("{}  {}".format(action, mod))
+        else:
+            print("{}  {}::{}".format(action, mod, qualname.replace(".", "::")))
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+"""
+import os
+import json
+
+from wield.pytest import artifacts
+
+
+def test_detach(tmp_path):
+    fdir = os.path.join(tmp_path, "test_x", "sub")
+    os.makedirs(fdir)
+    fpath = os.path.join(fdir, "out.txt")
+    fpath_link = os.path.join(tmp_path, "link.txt")
+    with open(fpath, "w") as F:
+        F.write("content")
+    os.link(fpath, fpath_link)
+
+    artifacts.detach(os.path.join(tmp_path, "test_x"))
+    for fname in [fpath, fpath_link]:
+        assert os.stat(fname).st_nlink == 1
+        with open(fname) as F:
+            assert F.read() == "content"
+    with open(fpath, "w") as F:
+        F.write("changed")
+    with open(fpath_link) as F:
+        assert F.read() == "content"
+
+
+def test_detach_file(tmp_path):
+    fpath = os.path.join(tmp_path, "out.txt")
+    fpath_link = os.path.join(tmp_path, "link.txt")
+    with open(fpath, "w") as F:
+        F.write("content")
+    artifacts.detach_file(fpath)
+    assert os.path.exists(fpath)
+
+    os.link(fpath, fpath_link)
+    artifacts.detach_file(fpath)
+    assert not os.path.exists(fpath)
+    with open(fpath_link) as F:
+        assert F.read() == "content"
+    artifacts.detach_file(fpath)
+
+
+TEST_ARTIFACTS = """
+import os
+from wield.pytest import tpath_join  # noqa
+
+def test_a(tpath_join):
+    with open(tpath_join("out.txt"), "w") as F:
+        F.write("same")
+
+def test_b(tpath_join):
+    with open(tpath_join("out.txt"), "w") as F:
+        F.write("same")
+
+def test_c(tpath_join):
+    value = os.environ["WS_TEST_VALUE"]
+    if value != "skip":
+        with open(tpath_join("out.txt"), "w") as F:
+            F.write(value)
+    else:
+        # sets up the folder without writing
+        tpath_join("other.txt")
+
+def test_d(tpath):
+    fpath = os.path.join(tpath, "out.txt")
+    if not os.path.exists(fpath):
+        with open(fpath, "w") as F:
+            F.write("d")
+"""
+
+
+def run_manifest(pytester, monkeypatch, value):
+    monkeypatch.setenv("WS_TEST_VALUE", value)
+    result = pytester.runpytest_subprocess("--ws-artifacts")
+    result.assert_outcomes(passed=4)
+    with open(os.path.join(pytester.path, "test_results", "artifacts_manifest.json")) as F:
+        manifest = json.load(F)
+    result.stdout.fnmatch_lines([
+        "artifacts: {} changed, {} removed, {} unchanged, see test_results/artifacts_manifest.json".format(
+            len(manifest["changed"]), len(manifest["removed"]), manifest["unchanged"]
+        )
+    ])
+    return manifest
+
+
+def test_artifacts(pytester, monkeypatch):
+    pytester.makepyfile(test_art=TEST_ARTIFACTS)
+    tdir = os.path.join(pytester.path, "test_results", "test_art.py")
+    fnames = {
+        test: os.path.join("test_art.py", test, "out.txt")
+        for test in ["test_a", "test_b", "test_c", "test_d"]
+    }
+
+    manifest = run_manifest(pytester, monkeypatch, "one")
+    assert manifest["changed"] == sorted(fnames.values())
+    assert manifest["deduplicated"] == 1
+    assert manifest["hashed"] == 4
+    st_a = os.stat(os.path.join(tdir, "test_a", "out.txt"))
+    st_b = os.stat(os.path.join(tdir, "test_b", "out.txt"))
+    assert st_a.st_ino == st_b.st_ino
+    # the pool entry, test_a and test_b
+    assert st_a.st_nlink == 3
+
+    manifest = run_manifest(pytester, monkeypatch, "two")
+    assert manifest["changed"] == [fnames["test_c"]]
+    assert manifest["removed"] == []
+    assert manifest["unchanged"] == 3
+    # only the files rewritten through tpath_join are hashed again, the
+    # detached copies of the tpath fixture are relinked from their stat
+    assert manifest["hashed"] == 3
+    assert os.stat(os.path.join(tdir, "test_d", "out.txt")).st_nlink == 2
+    with open(os.path.join(tdir, "test_c", "out.txt")) as F:
+        assert F.read() == "two"
+
+    # the outputs of the previous run survive the detaching
+    st_c = os.stat(os.path.join(tdir, "test_c", "out.txt"))
+    manifest = run_manifest(pytester, monkeypatch, "skip")
+    assert manifest["changed"] == []
+    assert manifest["removed"] == []
+    assert manifest["hashed"] == 2
+    # not written, so neither copied nor hashed
+    assert os.stat(os.path.join(tdir, "test_c", "out.txt")).st_ino == st_c.st_ino
+    with open(os.path.join(tdir, "test_c", "out.txt")) as F:
+        assert F.read() == "two"
+
+    os.unlink(os.path.join(tdir, "test_c", "out.txt"))
+    manifest = run_manifest(pytester, monkeypatch, "skip")
+    assert manifest["removed"] == [fnames["test_c"]]
+
+    # the pool only keeps the content still linked from the test folders
+    pool = os.path.join(pytester.path, "test_results", ".artifacts", "pool")
+    assert sum(len(fnames) for fdir, dnames, fnames in os.walk(pool)) == 2
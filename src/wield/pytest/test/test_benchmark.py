@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+"""
+import os
+import json
+
+from wield.pytest import ws_benchmark, tpath_join  # noqa
+
+
+def mtime_ns(fname):
+    if not os.path.exists(fname):
+        return None
+    return os.stat(fname).st_mtime_ns
+
+
+def test_ws_benchmark(ws_benchmark, tpath_join):
+    # left by previous runs, as the tpath persists
+    mtime_before = mtime_ns(tpath_join("benchmark.json"))
+    ws_benchmark.target = 0.01
+    ws_benchmark.repeats = 5
+    ws_benchmark.disable_gc = True
+
+    result = ws_benchmark(sorted, list(range(100)))
+    assert result.N > 1
+    assert len(result.times) == 5
+    assert result.min <= result.median
+    assert result.iqr >= 0
+    assert result.ops == 1 / result.median
+
+    ws_benchmark.run(sum, args=(range(100),), name="sum")
+    # only written at teardown
+    assert mtime_ns(tpath_join("benchmark.json")) == mtime_before
+
+
+def test_ws_benchmark_saved(pytester):
+    pytester.makepyfile(
+        test_bench="""
+        from wield.pytest import ws_benchmark  # noqa
+
+        def test_bench(ws_benchmark):
+            ws_benchmark.target = 0.001
+            ws_benchmark.run(sum, args=(range(10),), name="sum")
+        """
+    )
+    result = pytester.runpytest_subprocess()
+    result.assert_outcomes(passed=1)
+    with open(os.path.join(pytester.path, "test_results", "test_bench.py", "test_bench", "benchmark.json")) as F:
+        results = json.load(F)["results"]
+    assert [res["name"] for res in results] == ["sum"]
+    assert results[0]["repeats"] == 7
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+"""
+import os
+import time
+
+from wield.pytest.capture_writer import CaptureWriter
+
+
+class SlowWriter(CaptureWriter):
+    """
+    Records the order of the writes, which take dt each
+    """
+    def __init__(self, dt=0.002, **kwargs):
+        super().__init__(**kwargs)
+        self.dt = dt
+        self.written = []
+
+    def _write(self, fname, text):
+        time.sleep(self.dt)
+        super()._write(fname, text)
+        self.written.append(os.path.basename(fname))
+
+
+def test_capture_writer_overflow(tmp_path):
+    writer = SlowWriter(maxsize=2, batch=2)
+    fnames = [os.path.join(tmp_path, "sub", "c{}.txt".format(idx)) for idx in range(20)]
+    for idx, fname in enumerate(fnames):
+        writer.submit(fname, "text {}".format(idx))
+        # submit blocks rather than growing the queue
+        assert writer.queue.qsize() <= 2
+    assert writer.close() == []
+    assert writer.thread is None
+    assert writer.written == [os.path.basename(fname) for fname in fnames]
+    for idx, fname in enumerate(fnames):
+        with open(fname) as F:
+            assert F.read() == "text {}".format(idx)
+
+
+def test_capture_writer_sync(tmp_path):
+    """
+    The synchronous path used for failed tests writes after everything queued
+    """
+    writer = SlowWriter(maxsize=4, batch=2)
+    for idx in range(6):
+        writer.submit(os.path.join(tmp_path, "q{}.txt".format(idx)), "queued")
+    writer.write(os.path.join(tmp_path, "failed.txt"), "failed")
+    assert writer.written == ["q{}.txt".format(idx) for idx in range(6)] + ["failed.txt"]
+    assert writer.close() == []
+
+
+def test_capture_writer_errors(tmp_path):
+    blocker = os.path.join(tmp_path, "file")
+    with open(blocker, "w") as F:
+        F.write("")
+    writer = CaptureWriter()
+    fname_bad = os.path.join(blocker, "capture.txt")
+    fname_good = os.path.join(tmp_path, "capture.txt")
+    writer.submit(fname_bad, "lost")
+    writer.submit(fname_good, "kept")
+    errors = writer.close()
+    assert [fname for fname, E in errors] == [fname_bad]
+    assert isinstance(errors[0][1], OSError)
+    with open(fname_good) as F:
+        assert F.read() == "kept"
+
+
+TEST_CAPTURES = """
+import pytest
+from wield.pytest.fixtures import capture  # noqa
+
+
+@pytest.mark.parametrize("idx", range(20))
+def test_pass(capture, idx):
+    print("pass", idx)
+
+
+def test_fail(capture):
+    print("fail")
+    assert False
+"""
+
+
+CONFTEST_WRITER = """
+import pytest
+from wield.pytest import plugin
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_sessionfinish(session):
+    with open("writer.txt", "w") as F:
+        F.write(repr(plugin._capture_writer))
+"""
+
+
+def test_capture_writer_session(pytester):
+    """
+    The queued capture files are drained at the end of the session
+    """
+    pytester.makeconftest(CONFTEST_WRITER)
+    pytester.makepyfile(test_captures=TEST_CAPTURES)
+    result = pytester.runpytest_subprocess()
+    result.assert_outcomes(passed=20, failed=1)
+
+    tdir = os.path.join(pytester.path, "test_results", "test_captures.py")
+    for idx in range(20):
+        with open(os.path.join(tdir, "test_pass[{}]".format(idx), "capture.txt")) as F:
+            text = F.read()
+        assert text.startswith("status: passed")
+        assert "pass {}\n".format(idx) in text
+    with open(os.path.join(tdir, "test_fail", "capture.txt")) as F:
+        text = F.read()
+    assert text.startswith("status: failed")
+    assert "captured errors:" in text
+
+    with open(os.path.join(pytester.path, "writer.txt")) as F:
+        assert F.read() == "None"
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+"""
+import pytest
+import importlib.util
+
+
+TEST_FIGS = """
+import sys
+
+def test_numeric():
+    assert sum(range(10)) == 45
+
+def test_still_no_pyplot():
+    assert "matplotlib.pyplot" not in sys.modules
+
+def test_three():
+    import matplotlib.pyplot as plt
+    for idx in range(3):
+        plt.figure()
+
+def test_one():
+    import matplotlib.pyplot as plt
+    plt.figure()
+
+def test_closed():
+    import matplotlib.pyplot as plt
+    assert not plt.get_fignums()
+    plt.close(plt.figure())
+"""
+
+
+@pytest.fixture
+def figs_suite(pytester):
+    # matplotlib is only imported by the subprocess
+    if importlib.util.find_spec("matplotlib") is None:
+        pytest.skip("matplotlib is not installed")
+    pytester.makeini(
+        """
+        [pytest]
+        usefixtures = closefigs
+        """
+    )
+    pytester.makepyfile(test_figs=TEST_FIGS)
+    return pytester
+
+
+def test_closefigs_report(figs_suite):
+    result = figs_suite.runpytest_subprocess()
+    result.assert_outcomes(passed=5)
+    result.stdout.fnmatch_lines([
+        "*tests leaving the most matplotlib figures open*",
+        "    3  test_figs.py::test_three",
+        "    1  test_figs.py::test_one",
+        "4 figures left open by 2 tests",
+    ])
+
+
+def test_closefigs_limit(figs_suite):
+    result = figs_suite.runpytest_subprocess("--ws-figure-limit=2", "--ws-figure-report=0")
+    result.assert_outcomes(passed=4, failed=1)
+    result.stdout.fnmatch_lines([
+        "Test left 3 figures open, more than the --ws-figure-limit of 2",
+        "FAILED test_figs.py::test_three - Failed: Test left 3 figures open*",
+    ])
+    result.stdout.no_fnmatch_line("* figures left open by * tests")
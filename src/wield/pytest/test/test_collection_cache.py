@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+"""
+import os
+import json
+
+
+module_src = """
+import os
+import pytest
+
+# count the imports
+with open(os.path.join(os.path.dirname(__file__), "imports.txt"), "a") as F:
+    F.write("{}\\n")
+
+@pytest.mark.ws_slow
+def test_slow():
+    pass
+
+class TestClass:
+    @pytest.mark.parametrize("x", [1, 2])
+    def test_param(self, x):
+        pass
+"""
+
+
+def test_collection_cache(pytester):
+    pytester.makepyfile(test_mod=module_src.format("first"))
+
+    def collect():
+        result = pytester.runpytest_subprocess("--ws-co", "--ws-co-cache")
+        lines = [line for line in result.outlines if "::" in line]
+        return lines
+
+    def imports():
+        with open(os.path.join(pytester.path, "imports.txt")) as F:
+            return F.read().split()
+
+    lines = collect()
+    assert imports() == ["first"]
+    assert "    Class::TestClass::test_mod.py" in lines
+    assert "      Function::test_param[2]::test_mod.py" in lines
+
+    with open(os.path.join(pytester.path, "test_results", "collection.jsonl")) as F:
+        recs = [json.loads(line) for line in F]
+    assert [rec["nodeid"] for rec in recs] == [
+        "test_mod.py::test_slow",
+        "test_mod.py::TestClass::test_param[1]",
+        "test_mod.py::TestClass::test_param[2]",
+    ]
+    assert "ws_slow" in recs[0]["markers"]
+
+    # unchanged, so listed from the cache without importing
+    assert collect() == lines
+    assert imports() == ["first"]
+    with open(os.path.join(pytester.path, "test_results", "collection.jsonl")) as F:
+        assert [json.loads(line) for line in F] == recs
+
+    pytester.makepyfile(test_mod=module_src.format("second"))
+    assert collect() == lines
+    assert imports() == ["first", "second"]
+
+
+def test_collection_cache_deselected(pytester):
+    """
+    Narrowed runs must not leave a cache missing tests of the module
+    """
+    pytester.makepyfile(test_mod=module_src.format("first"))
+
+    def collect(*args):
+        result = pytester.runpytest_subprocess("--ws-co", "--ws-co-cache", *args)
+        return [line.strip() for line in result.outlines if "::" in line]
+
+    lines = collect("-k", "test_param")
+    assert "Function::test_param[1]::test_mod.py" in lines
+    assert "Function::test_slow::test_mod.py" not in lines
+
+    lines = collect("test_mod.py::test_slow")
+    assert "Function::test_slow::test_mod.py" in lines
+    assert "Function::test_param[1]::test_mod.py" not in lines
+
+    lines = collect()
+    assert "Function::test_slow::test_mod.py" in lines
+    assert "Function::test_param[1]::test_mod.py" in lines
+    assert "Function::test_param[2]::test_mod.py" in lines
+    # served from the cache written by the -k run
+    with open(os.path.join(pytester.path, "imports.txt")) as F:
+        assert F.read().split() == ["first"]
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+"""
+import os
+import warnings
+import pytest
+
+from wield.pytest.utilities import dformat, Timer
+
+
+def test_dformat_small():
+    assert dformat([1, 2, 3]) == "[1, 2, 3]"
+    assert dformat({'a': 1}) == "{'a': 1}"
+
+
+def test_dformat_containers():
+    text = dformat(list(range(10000)))
+    assert text.startswith("list(len=10000) [")
+    assert "  0,\n  1,\n  2,\n  ...\n  9997," in text
+    assert len(text) < 200
+
+    # small containers holding large ones are summarized too
+    text = dformat({'big': list(range(10000)), 'small': 1})
+    assert text.startswith("dict(len=2) {")
+    assert "'big': list(len=10000) [" in text
+    assert "'small': 1," in text
+
+
+def test_dformat_array():
+    np = pytest.importorskip("numpy")
+    arr = np.arange(100000, dtype=float).reshape(100, 1000)
+    text = dformat(arr)
+    assert text == (
+        "ndarray shape=(100, 1000) dtype=float64 min=0 max=99999 mean=49999.5"
+        " [0.0, 1.0, 2.0 ... 99997.0, 99998.0, 99999.0]"
+    )
+    assert dformat(np.zeros(3)).startswith("array(")
+
+
+class TensorLike(object):
+    """
+    An array-like with size as a method and no reshape, that numpy cannot convert
+    """
+    shape = (5000,)
+    dtype = "float32"
+
+    def size(self):
+        return 5000
+
+    def __array__(self, *args, **kwargs):
+        raise TypeError("on a device")
+
+    def __repr__(self):
+        return "TensorLike()"
+
+
+def test_dformat_array_likes():
+    np = pytest.importorskip("numpy")
+    # falls back to the pretty-printer
+    assert dformat(TensorLike()) == "TensorLike()"
+
+    arr = np.ma.masked_less(np.arange(5000, dtype=float), 10)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        text = dformat(arr)
+    assert text == (
+        "MaskedArray shape=(5000,) dtype=float64 masked=10 min=10 max=4999 mean=2504.5"
+        " [10.0, 11.0, 12.0 ... 4997.0, 4998.0, 4999.0]"
+    )
+
+
+def test_dformat_series():
+    pd = pytest.importorskip("pandas")
+    text = dformat(pd.Series(range(5000)))
+    assert text.startswith("Series shape=(5000,) dtype=int64 min=0 max=4999")
+
+
+@pytest.mark.ws_slow
+def test_dformat_speed():
+    np = pytest.importorskip("numpy")
+    data = {str(idx): np.ones(10000) for idx in range(1000)}
+    with Timer(N=1) as t:
+        dformat(data)
+    print("dformat of a dict of 1000 arrays", t)
+    assert t.interval < 1
+
+
+def test_dprint_output(pytester):
+    pytester.makepyfile(
+        test_out="""
+        import builtins
+        from wield.pytest.fixtures import dprint  # noqa
+
+        def test_out(dprint):
+            dprint("hello", list(range(10000)))
+            dprint("again", pretty=False)
+
+        def test_quiet(dprint):
+            pass
+
+        def test_restored():
+            # not left bound to the closed output of the previous tests
+            assert not hasattr(builtins, "dprint")
+        """
+    )
+    result = pytester.runpytest_subprocess()
+    result.assert_outcomes(passed=3)
+    with open(os.path.join(pytester.path, "test_results", "test_out.py", "test_out", "output.txt")) as F:
+        text = F.read()
+    assert text.startswith("'hello' list(len=10000) [\n")
+    assert text.endswith("]\nagain\n")
+    assert not os.path.exists(os.path.join(pytester.path, "test_results", "test_out.py", "test_quiet", "output.txt"))
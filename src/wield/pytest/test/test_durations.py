@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+"""
+import os
+from wield.bunch import Bunch
+
+from wield.pytest import durations, tpath_join  # noqa
+from wield.pytest.parse_collection.order import order_tests
+
+
+def test_durations_recorded(pytester):
+    pytester.makepyfile(
+        test_fast="""
+        def test_fast():
+            pass
+        """,
+        test_slow="""
+        import time
+        def test_slow():
+            time.sleep(0.2)
+
+        def test_fails():
+            assert False
+        """,
+    )
+    result = pytester.runpytest_subprocess()
+    result.assert_outcomes(passed=2, failed=1)
+
+    stats = durations.load(os.path.join(pytester.path, "test_results", durations.DURATIONS_FNAME))
+    assert set(stats) == {"test_fast.py::test_fast", "test_slow.py::test_slow", "test_slow.py::test_fails"}
+    assert stats["test_slow.py::test_slow"]["call"] > 0.15
+    assert stats["test_slow.py::test_fails"]["outcome"] == "failed"
+
+    b = Bunch(tests={
+        "test_new": "test_new.py",
+        "test_fast": "test_fast.py",
+        "test_slow": "test_slow.py",
+    })
+    assert order_tests(b, stats, order="longest") == ["test_slow", "test_fast", "test_new"]
+    stats["test_slow.py::test_fails"]["outcome"] = "passed"
+    stats["test_fast.py::test_fast"]["outcome"] = "failed"
+    assert order_tests(b, stats, order="failed") == ["test_fast", "test_slow", "test_new"]
+
+
+def test_durations_compaction(tpath_join):
+    fname = tpath_join(durations.DURATIONS_FNAME)
+    rec = durations.DurationRecorder(fname)
+    for idx in range(3 * durations.KEEP_RECORDS):
+        for when in ["setup", "call", "teardown"]:
+            rec.logreport(Bunch(
+                nodeid="test_x.py::test_x",
+                when=when,
+                duration=idx,
+                failed=False,
+                skipped=False,
+            ))
+    rec.close()
+
+    with open(fname) as F:
+        assert len(F.readlines()) == durations.KEEP_RECORDS
+    stats = durations.load(fname)
+    assert stats["test_x.py::test_x"]["call"] == 3 * durations.KEEP_RECORDS - 3
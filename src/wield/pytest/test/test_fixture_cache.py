@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+"""
+import os
+import re
+import time
+import pytest
+
+from wield.pytest.fixture_cache import FixtureCache
+
+
+TEST_CACHED = """
+import os
+import pytest
+from wield.pytest import ws_cached
+
+
+@pytest.fixture(params=[1, 2])
+@ws_cached(inputs=["model.txt"])
+def model(request, tmp_path_factory):
+    print("computing model", request.param)
+    with open(os.path.join(os.path.dirname(__file__), "model.txt")) as F:
+        return dict(param=request.param, model=F.read())
+
+
+@pytest.fixture
+@ws_cached()
+def data():
+    import numpy as np
+    print("computing data")
+    return np.arange(10)
+
+
+def test_model(model):
+    assert model["model"] == "v1"
+
+
+def test_data(data):
+    assert data.sum() == 45
+"""
+
+
+def computed(result):
+    # with -s, the prints share lines with the progress output
+    return sorted(re.findall(r"computing \w+(?: \d)?", result.stdout.str()))
+
+
+def test_ws_cached(pytester):
+    pytester.makepyfile(test_cached=TEST_CACHED)
+    pytester.path.joinpath("model.txt").write_text("v1")
+
+    result = pytester.runpytest_subprocess("-s")
+    result.assert_outcomes(passed=3)
+    assert computed(result) == ["computing data", "computing model 1", "computing model 2"]
+
+    result = pytester.runpytest_subprocess("-s")
+    result.assert_outcomes(passed=3)
+    assert computed(result) == []
+    cache_dir = os.path.join(pytester.path, "test_results", ".fixture_cache")
+    assert sorted(os.path.splitext(fname)[1] for fname in os.listdir(cache_dir)) == [".npy", ".pkl", ".pkl"]
+
+    # changing an input only recomputes the fixture using it
+    pytester.path.joinpath("model.txt").write_text("v2")
+    result = pytester.runpytest_subprocess("-s")
+    result.assert_outcomes(passed=1, failed=2)
+    assert computed(result) == ["computing model 1", "computing model 2"]
+
+    result = pytester.runpytest_subprocess("-s", "--ws-cache-clear", "-k", "data")
+    result.assert_outcomes(passed=1, deselected=2)
+    assert computed(result) == ["computing data"]
+    assert len(os.listdir(cache_dir)) == 1
+
+
+def test_fixture_cache_lru(tmp_path):
+    cache = FixtureCache(str(tmp_path), size_mb=2.5 / 1024)
+    for key in ["a", "b"]:
+        cache.store(key, b"x" * 1024)
+    # make a the most recently used
+    time.sleep(0.01)
+    assert cache.load("a") == (True, b"x" * 1024)
+    cache.store("c", b"x" * 1024)
+    assert cache.load("b") == (False, None)
+    assert cache.load("a")[0]
+    assert cache.load("c")[0]
+
+
+def test_fixture_cache_unpicklable(tmp_path):
+    cache = FixtureCache(str(tmp_path))
+    with pytest.warns(UserWarning, match="Could not cache the fixture value of type function"):
+        assert not cache.store("a", lambda: None)
+    assert os.listdir(tmp_path) == []
+    assert cache.load("a") == (False, None)
+
+
+TEST_PARAM_OBJECTS = """
+import os
+import threading
+import pytest
+from wield.pytest import ws_cached
+
+
+class Setting(object):
+    def __init__(self, value):
+        self.value = value
+
+
+# defined outside of the fixture source, so only in the key through the params
+SCALE = int(os.environ.get("WS_TEST_SCALE", "1"))
+CONFIGS = [Setting(SCALE), Setting(2 * SCALE)]
+
+
+@pytest.fixture(params=CONFIGS)
+@ws_cached()
+def model(request):
+    print("computing model", request.param.value)
+    return request.param.value * 10
+
+
+@pytest.fixture(params=[1, 2], ids=["one", "two"])
+@ws_cached()
+def other(request):
+    print("computing other", request.param)
+    return request.param
+
+
+@pytest.fixture(params=[threading.Lock()])
+@ws_cached()
+def locked(request):
+    print("computing locked")
+    return 1
+
+
+@pytest.fixture
+@ws_cached()
+def unpicklable():
+    print("computing unpicklable")
+    return lambda: 1
+
+
+def test_model(model, other):
+    assert model % 10 == 0
+
+
+def test_locked(locked):
+    assert locked == 1
+
+
+def test_unpicklable(unpicklable):
+    assert unpicklable() == 1
+"""
+
+
+def test_ws_cached_param_values(pytester, monkeypatch):
+    pytester.makepyfile(test_params=TEST_PARAM_OBJECTS)
+    result = pytester.runpytest_subprocess("-s")
+    result.assert_outcomes(passed=6, warnings=2)
+    result.stdout.fnmatch_lines(["*Could not cache the fixture locked of an unserializable param*"])
+    assert computed(result) == [
+        "computing locked",
+        "computing model 1", "computing model 2",
+        "computing other 1", "computing other 2",
+        "computing unpicklable",
+    ]
+
+    # the object params are keyed by their values, not their addresses
+    result = pytester.runpytest_subprocess("-s")
+    result.assert_outcomes(passed=6, warnings=2)
+    assert computed(result) == ["computing locked", "computing unpicklable"]
+
+    # and changing their values is not served from the cache
+    monkeypatch.setenv("WS_TEST_SCALE", "3")
+    result = pytester.runpytest_subprocess("-s")
+    result.assert_outcomes(passed=6, warnings=2)
+    assert computed(result) == [
+        "computing locked",
+        "computing model 3", "computing model 6",
+        "computing unpicklable",
+    ]
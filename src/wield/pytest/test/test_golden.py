@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+"""
+import os
+import json
+import warnings
+import pytest
+
+from wield.pytest.golden import Golden, compare_arrays
+
+np = pytest.importorskip("numpy")
+
+
+def test_compare_arrays():
+    ref = np.linspace(0, 1, 1000).reshape(10, 100)
+    assert compare_arrays(ref.copy(), ref) is None
+
+    actual = ref.copy()
+    actual[3, 7] += 1e-3
+    actual[9, 99] = np.nan
+    stats = compare_arrays(actual, ref, rtol=1e-6, chunk=64)
+    assert stats["mismatched"] == 2
+    assert stats["total"] == 1000
+    assert stats["indices"] == [[3, 7], [9, 99]]
+    assert stats["max_abs_index"] == [9, 99]
+    assert stats["max_abs"] == float("inf")
+
+    assert compare_arrays(actual, ref, atol=2e-3, chunk=64)["mismatched"] == 1
+    assert "shape" in compare_arrays(ref[:5], ref)["error"]
+    assert compare_arrays(np.arange(5), np.arange(5)) is None
+    assert compare_arrays(np.arange(5), np.arange(1, 6))["mismatched"] == 5
+
+
+def test_compare_arrays_inf():
+    ref = np.array([1., np.inf, -np.inf, 2.])
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert compare_arrays(ref.copy(), ref) is None
+        actual = ref.copy()
+        actual[1] = -np.inf
+        stats = compare_arrays(actual, ref)
+    assert stats["mismatched"] == 1
+    assert stats["indices"] == [[1]]
+
+
+def test_golden_class(tmp_path):
+    refdir = os.path.join(tmp_path, "golden")
+    tdir = os.path.join(tmp_path, "tpath")
+    os.makedirs(tdir)
+
+    def tjoin(*subpath):
+        return os.path.join(tdir, *subpath)
+
+    data = np.arange(100.)
+    with pytest.raises(AssertionError, match="missing"):
+        Golden(refdir, tjoin)("arr", data)
+    Golden(refdir, tjoin, update=True)("arr", data)
+    Golden(refdir, tjoin, update=True)("both", dict(a=data, b=np.ones(3)))
+    assert os.path.exists(os.path.join(refdir, "arr.npy"))
+    assert os.path.exists(os.path.join(refdir, "both.npz"))
+
+    golden = Golden(refdir, tjoin)
+    golden("arr", data)
+    golden("both", dict(a=data, b=np.ones(3)))
+    assert not os.listdir(tdir)
+
+    with pytest.raises(AssertionError, match=r"arr: 1/100 elements mismatched \(1%\), max abs err 0.5 at \(10,\)"):
+        golden("arr", data + (np.arange(100) == 10) * 0.5)
+    assert np.load(tjoin("golden_arr.npy"))[10] == 10.5
+    with open(tjoin("golden_arr.npy.json")) as F:
+        assert json.load(F)["mismatches"]["arr"]["mismatched"] == 1
+
+    with pytest.raises(AssertionError, match="c: not in the reference"):
+        golden("both", dict(a=data, b=np.ones(3), c=1))
+
+
+def test_golden_fixture(pytester):
+    pytester.makepyfile(
+        test_gold="""
+        import numpy as np
+        from wield.pytest import golden  # noqa
+
+        def test_gold(golden):
+            golden("data", np.linspace(0, 1, 10) ** 2, rtol=1e-12)
+        """
+    )
+    result = pytester.runpytest_subprocess()
+    result.assert_outcomes(failed=1)
+    result.stdout.fnmatch_lines(["*Golden reference */golden/test_gold/data.npy is missing*"])
+
+    result = pytester.runpytest_subprocess("--golden-update")
+    result.assert_outcomes(passed=1)
+    result = pytester.runpytest_subprocess()
+    result.assert_outcomes(passed=1)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+"""
+
+
+def test_impact_selection(pytester):
+    pytester.makepyfile(
+        mylib="""
+        def value():
+            return 1
+        """,
+        test_a="""
+        from mylib import value
+
+        def test_a():
+            assert value() == 1
+        """,
+        test_b="""
+        def test_b():
+            pass
+        """,
+        test_c="""
+        def test_c_pass():
+            pass
+
+        def test_c_fail():
+            assert False
+        """,
+    )
+    result = pytester.runpytest_subprocess("--ws-impact")
+    result.assert_outcomes(passed=3, failed=1)
+
+    # nothing changed, only the failure reruns
+    result = pytester.runpytest_subprocess("--ws-impact")
+    result.assert_outcomes(failed=1, deselected=3)
+
+    # changing the imported module selects its test
+    pytester.makepyfile(
+        mylib="""
+        def value():
+            return 2
+        """,
+    )
+    result = pytester.runpytest_subprocess("--ws-impact")
+    result.assert_outcomes(failed=2, deselected=2)
+
+    # new tests are selected
+    pytester.makepyfile(
+        test_d="""
+        def test_d():
+            pass
+        """,
+    )
+    result = pytester.runpytest_subprocess("--ws-impact", "test_b.py", "test_d.py")
+    result.assert_outcomes(passed=1, deselected=1)
+
+
+def test_impact_skipped(pytester, monkeypatch):
+    pytester.makepyfile(
+        test_a="""
+        import os
+        import pytest
+
+        @pytest.mark.skipif(os.environ.get("WS_TEST_SKIP") == "1", reason="skipped")
+        def test_skipif():
+            pass
+
+        @pytest.mark.ws_slow
+        def test_slow():
+            pass
+
+        def test_skip_call():
+            if os.environ.get("WS_TEST_SKIP") == "1":
+                pytest.skip("skipped in the call")
+
+        @pytest.mark.xfail
+        def test_xfail():
+            assert False
+        """,
+    )
+    monkeypatch.setenv("WS_TEST_SKIP", "1")
+    result = pytester.runpytest_subprocess("--ws-impact", "--ws-skip-slow")
+    result.assert_outcomes(skipped=3, xfailed=1)
+
+    # the skipped tests never ran, so they stay selected
+    monkeypatch.setenv("WS_TEST_SKIP", "0")
+    result = pytester.runpytest_subprocess("--ws-impact")
+    result.assert_outcomes(passed=3, deselected=1)
+
+    result = pytester.runpytest_subprocess("--ws-impact")
+    result.assert_outcomes(deselected=4)
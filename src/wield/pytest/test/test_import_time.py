@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+"""
+import sys
+import subprocess
+
+
+# budget in seconds for importing the plugin once pytest is loaded
+IMPORT_BUDGET = 0.1
+
+# modules that the plugin must only load on demand
+LAZY_MODULES = ["matplotlib", "IPython", "icecream", "numpy"]
+
+
+def import_times(code):
+    """
+    Mapping of module name to (self, cumulative) import time in seconds,
+    from python -X importtime. Only the first import of a name is kept.
+    """
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    times = {}
+    for line in out.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        try:
+            t_self = int(fields[0]) * 1e-6
+            t_cumul = int(fields[1]) * 1e-6
+        except ValueError:
+            # the header line
+            continue
+        times.setdefault(fields[2].strip(), (t_self, t_cumul))
+    return times
+
+
+def test_plugin_import_time():
+    times = import_times("import pytest; import wield.pytest.plugin")
+    for modname in LAZY_MODULES:
+        assert modname not in times
+
+    t_plugin = times["wield.pytest.plugin"][1]
+    # the scm version lookup only runs in development checkouts
+    t_version = times.get("wield.pytest._version", (0, 0))[1]
+    assert t_plugin - t_version < IMPORT_BUDGET
+
+
+def test_mpl_backend_lazy(pytester, monkeypatch):
+    # the backend must come from the plugin rather than the environment
+    monkeypatch.delenv("MPLBACKEND", raising=False)
+    pytester.makepyfile(
+        test_mpl="""
+        import os
+        import sys
+        import subprocess
+
+        def test_backend():
+            assert 'matplotlib' not in sys.modules
+            import matplotlib
+            assert matplotlib.get_backend().lower() == 'agg'
+
+        def test_subprocess_env():
+            # subprocesses of tests keep the default backend selection
+            assert 'MPLBACKEND' not in os.environ
+            out = subprocess.check_output([
+                sys.executable, "-c", "import os; print(os.environ.get('MPLBACKEND'))"
+            ])
+            assert out.strip() == b"None"
+        """
+    )
+    result = pytester.runpytest_subprocess("-p", "no:html")
+    result.assert_outcomes(passed=2)
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+"""
+import os
+import json
+import pytest
+
+from wield.pytest import largemem
+
+if largemem.fcntl is None:
+    pytest.skip("largemem scheduling needs fcntl", allow_module_level=True)
+
+
+def test_memory_semaphore(tmp_path):
+    sem = largemem.MemorySemaphore(os.path.join(tmp_path, "lock.json"), 10)
+    assert sem.try_acquire(6)
+    assert not sem.try_acquire(6)
+    assert sem.try_acquire(4)
+    sem.release(4)
+    sem.release(6)
+    # larger than the budget, but alone
+    assert sem.try_acquire(20)
+    assert not sem.try_acquire(1)
+    sem.release(20)
+    assert sem.try_acquire(1)
+
+    # reservations of dead processes are dropped
+    with open(sem.fname, "w") as F:
+        json.dump({"999999999": 10}, F)
+    sem.release(1)
+    assert sem.try_acquire(10)
+
+
+def test_memory_semaphore_unusable(tmp_path):
+    # e.g. a table owned by another user
+    sem = largemem.MemorySemaphore(os.path.join(tmp_path, "missing", "lock.json"), 10)
+    with pytest.warns(UserWarning, match="largemem scheduling disabled"):
+        assert sem.try_acquire(6)
+    assert sem.disabled
+    # unscheduled from then on, without further warnings
+    assert sem.acquire(20) == pytest.approx(0, abs=0.1)
+    sem.release(20)
+
+
+class FakeItem(object):
+    def __init__(self, name, large):
+        self.name = name
+        self.large = large
+
+    def get_closest_marker(self, name):
+        return True if self.large else None
+
+
+def test_interleave():
+    items = [FakeItem("L{}".format(idx), True) for idx in range(2)]
+    items += [FakeItem("s{}".format(idx), False) for idx in range(5)]
+    largemem.interleave(items)
+    assert [item.name for item in items] == ["L0", "s0", "s1", "s2", "L1", "s3", "s4"]
+
+
+TEST_LARGEMEM = """
+import os
+import json
+import time
+import pytest
+
+@pytest.mark.largemem(gb=6)
+@pytest.mark.parametrize("idx", [0, 1])
+def test_large(idx):
+    t_start = time.time()
+    time.sleep(1)
+    with open(os.path.join(os.path.dirname(__file__), "large{}.json".format(idx)), "w") as F:
+        json.dump([t_start, time.time()], F)
+
+@pytest.mark.parametrize("idx", range(4))
+def test_small(idx):
+    pass
+"""
+
+
+def test_largemem_xdist(pytester, monkeypatch):
+    # a private lock table
+    monkeypatch.setenv("TMPDIR", str(pytester.path))
+    pytester.makepyfile(test_large=TEST_LARGEMEM)
+    result = pytester.runpytest_subprocess("-n", "2", "--ws-largemem-budget=10")
+    result.assert_outcomes(passed=6)
+    result.stdout.fnmatch_lines([
+        "*largemem tests queued for memory*",
+        "*s queued in total by 2 tests",
+    ])
+
+    spans = []
+    for idx in range(2):
+        with open(os.path.join(pytester.path, "large{}.json".format(idx))) as F:
+            spans.append(json.load(F))
+    spans.sort()
+    # they did not run at the same time
+    assert spans[0][1] <= spans[1][0]
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+"""
+import os
+import sys
+import json
+import subprocess
+
+from wield.pytest import perf
+
+
+TEST_PERF = """
+import pytest
+from wield.pytest import ws_benchmark  # noqa
+
+@pytest.mark.ws_perf
+def test_bench(ws_benchmark):
+    ws_benchmark.target = 0.001
+    ws_benchmark.run(sum, args=(range(100),), name="sum")
+"""
+
+
+def write_history(fname, records):
+    os.makedirs(os.path.split(fname)[0], exist_ok=True)
+    with open(fname, "w") as F:
+        for rec in records:
+            F.write(json.dumps(rec) + "\n")
+
+
+def history_record(nodeid, name, run, median, machine=None, rev="abc", time=0):
+    if machine is None:
+        machine = perf.machine_fingerprint()
+    return dict(
+        nodeid=nodeid, name=name, machine=machine, rev=rev, run=run,
+        time=time, median=median, iqr=0, min=median, N=1,
+    )
+
+
+def test_perf_regression(pytester):
+    pytester.makepyfile(test_bench=TEST_PERF)
+    fname = os.path.join(pytester.path, "test_results", perf.PERF_FNAME)
+    # baselines far faster than anything achievable
+    write_history(fname, [
+        history_record("test_bench.py::test_bench", "sum", "run{}".format(idx), 1e-12)
+        for idx in range(3)
+    ])
+
+    result = pytester.runpytest_subprocess()
+    result.assert_outcomes(passed=1, warnings=1)
+    result.stdout.fnmatch_lines(["*Performance regression: sum is *% slower*"])
+
+    result = pytester.runpytest_subprocess("--ws-perf-action=fail")
+    result.assert_outcomes(failed=1)
+    result.stdout.fnmatch_lines(["FAILED test_bench.py::test_bench - Failed: Performance regression: sum is *"])
+
+    history = list(perf.iter_history(fname))
+    assert len(history) == 5
+    assert len(set(rec["run"] for rec in history)) == 5
+
+
+def test_perf_within_tolerance(pytester):
+    pytester.makepyfile(test_bench=TEST_PERF)
+    fname = os.path.join(pytester.path, "test_results", perf.PERF_FNAME)
+    # a different machine does not form a baseline
+    write_history(fname, [
+        history_record("test_bench.py::test_bench", "sum", "run0", 1e-12, machine="other")
+    ])
+    result = pytester.runpytest_subprocess("--ws-perf-action=fail")
+    result.assert_outcomes(passed=1)
+
+    # the previous run is now the baseline, and the tolerance hides the noise
+    result = pytester.runpytest_subprocess("--ws-perf-action=fail", "--ws-perf-tolerance=10")
+    result.assert_outcomes(passed=1)
+
+
+def test_machine_fingerprint(monkeypatch):
+    fingerprint = perf.machine_fingerprint()
+    # CI runners have a new hostname for every job
+    monkeypatch.setattr(perf.platform, "node", lambda: "runner-1234")
+    assert perf.machine_fingerprint() == fingerprint
+
+
+def test_perf_compact(tmp_path):
+    fname = os.path.join(tmp_path, perf.PERF_FNAME)
+    records = [
+        history_record("t.py::a", "x", "run{}".format(idx), 1.0, time=idx)
+        for idx in range(30)
+    ] + [
+        history_record("t.py::b", "x", "run{}".format(idx), 1.0, time=idx)
+        for idx in range(3)
+    ]
+    write_history(fname, records)
+    # not worth rewriting
+    perf.compact_history(fname, keep=20)
+    assert list(perf.iter_history(fname)) == records
+
+    perf.compact_history(fname, keep=10)
+    history = list(perf.iter_history(fname))
+    assert history == records[20:]
+
+
+def test_perf_compare(tmp_path):
+    fname = os.path.join(tmp_path, "test_results", perf.PERF_FNAME)
+    write_history(fname, [
+        history_record("t.py::a", "x", "run0", 1.0, rev="aaaa", time=1),
+        history_record("t.py::b", "x", "run0", 1.0, rev="aaaa", time=1),
+        history_record("t.py::c", "x", "run0", 1.0, rev="aaaa", time=1),
+        history_record("t.py::a", "x", "run1", 0.5, rev="bbbb", time=2),
+        history_record("t.py::b", "x", "run1", 3.0, rev="bbbb", time=2),
+        history_record("t.py::c", "x", "run1", 1.0, rev="bbbb", time=2),
+    ])
+    history = list(perf.iter_history(fname))
+    ratios = perf.compare(history, "aaaa", "run1")
+    assert [(r, nodeid) for r, nodeid, name in ratios] == [
+        (0.5, "t.py::a"), (1.0, "t.py::c"), (3.0, "t.py::b")
+    ]
+
+    out = subprocess.run(
+        [sys.executable, "-m", "wield.pytest.perf", "compare", "aaaa", "bbbb"],
+        cwd=tmp_path,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    speedups, slowdowns = out.split("largest slowdowns:")
+    assert "2.00x faster  t.py::a [x]" in speedups
+    assert "3.00x slower  t.py::b [x]" in slowdowns
+    assert "t.py::c" not in out
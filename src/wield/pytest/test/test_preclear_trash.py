@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+"""
+import os
+
+
+def test_preclear_trash(pytester):
+    pytester.makeconftest(
+        """
+        from wield.pytest.fixtures import tpath, tpath_preclear  # noqa
+        """
+    )
+    pytester.makepyfile(
+        test_plots="""
+        import os
+
+        def test_plots(tpath_preclear, tpath):
+            assert not os.path.exists(os.path.join(tpath, "old.txt"))
+            for idx in range(100):
+                with open(os.path.join(tpath, "plot{}.txt".format(idx)), "w") as F:
+                    F.write("plot")
+        """
+    )
+    results = os.path.join(pytester.path, "test_results")
+    tpath_root = os.path.join(results, "test_plots.py", "test_plots")
+    stale = os.path.join(results, ".trash", "stale")
+    os.makedirs(tpath_root)
+    os.makedirs(stale)
+    with open(os.path.join(tpath_root, "old.txt"), "w") as F:
+        F.write("old")
+
+    result = pytester.runpytest_subprocess("--ws-preclear-trash")
+    result.assert_outcomes(passed=1)
+
+    assert len(os.listdir(tpath_root)) == 100
+    # the stale entry and the renamed tpath are deleted by the end of the session
+    assert os.listdir(os.path.join(results, ".trash")) == []
+
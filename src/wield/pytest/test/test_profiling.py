@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+"""
+import os
+import time
+import pstats
+import pytest
+
+from wield.pytest import profiling
+
+
+def burn(seconds):
+    t_end = time.process_time() + seconds
+    while time.process_time() < t_end:
+        pass
+
+
+def burn_twice(seconds):
+    burn(seconds / 2)
+    burn(seconds / 2)
+
+
+@pytest.mark.skipif(profiling._setitimer is None, reason="sampling needs signal.setitimer")
+def test_sampling_profiler(tmp_path):
+    prof = profiling.SamplingProfiler(interval=0.001)
+    prof.enable()
+    burn_twice(0.2)
+    prof.disable()
+    assert sum(prof.samples.values()) > 20
+
+    # the stacks start below the frame enabling the profiler
+    stacks = prof.collapsed()
+    assert "{0}:burn_twice;{0}:burn".format(__name__) in stacks
+
+    fname = os.path.join(tmp_path, "profile.prof")
+    prof.dump_stats(fname)
+    stats = pstats.Stats(fname)
+    keys = [key for key in stats.stats if key[2] == "burn"]
+    assert len(keys) == 1
+    cc, nc, tt, ct, callers = stats.stats[keys[0]]
+    assert ct >= 0.1
+    assert [caller[2] for caller in callers] == ["burn_twice"]
+
+
+TEST_BURN = """
+import time
+
+
+def burn_hot(seconds):
+    t_end = time.process_time() + seconds
+    while time.process_time() < t_end:
+        pass
+
+
+def test_burn():
+    burn_hot(0.3)
+
+
+def test_quick():
+    pass
+"""
+
+
+@pytest.mark.parametrize("mode", profiling.PROFILE_MODES)
+def test_ws_profile(pytester, mode):
+    if mode == "sampling" and profiling._setitimer is None:
+        pytest.skip("sampling needs signal.setitimer")
+    pytester.makepyfile(test_burn=TEST_BURN)
+    # the flag must not take the path argument as its mode
+    result = pytester.runpytest_subprocess("--ws-profile", "test_burn.py", "--ws-profile-mode={}".format(mode))
+    result.assert_outcomes(passed=2)
+    result.stdout.fnmatch_lines([
+        "*hottest functions of --ws-profile, see test_results/profile.prof*",
+        "*burn_hot (test_burn.py:4)",
+    ])
+
+    tdir = os.path.join(pytester.path, "test_results")
+    assert os.path.exists(os.path.join(tdir, "test_burn.py", "test_burn", "profile.prof"))
+    stats = pstats.Stats(os.path.join(tdir, "profile.prof"))
+    assert any(key[2] == "burn_hot" for key in stats.stats)
+    if mode == "sampling":
+        with open(os.path.join(tdir, "profile.collapsed")) as F:
+            text = F.read()
+        assert "test_burn:test_burn;test_burn:burn_hot " in text
+
+
+TEST_PROFILE_ERROR = """
+import pytest
+from wield.pytest import profiling
+
+
+def finish_broken(item, prof):
+    prof.disable()
+    raise OSError("disk full")
+
+
+@pytest.fixture(autouse=True)
+def broken(monkeypatch):
+    monkeypatch.setattr(profiling, "profiler_finish", finish_broken)
+
+
+def test_pass():
+    pass
+
+
+def test_fail():
+    assert False, "the real failure"
+"""
+
+
+def test_ws_profile_error(pytester):
+    pytester.makepyfile(test_broken=TEST_PROFILE_ERROR)
+    result = pytester.runpytest_subprocess("--ws-profile")
+    result.assert_outcomes(passed=1, failed=1, warnings=2)
+    result.stdout.fnmatch_lines([
+        "*the real failure*",
+        "*Could not write the profile of test_broken.py::test_pass: OSError('disk full')",
+    ])
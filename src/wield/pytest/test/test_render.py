@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+"""
+import os
+import importlib.util
+import pytest
+
+
+TEST_RENDER = """
+from wield.pytest import ws_render, tpath_join, capture  # noqa
+
+
+def make_figure(N):
+    import matplotlib.pyplot as plt
+    fig = plt.figure()
+    plt.plot(range(N))
+    return fig
+
+
+def broken_figure():
+    raise RuntimeError("no figure today")
+
+
+def test_savefig(ws_render, tpath_join):
+    import matplotlib.pyplot as plt
+    fig = make_figure(10)
+    ws_render.savefig(fig, [tpath_join("plot.png"), tpath_join("plot.pdf")])
+    assert not plt.get_fignums()
+
+
+def test_recipe(ws_render, tpath_join):
+    ws_render.submit(tpath_join("recipe.png"), make_figure, 5)
+
+
+def test_broken(ws_render, tpath_join, capture):
+    print("test output")
+    ws_render.submit(tpath_join("broken.png"), broken_figure)
+"""
+
+
+@pytest.mark.parametrize("workers", ["2", "0"])
+def test_ws_render(pytester, workers):
+    if importlib.util.find_spec("matplotlib") is None:
+        pytest.skip("matplotlib is not installed")
+    pytester.makepyfile(test_render=TEST_RENDER)
+    result = pytester.runpytest_subprocess("--ws-render-workers", workers)
+    result.assert_outcomes(passed=3, warnings=1)
+    result.stdout.fnmatch_lines(["*Could not render */broken.png for test_render.py::test_broken"])
+
+    tdir = os.path.join(pytester.path, "test_results", "test_render.py")
+    for fname in [
+        os.path.join("test_savefig", "plot.png"),
+        os.path.join("test_savefig", "plot.pdf"),
+        os.path.join("test_recipe", "recipe.png"),
+    ]:
+        assert os.path.getsize(os.path.join(tdir, fname)) > 0
+    assert not os.path.exists(os.path.join(tdir, "test_broken", "broken.png"))
+
+    with open(os.path.join(tdir, "test_broken", "capture.txt")) as F:
+        text = F.read()
+    assert "test output" in text
+    assert "render failed: " in text
+    assert "RuntimeError: no figure today" in text
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+"""
+import os
+import json
+import pytest
+
+from wield.pytest import resources
+
+if resources.resource is None:
+    pytest.skip("resource accounting needs the resource module", allow_module_level=True)
+
+
+def test_usage():
+    before = resources.snapshot()
+    sum(idx * idx for idx in range(10 ** 6))
+    use = resources.usage(before, resources.snapshot())
+    assert resources.cpu_time(use) > 0
+    text = resources.usage_text(use)
+    assert text.startswith("cpu: ")
+    assert "context switches: " in text
+
+
+TEST_BURN = """
+import time
+import pytest
+from wield.pytest.fixtures import capture  # noqa
+
+
+def test_burn(capture):
+    t_end = time.process_time() + 0.3
+    while time.process_time() < t_end:
+        pass
+
+
+def test_sleep(capture):
+    time.sleep(0.3)
+"""
+
+
+@pytest.mark.parametrize("xdist", [False, True])
+def test_resources_report(pytester, xdist):
+    pytester.makepyfile(test_burn=TEST_BURN)
+    args = ["-n", "2"] if xdist else []
+    result = pytester.runpytest_subprocess("--ws-resource-report=10", "--junitxml=out.xml", *args)
+    result.assert_outcomes(passed=2)
+    # the usage is carried on the reports, not in the user properties
+    with open(os.path.join(pytester.path, "out.xml")) as F:
+        assert "ws_resources" not in F.read()
+    result.stdout.fnmatch_lines([
+        "*tests using the most CPU time*",
+        "*wall*cpu*cpu%*maxrss+*read*written*test",
+        "*test_burn.py::test_burn",
+        "*test_burn.py::test_sleep",
+    ])
+
+    with open(os.path.join(pytester.path, "test_results", "resources.json")) as F:
+        usages = json.load(F)
+    burn = usages["tests"]["test_burn.py::test_burn"]
+    sleep = usages["tests"]["test_burn.py::test_sleep"]
+    assert resources.cpu_time(burn) >= 0.25
+    assert resources.cpu_time(sleep) < 0.1
+    assert sleep["duration"] >= 0.3
+    assert usages["totals"]["user"] >= burn["user"]
+
+    tdir = os.path.join(pytester.path, "test_results", "test_burn.py")
+    with open(os.path.join(tdir, "test_burn", "capture.txt")) as F:
+        text = F.read()
+    assert text.startswith("status: passed\nduration: ")
+    assert "\ncpu: " in text
+
+
+def test_resources_no_report(pytester):
+    """
+    The table is opt-in, but resources.json is always written
+    """
+    pytester.makepyfile(test_burn=TEST_BURN)
+    result = pytester.runpytest_subprocess()
+    result.assert_outcomes(passed=2)
+    result.stdout.no_fnmatch_line("*tests using the most CPU time*")
+    assert os.path.exists(os.path.join(pytester.path, "test_results", "resources.json"))
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+"""
+import os
+import json
+import subprocess
+import sys
+import pytest
+
+from wield.pytest import slow
+
+
+TEST_MOD = """
+import pytest
+
+
+@pytest.mark.ws_slow
+def test_marked_fast():
+    pass
+
+
+@pytest.mark.parametrize("idx", [0, 1])
+def test_unmarked_slow(idx):
+    pass
+
+
+class TestGroup:
+    @pytest.mark.ws_slow
+    def test_marked_slow(self):
+        pass
+
+    def test_fast(self):
+        pass
+
+
+@pytest.mark.ws_slow
+def test_new():
+    pass
+"""
+
+
+def write_durations(pytester):
+    recs = [
+        ("test_mod.py::test_marked_fast", 0.1),
+        ("test_mod.py::test_unmarked_slow[0]", 0.2),
+        ("test_mod.py::test_unmarked_slow[1]", 20),
+        ("test_mod.py::TestGroup::test_marked_slow", 30),
+        ("test_mod.py::TestGroup::test_fast", 0.1),
+    ]
+    os.makedirs(os.path.join(pytester.path, "test_results"), exist_ok=True)
+    with open(os.path.join(pytester.path, "test_results", "durations.jsonl"), "w") as F:
+        for nodeid, dur in recs:
+            rec = dict(nodeid=nodeid, module="test_mod.py", call=dur, outcome="passed", time=1000)
+            F.write(json.dumps(rec) + "\n")
+
+
+def test_parse_threshold():
+    stats = {str(idx): dict(duration=idx, outcome="passed") for idx in range(1, 101)}
+    assert slow.parse_threshold("10s", stats) == 10
+    assert slow.parse_threshold("p95", stats) == 95
+    assert slow.parse_threshold("p95", {}) is None
+
+
+def test_slow_threshold_invalid(pytester):
+    pytester.makepyfile(test_mod=TEST_MOD)
+    result = pytester.runpytest_subprocess("--ws-slow-threshold=abc")
+    assert result.ret == pytest.ExitCode.USAGE_ERROR
+    result.stderr.fnmatch_lines([
+        "*--ws-slow-threshold: expected a duration such as 10s or a percentile such as p95, not 'abc'"
+    ])
+    assert "INTERNALERROR" not in result.stdout.str()
+
+
+def test_slow_threshold(pytester):
+    pytester.makepyfile(test_mod=TEST_MOD)
+    write_durations(pytester)
+    result = pytester.runpytest_subprocess("--ws-slow-threshold=10s", "--ws-skip-slow", "-rs")
+    # test_new has no history and keeps its mark
+    # the parametrizations share the duration of the slowest
+    result.assert_outcomes(passed=2, skipped=4)
+    result.stdout.fnmatch_lines([
+        "*ws_slow marks disagreeing with the durations*",
+        "marked ws_slow but measured under 10.00s (1 tests):",
+        "*0.10s  test_mod.py::test_marked_fast",
+        "measured over 10.00s but not marked ws_slow (2 tests):",
+        "*20.00s  test_mod.py::test_unmarked_slow[[]0[]]",
+        "*20.00s  test_mod.py::test_unmarked_slow[[]1[]]",
+    ])
+
+
+def test_slow_rewrite(pytester):
+    pytester.makepyfile(test_mod=TEST_MOD)
+    write_durations(pytester)
+    proc = subprocess.run(
+        [sys.executable, "-m", "wield.pytest.slow", "rewrite", "--threshold", "10s"],
+        cwd=str(pytester.path), capture_output=True, text=True, check=True,
+    )
+    assert proc.stdout.splitlines() == [
+        "unmarked  test_mod.py::test_marked_fast",
+        "marked  test_mod.py::test_unmarked_slow",
+    ]
+    with open(os.path.join(pytester.path, "test_mod.py")) as F:
+        text = F.read()
+    assert text.strip() == TEST_MOD.replace(
+        '@pytest.mark.ws_slow\ndef test_marked_fast', 'def test_marked_fast'
+    ).replace(
+        '@pytest.mark.parametrize("idx", [0, 1])\ndef test_unmarked_slow',
+        '@pytest.mark.ws_slow\n@pytest.mark.parametrize("idx", [0, 1])\ndef test_unmarked_slow',
+    ).strip()
+
+    # the durations now agree with the marks
+    result = pytester.runpytest_subprocess("--ws-slow-threshold=10s")
+    result.assert_outcomes(passed=6)
+    result.stdout.no_fnmatch_line("*ws_slow marks disagreeing*")
+
+
+def test_slow_threshold_stable(pytester):
+    pytester.makepyfile(test_mod=TEST_MOD)
+    write_durations(pytester)
+    for run in range(2):
+        # the skipped runs of measured slow tests keep them classified as slow
+        result = pytester.runpytest_subprocess("--ws-slow-threshold=10s", "--ws-skip-slow")
+        result.assert_outcomes(passed=2, skipped=4)
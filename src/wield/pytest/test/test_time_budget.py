@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+"""
+import os
+import json
+import pytest
+
+from wield.pytest import budget
+
+
+def test_parse_duration():
+    assert budget.parse_duration("90") == 90
+    assert budget.parse_duration("120s") == 120
+    assert budget.parse_duration("2m") == 120
+    assert budget.parse_duration("1.5h") == 5400
+    with pytest.raises(ValueError):
+        budget.parse_duration("2 days")
+
+
+def test_select():
+    stats = {
+        "a.py::slow": dict(module="a.py", duration=10, outcome="passed", time=1000),
+        "a.py::fast": dict(module="a.py", duration=1, outcome="passed", time=1000),
+        "a.py::failed": dict(module="a.py", duration=5, outcome="failed", time=1000),
+        "b.py::stale": dict(module="b.py", duration=5, outcome="passed", time=1000 - 5 * 86400),
+    }
+    nodeids = list(stats) + ["a.py::new"]
+    estimates = budget.estimate_durations(nodeids, stats)
+    # the module median
+    assert estimates["a.py::new"] == 5
+
+    values = budget.node_values(nodeids, stats, changed=set())
+    assert values["a.py::fast"] == budget.VALUE_BASE
+    assert values["b.py::stale"] > values["a.py::slow"]
+    chosen = budget.select(nodeids, estimates, values, 16)
+    assert chosen == {"a.py::failed", "a.py::new", "a.py::fast", "b.py::stale"}
+
+
+TEST_MOD = """
+import pytest
+
+@pytest.mark.parametrize("idx", range(4))
+def test_fast(idx):
+    pass
+
+def test_slow():
+    pass
+
+def test_failed():
+    pass
+"""
+
+
+def test_time_budget(pytester):
+    pytester.makepyfile(test_mod=TEST_MOD)
+    recs = [dict(nodeid="test_mod.py::test_fast[{}]".format(idx), call=1, outcome="passed") for idx in range(4)]
+    recs.append(dict(nodeid="test_mod.py::test_slow", call=30, outcome="passed"))
+    recs.append(dict(nodeid="test_mod.py::test_failed", call=3, outcome="failed"))
+    os.makedirs(os.path.join(pytester.path, "test_results"))
+    with open(os.path.join(pytester.path, "test_results", "durations.jsonl"), "w") as F:
+        for rec in recs:
+            rec.update(module="test_mod.py", time=1000)
+            F.write(json.dumps(rec) + "\n")
+
+    result = pytester.runpytest_subprocess("--ws-time-budget=10s")
+    result.assert_outcomes(passed=5, deselected=1)
+    result.stdout.fnmatch_lines([
+        "*tests selected by --ws-time-budget*",
+        "selected 5 tests, estimated 7.0s of the 10.0s budget",
+        "deselected 1 tests, estimated 30.0s",
+        "*1 tests*30.0s  test_mod.py",
+    ])
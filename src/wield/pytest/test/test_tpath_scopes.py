@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+"""
+import os
+
+
+TEST_SCOPES = """
+import os
+import pytest
+from wield.pytest import (  # noqa
+    tpath_join_module,
+    tpath_class,
+    tpath_session,
+    fpath_module,
+    fpath_session,
+)
+
+
+@pytest.fixture(scope="module")
+def shared(tpath_join_module, fpath_module):
+    assert fpath_module == os.path.dirname(__file__)
+    with open(tpath_join_module("model.txt"), "w") as F:
+        F.write("model")
+    return tpath_join_module("model.txt")
+
+
+@pytest.fixture(scope="session")
+def session_dir(tpath_session, fpath_session):
+    assert os.path.samefile(fpath_session, os.path.dirname(__file__))
+    return tpath_session
+
+
+def test_a(shared, session_dir):
+    assert os.path.exists(shared)
+    assert os.path.isdir(session_dir)
+
+
+class TestThings:
+    def test_b(self, tpath_class, shared):
+        with open(os.path.join(tpath_class, "b.txt"), "w") as F:
+            F.write("b")
+"""
+
+
+def test_tpath_scopes(pytester):
+    pytester.makepyfile(test_scopes=TEST_SCOPES)
+    result = pytester.runpytest_subprocess()
+    result.assert_outcomes(passed=2)
+
+    root = os.path.join(pytester.path, "test_results")
+    assert os.path.isfile(os.path.join(root, "test_scopes.py", "@module", "model.txt"))
+    assert os.path.isfile(os.path.join(root, "test_scopes.py", "@TestThings", "b.txt"))
+    assert os.path.isdir(os.path.join(root, "@session"))
+
+    # the links from the folder of the test, which here is the rootpath too
+    assert os.path.islink(os.path.join(root, "@test_scopes.py"))
+    assert os.path.isfile(os.path.join(root, "@test_scopes.py", "model.txt"))
+    assert os.path.isfile(os.path.join(root, "@TestThings", "b.txt"))
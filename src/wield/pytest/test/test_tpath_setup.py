@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+"""
+import os
+import json
+import pytest
+
+from wield.pytest import utilities, Timer
+from wield.pytest import tpath_join  # noqa
+
+
+def synthetic_tpaths(root, N):
+    """
+    (tpath_root, tpath_local) pairs laid out as N tests spread over modules
+    """
+    pairs = []
+    for idx in range(N):
+        mod = "test_mod{}.py".format(idx // 50)
+        tname = "test_{}".format(idx)
+        pairs.append((
+            os.path.join(root, "results", mod, tname),
+            os.path.join(root, "src", "pkg{}".format(idx // 500), "test_results", tname),
+        ))
+    return pairs
+
+
+def test_tpath_setup_cache(tpath_join, monkeypatch):
+    (tpath_root, tpath_local), = synthetic_tpaths(tpath_join("cache"), 1)
+    utilities.tpath_setup(tpath_root, tpath_local)
+    assert os.path.isdir(tpath_root)
+    assert os.path.samefile(tpath_local, tpath_root)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("tpath_setup repeated syscalls")
+
+    # cached, so no filesystem calls on repeat
+    with monkeypatch.context() as m:
+        m.setattr(os, "makedirs", fail)
+        m.setattr(os, "symlink", fail)
+        utilities.tpath_setup(tpath_root, tpath_local)
+
+    # must recreate after being forgotten
+    os.rmdir(tpath_root)
+    utilities.tpath_forget(tpath_root)
+    utilities.tpath_setup(tpath_root, tpath_local)
+    assert os.path.samefile(tpath_local, tpath_root)
+
+
+def test_tpath_setup_race(tpath_join, monkeypatch):
+    """
+    Another xdist worker makes the symlink between the check and os.symlink
+    """
+    (tpath_root, tpath_local), (tpath_other, _) = synthetic_tpaths(tpath_join("race"), 2)
+    # the tpath is kept from earlier runs
+    if os.path.lexists(tpath_local):
+        os.unlink(tpath_local)
+    utilities.tpath_forget(tpath_root)
+    symlink = os.symlink
+
+    def symlink_raced(src, dst, **kwargs):
+        symlink(src, dst, **kwargs)
+        symlink(src, dst, **kwargs)
+
+    with monkeypatch.context() as m:
+        m.setattr(os, "symlink", symlink_raced)
+        utilities.tpath_setup(tpath_root, tpath_local)
+    assert os.path.samefile(tpath_local, tpath_root)
+
+    # a stale link, as left by an earlier session, is replaced
+    os.makedirs(tpath_other, exist_ok=True)
+    os.unlink(tpath_local)
+    os.symlink(os.path.relpath(tpath_other, os.path.dirname(tpath_local)), tpath_local)
+    utilities.tpath_forget(tpath_root)
+    utilities.tpath_setup(tpath_root, tpath_local)
+    assert os.path.samefile(tpath_local, tpath_root)
+    assert os.listdir(os.path.dirname(tpath_local)) == [os.path.basename(tpath_local)]
+
+
+def clear_cache():
+    utilities._dirs_known.clear()
+    utilities._tpath_known.clear()
+    utilities._realpath_known.clear()
+
+
+@pytest.mark.ws_slow
+def test_tpath_setup_bench(tpath_join):
+    """
+    Per-test overhead of the tpath setup for a synthetic suite of 10k tests
+    """
+    N = 10000
+    pairs = synthetic_tpaths(tpath_join("bench"), N)
+
+    clear_cache()
+    with Timer(N) as t_create:
+        for tpath_root, tpath_local in pairs:
+            utilities.tpath_setup(tpath_root, tpath_local)
+
+    # every later tpath/tpath_join/tjoin of the same test hits the cache
+    with Timer(N) as t_cached:
+        for tpath_root, tpath_local in pairs:
+            utilities.tpath_setup(tpath_root, tpath_local)
+
+    # what every call did before the cache, checking the existing folders and links
+    with Timer(N) as t_recheck:
+        for tpath_root, tpath_local in pairs:
+            clear_cache()
+            utilities.tpath_setup(tpath_root, tpath_local)
+
+    print("create: {} per test".format(t_create))
+    print("cached: {} per test".format(t_cached))
+    print("recheck: {} per test".format(t_recheck))
+    with open(tpath_join("bench.json"), "w") as F:
+        json.dump(dict(
+            N=N,
+            create=float(t_create),
+            cached=float(t_cached),
+            recheck=float(t_recheck),
+        ), F)
+    assert float(t_cached) < float(t_recheck)
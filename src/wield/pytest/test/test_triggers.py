@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+"""
+import os
+import pytest
+
+from wield.pytest import triggers
+
+
+TEST_TRIGGER = """
+import os
+import pytest
+
+from wield.pytest import triggers
+from wield.pytest import test_trigger, tpath_join  # noqa
+
+CALLS = os.path.join(os.path.dirname(__file__), "calls.txt")
+
+
+def record(line):
+    with open(CALLS, "a") as F:
+        F.write(line + "\\n")
+
+
+@pytest.mark.parametrize("idx", [0, 1])
+def test_fails(test_trigger, idx):
+    def plot(fail, idx):
+        record("plot {} {}".format(idx, fail))
+
+    with test_trigger(plot, idx=idx):
+        record("test {}".format(idx))
+        assert False
+
+
+def test_broken_callback(test_trigger):
+    def broken(fail):
+        raise RuntimeError("callback broke")
+
+    with test_trigger(broken):
+        assert False
+"""
+
+
+def read_calls(pytester):
+    with open(os.path.join(pytester.path, "calls.txt")) as F:
+        return F.read().splitlines()
+
+
+def test_trigger_inline(pytester):
+    pytester.makepyfile(test_trig=TEST_TRIGGER)
+    result = pytester.runpytest_subprocess()
+    result.assert_outcomes(failed=3)
+    # the callback error replaces the AssertionError
+    result.stdout.fnmatch_lines(["*RuntimeError: callback broke"])
+    assert read_calls(pytester) == ["test 0", "plot 0 True", "test 1", "plot 1 True"]
+
+
+@pytest.mark.parametrize("mode", ["deferred", "pool"])
+def test_trigger_modes(pytester, mode):
+    pytester.makepyfile(test_trig=TEST_TRIGGER)
+    result = pytester.runpytest_subprocess("--ws-trigger", mode)
+    result.assert_outcomes(failed=3, warnings=1)
+    result.stdout.fnmatch_lines(["*test_trigger call *broken of test_trig.py::test_broken_callback raised*"])
+
+    calls = read_calls(pytester)
+    assert sorted(calls) == ["plot 0 True", "plot 1 True", "test 0", "test 1"]
+    if mode == "deferred":
+        assert calls == ["test 0", "test 1", "plot 0 True", "plot 1 True"]
+
+    tdir = os.path.join(pytester.path, "test_results", "test_trig.py")
+    with open(os.path.join(tdir, "test_fails[0]", "capture.txt")) as F:
+        text = F.read()
+    assert "test_trigger test_fails.<locals>.plot (fail=True): " in text
+    assert "s, ok\n" in text
+    with open(os.path.join(tdir, "test_broken_callback", "capture.txt")) as F:
+        text = F.read()
+    assert "s, error\n" in text
+    assert "RuntimeError: callback broke" in text
+
+
+TEST_TJOIN = """
+import pytest
+from wield.pytest import test_trigger, tjoin  # noqa
+
+
+def test_plot(test_trigger):
+    def plot(fail):
+        with open(tjoin("plot.txt"), "w") as F:
+            F.write(str(fail))
+
+    with test_trigger(plot):
+        assert False
+"""
+
+
+@pytest.mark.parametrize("mode", triggers.TRIGGER_MODES)
+def test_trigger_tjoin(pytester, mode):
+    pytester.makepyfile(test_tjoin=TEST_TJOIN)
+    result = pytester.runpytest_subprocess("--ws-trigger", mode)
+    result.assert_outcomes(failed=1)
+    tdir = os.path.join(pytester.path, "test_results", "test_tjoin.py", "test_plot")
+    with open(os.path.join(tdir, "plot.txt")) as F:
+        assert F.read() == "True"
+
+
+def test_deferred_closes_figures():
+    plt = pytest.importorskip("matplotlib.pyplot")
+    fignums_before = set(plt.get_fignums())
+
+    def plot(fail):
+        plt.figure()
+
+    runner = triggers.TriggerRunner(mode="deferred")
+    runner.submit("test", "capture.txt", plot, True, {})
+    records = runner.close()
+    assert records[0][5] is None
+    assert set(plt.get_fignums()) == fignums_before
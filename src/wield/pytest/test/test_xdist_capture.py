@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+Tests of the capture fixture and tjoin when tests run concurrently
+"""
+import os
+import threading
+import pytest
+
+from wield.pytest import fixtures, tjoin
+
+
+Ncaptures = 64
+
+
+def test_xdist_captures(pytester):
+    pytest.importorskip("xdist")
+    pytester.makeconftest(
+        """
+        from wield.pytest.fixtures import capture, current_pytest_request  # noqa
+        """
+    )
+    pytester.makepyfile(
+        test_many="""
+        import time
+        import random
+        import pytest
+        from wield.pytest import tjoin
+
+        @pytest.mark.parametrize("idx", range({N}))
+        def test_capture(idx, capture):
+            time.sleep(random.random() * 0.01)
+            print("marker-{{}}-marker".format(idx))
+            with open(tjoin("idx.txt"), "w") as F:
+                F.write(str(idx))
+            time.sleep(random.random() * 0.01)
+            assert idx % 16 != 15
+        """.format(N=Ncaptures)
+    )
+    result = pytester.runpytest_subprocess("-n", "4", "--capture=tee-sys")
+    result.assert_outcomes(passed=Ncaptures - Ncaptures // 16, failed=Ncaptures // 16)
+
+    for idx in range(Ncaptures):
+        tdir = os.path.join(pytester.path, "test_results", "test_many.py", "test_capture[{}]".format(idx))
+        with open(os.path.join(tdir, "capture.txt")) as F:
+            text = F.read()
+        with open(os.path.join(tdir, "idx.txt")) as F:
+            assert F.read() == str(idx)
+        markers = [line for line in text.splitlines() if line.startswith("marker-")]
+        assert markers == ["marker-{}-marker".format(idx)]
+        if idx % 16 == 15:
+            assert text.startswith("status: failed")
+        else:
+            assert text.startswith("status: passed")
+
+
+def test_threaded_request_stack():
+    """
+    Each thread sees only the requests that it pushed
+    """
+    barrier = threading.Barrier(8)
+    seen = {}
+
+    def run(idx):
+        stack = fixtures._pytest_request_stack()
+        stack.append(idx)
+        barrier.wait()
+        seen[idx] = fixtures.pytest_request_top()
+        barrier.wait()
+        stack.pop()
+
+    threads = [threading.Thread(target=run, args=(idx,)) for idx in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert seen == {idx: idx for idx in range(8)}
+
+
+def test_helper_thread_tjoin():
+    """
+    Threads started by a test see its request
+    """
+    seen = {}
+
+    def run():
+        seen["request"] = fixtures.pytest_request_top()
+        with open(tjoin("helper.txt"), "w") as F:
+            F.write("helper")
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+    assert seen["request"] is fixtures.pytest_request_top()
+    with open(tjoin("helper.txt")) as F:
+        assert F.read() == "helper"
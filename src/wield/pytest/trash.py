@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+Session trash folder used by tpath_preclear with --ws-preclear-trash.
+
+Rather than removing a tpath on the critical path of the test, it is renamed
+into test_results/.trash (a single atomic rename on the same filesystem) and a
+background thread deletes it. Anything left in the trash by an interrupted run
+is deleted at the start of the next one.
+"""
+import os
+import uuid
+import queue
+import threading
+from shutil import rmtree
+
+
+TRASH_FOLDER = ".trash"
+
+
+def trash_path(config):
+    return os.path.join(str(config.rootpath), "test_results", TRASH_FOLDER)
+
+
+class Trash(object):
+    def __init__(self, trash_root):
+        self.trash_root = trash_root
+        self.queue = queue.Queue()
+        self.thread = None
+
+    def clean_stale(self):
+        """
+        Queue the deletion of the entries left from previous runs
+        """
+        try:
+            names = os.listdir(self.trash_root)
+        except FileNotFoundError:
+            return
+        for name in names:
+            self._queue(os.path.join(self.trash_root, name))
+        return
+
+    def discard(self, fpath):
+        """
+        Move fpath into the trash and queue its deletion.
+        """
+        os.makedirs(self.trash_root, exist_ok=True)
+        fpath_trash = os.path.join(self.trash_root, uuid.uuid4().hex)
+        try:
+            os.rename(fpath, fpath_trash)
+        except FileNotFoundError:
+            return
+        except OSError:
+            # e.g. crossing filesystems, so fall back to deleting in place
+            rmtree(fpath, ignore_errors=True)
+            return
+        self._queue(fpath_trash)
+        return
+
+    def _queue(self, fpath):
+        if self.thread is None:
+            self.thread = threading.Thread(
+                target=self._run,
+                name="wield-trash",
+                daemon=True,
+            )
+            self.thread.start()
+        self.queue.put(fpath)
+
+    def close(self):
+        """
+        Wait for all of the queued deletions
+        """
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+        return
+
+    def _run(self):
+        while True:
+            fpath = self.queue.get()
+            if fpath is None:
+                return
+            # other processes (xdist workers) may be deleting the same stale
+            # entries, which is harmless
+            if os.path.isdir(fpath) and not os.path.islink(fpath):
+                rmtree(fpath, ignore_errors=True)
+            else:
+                try:
+                    os.unlink(fpath)
+                except OSError:
+                    pass
+
+
+# the trash of the session, None unless --ws-preclear-trash
+_trash = None
+
+
+def trash_start(config):
+    global _trash
+    _trash = Trash(trash_path(config))
+    # xdist workers leave the stale entries to the controller
+    if not hasattr(config, "workerinput"):
+        _trash.clean_stale()
+    return
+
+
+def trash_finish():
+    global _trash
+    if _trash is not None:
+        _trash.close()
+        _trash = None
+    return
+
+
+def trash_discard(fpath):
+    """
+    Move fpath into the session trash. Returns False if the trash is not in
+    use, in which case the caller should delete it directly.
+    """
+    if _trash is None:
+        return False
+    _trash.discard(fpath)
+    return True
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: © 2026 California Institute of Technology.
+# SPDX-FileCopyrightText: © 2026 Lee McCuller <mcculler@caltech.edu>
+# NOTICE: authors should document their contributions in concisely in NOTICE
+# with details inline in source files, comments, and docstrings.
+"""
+Deferred and pooled test_trigger callbacks, for --ws-trigger.
+
+inline (the default) runs the callbacks in the test, as they trigger.
+deferred queues them with their kwargs and runs them at the end of the
+session, so failing tests finish quickly. pool runs them right away in a
+thread pool, so the callbacks must be thread-safe (with matplotlib, use Figure
+objects rather than pyplot).
+
+In the deferred and pool modes, the timing and any error of each callback are
+appended to the capture.txt of its test at the end of the session. The
+request of the test is pushed around each callback, so that tjoin and fjoin
+still refer to its folders, and the pyplot figures left open by deferred
+callbacks are closed after each of them.
+"""
+import os
+import sys
+import time
+import traceback
+import concurrent.futures
+
+
+TRIGGER_MODES = ["inline", "deferred", "pool"]
+
+
+def _run(call, did_fail, kwargs, request=None):
+    """
+    Run a callback as the test of request, returning (duration, traceback
+    text or None)
+    """
+    from . import fixtures
+    stack = fixtures._pytest_request_stack()
+    if request is not None:
+        stack.append(request)
+    t_start = time.perf_counter()
+    try:
+        call(fail=did_fail, **kwargs)
+        err = None
+    except Exception:
+        err = traceback.format_exc()
+    finally:
+        if request is not None:
+            stack.pop()
+    return time.perf_counter() - t_start, err
+
+
+def _fignums():
+    plt = sys.modules.get("matplotlib.pyplot", None)
+    if plt is None:
+        return set()
+    return set(plt.get_fignums())
+
+
+def _close_figures(fignums_before):
+    """
+    Close the pyplot figures opened since fignums_before, as closefigs only
+    sees the figures of the tests themselves
+    """
+    plt = sys.modules.get("matplotlib.pyplot", None)
+    if plt is None:
+        return
+    for num in set(plt.get_fignums()) - fignums_before:
+        plt.close(num)
+
+
+def _call_name(call):
+    return getattr(call, "__qualname__", None) or repr(call)
+
+
+class TriggerRunner(object):
+    def __init__(self, mode="deferred", workers=4):
+        self.mode = mode
+        self.workers = workers
+        self.executor = None
+        # list of (nodeid, capture_fname, call, did_fail, kwargs, request)
+        self.queued = []
+        # list of (nodeid, capture_fname, call name, did_fail, future)
+        self.pending = []
+        # list of (nodeid, capture_fname, call name, did_fail, duration, err)
+        self.records = []
+
+    def submit(self, nodeid, capture_fname, call, did_fail, kwargs, request=None):
+        if self.mode == "deferred":
+            self.queued.append((nodeid, capture_fname, call, did_fail, kwargs, request))
+            return
+        if self.executor is None:
+            self.executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix="wield-trigger",
+            )
+        future = self.executor.submit(_run, call, did_fail, kwargs, request)
+        self.pending.append((nodeid, capture_fname, _call_name(call), did_fail, future))
+
+    def close(self):
+        """
+        Run the deferred callbacks and wait for the pooled ones. Returns the
+        records of all callbacks.
+        """
+        for nodeid, capture_fname, call, did_fail, kwargs, request in self.queued:
+            fignums_before = _fignums()
+            duration, err = _run(call, did_fail, kwargs, request)
+            _close_figures(fignums_before)
+            self.records.append((nodeid, capture_fname, _call_name(call), did_fail, duration, err))
+        self.queued = []
+        for nodeid, capture_fname, name, did_fail, future in self.pending:
+            duration, err = future.result()
+            self.records.append((nodeid, capture_fname, name, did_fail, duration, err))
+        self.pending = []
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        return self.records
+
+
+def report_records(records):
+    """
+    Append the callback timings and errors to the capture files of their tests
+    """
+    for nodeid, capture_fname, name, did_fail, duration, err in records:
+        os.makedirs(os.path.split(capture_fname)[0], exist_ok=True)
+        with open(capture_fname, "a") as F:
+            F.write("test_trigger {} (fail={}): {:.3f}s, {}\n".format(
+                name, did_fail, duration, "error" if err else "ok"
+            ))
+            if err:
+                F.write(err)
+
+
+# the runner of the session, None for inline callbacks
+_trigger_runner = None
+
+
+def trigger_start(config):
+    global _trigger_runner
+    mode = config.getoption("ws_trigger", default="inline")
+    if mode == "inline":
+        return
+    _trigger_runner = TriggerRunner(mode=mode)
+    return
+
+
+def trigger_runner():
+    return _trigger_runner
+
+
+def trigger_finish():
+    """
+    Run the remaining callbacks and report them. Returns the records of the
+    callbacks that raised.
+    """
+    global _trigger_runner
+    if _trigger_runner is None:
+        return []
+    records = _trigger_runner.close()
+    _trigger_runner = None
+    report_records(records)
+    return [rec for rec in records if rec[5] is not None]
@@ -7,22 +7,40 @@
 # with details inline in source files, comments, and docstrings.
 """
 """
+import os
+import sys
 import time
 import pytest
 from os import path
 
-try:
-    import icecream
-except ImportError:
-    icecream = None
-    pass
+from . import artifacts
 
-try:
-    from IPython.lib.pretty import pretty
+# the pretty-printers are slow to import, so they are loaded by the first
+# dprint rather than with the plugin
+_pretty_printers = None
 
-    pformat = pretty
-except ImportError:
-    from pprint import pformat
+
+def pretty_printers():
+    """
+    The (pformat, icecream) used by dprint, with icecream None if it is not
+    installed.
+    """
+    global _pretty_printers
+    if _pretty_printers is None:
+        try:
+            import icecream
+        except ImportError:
+            icecream = None
+            pass
+
+        try:
+            from IPython.lib.pretty import pretty
+
+            pformat = pretty
+        except ImportError:
+            from pprint import pformat
+        _pretty_printers = (pformat, icecream)
+    return _pretty_printers
 
 
 def relfile(_file_, *args, fname=None):
@@ -80,7 +98,27 @@ def relfile_test(_file_, request, pre=None, post=None, fname=None):
         return relfile(_file_, testname, fname=fname)
 
 
+def time_str(time):
+    """
+    Format a time in seconds with units suited to its magnitude
+    """
+    if time > 10:
+        return "{:.1f}s".format(time)
+    elif time > 1:
+        return "{:.2f}s".format(time)
+    elif time > .001:
+        return "{:.1f}ms".format(time * 1e3)
+    elif time > 1e-6:
+        return "{:.1f}us".format(time * 1e6)
+    else:
+        return "{:.1f}ns".format(time * 1e9)
+
+
 class Timer(object):
+    """
+    Context manager timing its block, reporting the time per iteration of N.
+    For statistical benchmarks, use wield.pytest.benchmark.Benchmark.
+    """
     def __init__(self, N=1):
         self.N = N
 
@@ -94,58 +132,439 @@ class Timer(object):
         return self.interval / self.N
 
     def __str__(self):
-        time = self()
-        if time > 10:
-            return "{:.1f}s".format(time)
-        elif time > 1:
-            return "{:.2f}s".format(time)
-        elif time > .001:
-            return "{:.1f}ms".format(time * 1e3)
-        elif time > 1e-6:
-            return "{:.1f}us".format(time * 1e6)
-        else:
-            return "{:.1f}ns".format(time * 1e9)
+        return time_str(self())
 
     def __enter__(self):
-        self.start = time.time()
+        self.start = time.perf_counter()
         return self
 
     def __exit__(self, *args):
-        self.end = time.time()
+        self.end = time.perf_counter()
         self.interval = self.end - self.start
 
 
+# objects with more elements than this are summarized by dformat rather than
+# pretty-printed in full
+DFORMAT_MAXITEMS = 1000
+# number of leading and trailing elements shown in summaries
+DFORMAT_EDGEITEMS = 3
+
+
+def _as_array(arg):
+    """
+    The numpy array of an array-like, or None if it is not one or does not
+    convert. numpy is never imported just to check.
+    """
+    np = sys.modules.get("numpy", None)
+    if np is None:
+        return None
+    if isinstance(arg, np.ndarray):
+        return arg
+    if not (hasattr(arg, "shape") and hasattr(arg, "dtype")):
+        return None
+    try:
+        arr = np.asarray(arg)
+    except Exception:
+        # e.g. tensors on a GPU
+        return None
+    if not isinstance(arr, np.ndarray):
+        return None
+    return arr
+
+
+def _count_items(arg, limit):
+    """
+    The number of elements in arg, counted up to a little past limit so that
+    large nested objects are not walked in full.
+    """
+    arr = _as_array(arg)
+    if arr is not None:
+        return arr.size
+    if isinstance(arg, (str, bytes)):
+        return 1 + len(arg) // 100
+    if isinstance(arg, dict):
+        count = len(arg)
+        for k, v in arg.items():
+            if count > limit:
+                break
+            count += _count_items(v, limit - count)
+        return count
+    if isinstance(arg, (list, tuple, set, frozenset)):
+        count = len(arg)
+        for v in arg:
+            if count > limit:
+                break
+            count += _count_items(v, limit - count)
+        return count
+    return 1
+
+
+def _format_array(arg, arr, edgeitems):
+    parts = ["{} shape={} dtype={}".format(type(arg).__name__, tuple(arr.shape), arr.dtype)]
+    np = sys.modules["numpy"]
+    if isinstance(arr, np.ma.MaskedArray):
+        # the statistics and values of the unmasked elements
+        flat = arr.compressed()
+        parts.append("masked={}".format(arr.size - flat.size))
+    else:
+        flat = arr.reshape(-1)
+    if arr.dtype.kind in "biufc":
+        try:
+            parts.append("min={:.6g} max={:.6g} mean={:.6g}".format(flat.min(), flat.max(), flat.mean()))
+        except (TypeError, ValueError):
+            pass
+    parts.append("[{} ... {}]".format(
+        ", ".join(repr(v) for v in flat[:edgeitems].tolist()),
+        ", ".join(repr(v) for v in flat[-edgeitems:].tolist()),
+    ))
+    return " ".join(parts)
+
+
+def dformat(arg, maxitems=None, edgeitems=None):
+    """
+    Pretty-format arg, summarizing it if it holds more than maxitems elements.
+
+    Large arrays are shown by shape, dtype, min/max/mean and their leading and
+    trailing values. Large containers show their length and their leading and
+    trailing elements, each formatted the same way. Small objects use the
+    pretty-printer of dprint.
+    """
+    if maxitems is None:
+        maxitems = DFORMAT_MAXITEMS
+    if edgeitems is None:
+        edgeitems = DFORMAT_EDGEITEMS
+
+    if _count_items(arg, maxitems) <= maxitems:
+        pformat, icecream = pretty_printers()
+        return pformat(arg)
+
+    def sub(v):
+        return dformat(v, maxitems=maxitems, edgeitems=edgeitems)
+
+    arr = _as_array(arg)
+    if arr is not None:
+        return _format_array(arg, arr, edgeitems)
+    if isinstance(arg, (str, bytes)):
+        return "{}(len={}) {!r} ... {!r}".format(type(arg).__name__, len(arg), arg[:80], arg[-80:])
+    if isinstance(arg, dict):
+        items = list(arg.items())
+        if len(items) > 2 * edgeitems:
+            items = items[:edgeitems] + [None] + items[-edgeitems:]
+        lines = ["{}(len={}) {{".format(type(arg).__name__, len(arg))]
+        for kv in items:
+            if kv is None:
+                lines.append("  ...")
+            else:
+                lines.append("  {!r}: {},".format(kv[0], sub(kv[1]).replace("\n", "\n  ")))
+        lines.append("}")
+        return "\n".join(lines)
+    if isinstance(arg, (list, tuple, set, frozenset)):
+        items = list(arg)
+        if len(items) > 2 * edgeitems:
+            items = items[:edgeitems] + [Ellipsis] + items[-edgeitems:]
+        lines = ["{}(len={}) [".format(type(arg).__name__, len(arg))]
+        for v in items:
+            if v is Ellipsis:
+                lines.append("  ...")
+            else:
+                lines.append("  {},".format(sub(v).replace("\n", "\n  ")))
+        lines.append("]")
+        return "\n".join(lines)
+    return repr(arg)
+
+
 def dprint(*args, F=None, pretty=True, **kwargs):
-    outs = []
+    """
+    Print the arguments, formatted by dformat if pretty. If F is given, the
+    text is also written into it.
+    """
+    pformat, icecream = pretty_printers()
     if pretty:
-        for arg in args:
-            outs.append(pformat(arg))
+        outs = [dformat(arg) for arg in args]
     else:
-        outs = args
+        outs = [str(arg) for arg in args]
 
     if icecream is not None:
         icecream.DEFAULT_OUTPUT_FUNCTION(" ".join(outs), **kwargs)
     else:
         print(*outs, **kwargs)
 
+    if F is not None:
+        F.write(kwargs.get("sep", " ").join(outs) + kwargs.get("end", "\n"))
+
+
+class BufferedOutput(object):
+    """
+    File-like writer that buffers text in memory and only opens fname when it
+    is flushed, so tests that never print create no file.
+    """
+    def __init__(self, fname, bufsize=1 << 16):
+        self.fname = fname
+        self.bufsize = bufsize
+        self.buffer = []
+        self.size = 0
+        self.opened = False
+
+    def write(self, text):
+        self.buffer.append(text)
+        self.size += len(text)
+        if self.size >= self.bufsize:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        # truncate on the first flush, then append
+        with open(self.fname, "a" if self.opened else "w") as F:
+            F.write("".join(self.buffer))
+        self.opened = True
+        self.buffer = []
+        self.size = 0
+
+    def close(self):
+        self.flush()
+
+
+def node_property(node, key, value):
+    """
+    Attach internal data of a test to its reports, as report.ws_properties.
+    Unlike user_properties, these are not written into --junitxml.
+    """
+    props = getattr(node, "ws_properties", None)
+    if props is None:
+        props = node.ws_properties = {}
+    props[key] = value
+
+
+def report_properties(report):
+    """
+    The ws_properties of a report, as set by node_property
+    """
+    return getattr(report, "ws_properties", {})
+
+
+def call_check(node, check):
+    """
+    Register check to run right after the call of the test. It returns a
+    failure message or None, and a message fails the test if it passed.
+    """
+    checks = getattr(node, "ws_call_checks", None)
+    if checks is None:
+        checks = node.ws_call_checks = []
+    checks.append(check)
+
+
+def call_checks_run(node):
+    """
+    Run and clear the checks registered by call_check, returning their
+    failure messages
+    """
+    checks = getattr(node, "ws_call_checks", None)
+    if not checks:
+        return []
+    node.ws_call_checks = []
+    msgs = []
+    for check in checks:
+        msg = check()
+        if msg is not None:
+            msgs.append(msg)
+    return msgs
+
 
 def tpath_root_make(
     request,
     root_folder="test_results",
     local_folder="test_results",
 ):
-    if isinstance(request.node, pytest.Function):
-        tpath_root = relfile_root(
-            request.node.function.__code__.co_filename, request, pre=root_folder
+    return tpath_node_make(request.node, root_folder=root_folder, local_folder=local_folder)
+
+
+def tpath_node_make(
+    node,
+    root_folder="test_results",
+    local_folder="test_results",
+):
+    """
+    The tpath_root and tpath_local paths of a collected node. Same as
+    tpath_root_make, but usable on items directly, without a request.
+
+    The nodes of wider-scoped fixtures have the layouts
+
+    class: <root_folder>/<file name>/@<class name>, linked from
+      <folder of the test>/<local_folder>/@<class name>
+    module: <root_folder>/<file name>/@module, linked from
+      <folder of the test>/<local_folder>/@<file name>
+    session: <root_folder>/@session, with tpath_local None as it needs no link
+    """
+    if isinstance(node, pytest.Function):
+        _file_ = node.function.__code__.co_filename
+        tpath_root = path.join(
+            node.config.rootpath, root_folder, path.split(_file_)[1], node.name
+        )
+        tpath_local = path.join(path.split(_file_)[0], local_folder, node.name)
+        return tpath_root, tpath_local
+    elif isinstance(node, pytest.Class):
+        fdir, fname = path.split(str(node.path))
+        tpath_root = path.join(
+            node.config.rootpath, root_folder, fname, "@" + node.name
         )
-        tpath_local = relfile_test(
-            request.node.function.__code__.co_filename, request, pre=local_folder
+        tpath_local = path.join(fdir, local_folder, "@" + node.name)
+        return tpath_root, tpath_local
+    elif isinstance(node, pytest.File):
+        fdir, fname = path.split(str(node.path))
+        tpath_root = path.join(
+            node.config.rootpath, root_folder, fname, "@module"
         )
+        tpath_local = path.join(fdir, local_folder, "@" + fname)
         return tpath_root, tpath_local
-    raise RuntimeError("tpath currently only works for functions")
+    elif isinstance(node, pytest.Session):
+        return path.join(node.config.rootpath, root_folder, "@session"), None
+    raise RuntimeError("tpath only works for functions, classes, modules and the session")
+
+
+# folders and (tpath_root, tpath_local) links known to be set up correctly
+# during this session. These save the syscalls of re-checking them for every
+# test and every tjoin, which are slow on network filesystems.
+_dirs_known = set()
+_tpath_known = set()
+# realpath of folders that contain the tpath_root and tpath_local
+_realpath_known = {}
+
+
+def makedirs_cached(fdir):
+    """
+    os.makedirs(fdir, exist_ok=True), skipped if fdir was already made
+    """
+    if fdir in _dirs_known:
+        return
+    os.makedirs(fdir, exist_ok=True)
+    _dirs_known.add(fdir)
+
+
+def _realpath_cached(fdir):
+    rpath = _realpath_known.get(fdir, None)
+    if rpath is None:
+        rpath = os.path.realpath(fdir)
+        _realpath_known[fdir] = rpath
+    return rpath
+
+
+def tpath_setup(tpath_root, tpath_local):
+    """
+    Create the tpath_root folder and the tpath_local symlink that points to
+    it from the folder of the test. Skipped if already done this session.
+    """
+    if (tpath_root, tpath_local) in _tpath_known:
+        return
+
+    tpath_root_dir, tpath_root_name = path.split(tpath_root)
+    makedirs_cached(tpath_root_dir)
+    os.makedirs(tpath_root, exist_ok=True)
+    os.utime(tpath_root, None)
+    if tpath_local is None:
+        _tpath_known.add((tpath_root, tpath_local))
+        return
+
+    tpath_local_dir = path.split(tpath_local)[0]
+
+    # tpath_root is a plain folder made above, so only its parent needs the realpath
+    tpath_rel = os.path.relpath(
+        path.join(_realpath_cached(tpath_root_dir), tpath_root_name),
+        _realpath_cached(tpath_local_dir),
+    )
+    if not os.path.lexists(tpath_local):
+        makedirs_cached(tpath_local_dir)
+        try:
+            os.symlink(tpath_rel, tpath_local, target_is_directory=True)
+        except FileExistsError:
+            # another xdist worker made it first, check it below
+            pass
+        else:
+            _tpath_known.add((tpath_root, tpath_local))
+            return
+
+    if os.path.islink(tpath_local):
+        if not _link_matches(tpath_local, tpath_root):
+            # replaced atomically, as other workers may be checking it too
+            tpath_tmp = tpath_local + ".tmp{}".format(os.getpid())
+            if os.path.lexists(tpath_tmp):
+                os.unlink(tpath_tmp)
+            os.symlink(tpath_rel, tpath_tmp, target_is_directory=True)
+            os.replace(tpath_tmp, tpath_local)
+    else:
+        import warnings
+
+        warnings.warn("test_results local path {} exists".format(tpath_local))
+
+    _tpath_known.add((tpath_root, tpath_local))
+    return
+
+
+def tpath_file(tpath_root, *subpath):
+    """
+    Join subpath to tpath_root for a file that the test is about to write,
+    breaking its link into the --ws-artifacts pool.
+    """
+    fpath = path.join(tpath_root, *subpath)
+    if subpath and artifacts.artifacts_enabled():
+        artifacts.detach_file(fpath)
+    return fpath
+
+
+def _link_matches(tpath_local, tpath_root):
+    """
+    Whether the symlink tpath_local points to tpath_root
+    """
+    try:
+        target = os.readlink(tpath_local)
+    except OSError:
+        return False
+    return os.path.normpath(
+        os.path.join(path.split(tpath_local)[0], target)
+    ) == os.path.normpath(tpath_root)
+
+
+def tpath_setup_items(items):
+    """
+    Set up the tpath folders and symlinks of all of the collected items in one
+    pass. Items that do not support tpaths are skipped.
+    """
+    for item in items:
+        try:
+            tpath_root, tpath_local = tpath_node_make(item)
+        except RuntimeError:
+            continue
+        tpath_setup(tpath_root, tpath_local)
+    return
+
+
+def tpath_forget(tpath_root):
+    """
+    Drop the cached state of tpath_root and anything below it, used when it is
+    removed.
+    """
+    prefix = tpath_root + os.sep
+    for fdir in list(_dirs_known):
+        if fdir == tpath_root or fdir.startswith(prefix):
+            _dirs_known.discard(fdir)
+    for key in list(_tpath_known):
+        if key[0] == tpath_root or key[0].startswith(prefix):
+            _tpath_known.discard(key)
+    return
 
 
 def fpath_raw_make(request):
-    if isinstance(request.node, pytest.Function):
-        return path.split(request.node.function.__code__.co_filename)[0]
-    raise RuntimeError("fpath currently only works for functions")
+    return fpath_node_make(request.node)
+
+
+def fpath_node_make(node):
+    """
+    The folder of the file of a node, or the rootpath for the session
+    """
+    if isinstance(node, pytest.Function):
+        return path.split(node.function.__code__.co_filename)[0]
+    elif isinstance(node, (pytest.Class, pytest.File)):
+        return path.split(str(node.path))[0]
+    elif isinstance(node, pytest.Session):
+        return str(node.config.rootpath)
+    raise RuntimeError("fpath only works for functions, classes, modules and the session")